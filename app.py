@@ -1,18 +1,34 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, abort, redirect, request, jsonify, render_template, stream_with_context
 import os
+import atexit
+import json
 import logging
 from services.sheets_service import SheetsService
+from services.sheets_buffer_service import SheetsRowBuffer
 from services.llm_service import LLMService
 from services.pdf_service import PDFService
+from services.report_file_service import ReportFileService, SENDFILE_X_SENDFILE
+from services.report_storage import ReportStorage
+from services.object_storage import LocalArtifactStore, create_artifact_store
 from services.email_service import EmailService
 from services.integration_service import IntegrationService
 from services.subscription_service import SubscriptionService
-from services.report_generator import ReportGenerator
+from services.report_generator import ReportContentError, ReportGenerator
 from services.utilities_service import UtilitiesService
 from services.mongodb_service import MongoDBService
+from services.job_queue_service import JobQueueService
+from services.drive_upload_service import DriveUploadService
+from services.fanout_service import FanoutService
+from services.industry_content_service import IndustryContentService
+from services.usage_service import current_usage, usage_tracking
+from services.metrics_service import (
+    current_stage_breakdown, record_stage_error, render_metrics, stage_breakdown, track_stage
+)
 from config import Config
 from werkzeug.exceptions import HTTPException
-from marshmallow import Schema, fields, ValidationError
+from werkzeug.security import safe_join
+from marshmallow import ValidationError
+from schemas import ReportRequestSchema, get_report_inputs
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -27,9 +43,34 @@ logging.basicConfig(
 
 # Define the reports directory
 reports_dir = os.path.join(app.root_path, 'reports')
-if not os.path.exists(reports_dir):
-    os.makedirs(reports_dir)
-    logger.debug(f"Created reports directory at {reports_dir}")
+
+# Hash-sharded report files with a background retention sweeper
+report_storage = ReportStorage(
+    reports_dir,
+    max_age=Config.REPORT_MAX_AGE,
+    max_bytes=Config.REPORT_MAX_BYTES,
+    sweep_interval=Config.REPORT_SWEEP_INTERVAL,
+    blob_dir=Config.PDF_STORE_DIR
+)
+report_storage.start_sweeper()
+
+# Where finished reports are shared from: this instance's disk or an S3-compatible bucket
+try:
+    artifact_store = create_artifact_store(report_storage)
+    logger.info(f"Report storage backend: {Config.REPORT_STORAGE_BACKEND}")
+except Exception as e:
+    logger.error(f"Failed to initialize {Config.REPORT_STORAGE_BACKEND} report storage, using local disk: {e}",
+                 exc_info=True)
+    artifact_store = LocalArtifactStore(report_storage)
+
+# Report downloads: ETags, conditional and range requests, optionally offloaded to the front proxy
+app.config['USE_X_SENDFILE'] = Config.REPORT_SENDFILE_MODE == SENDFILE_X_SENDFILE
+report_file_service = ReportFileService(
+    report_storage,
+    sendfile_mode=Config.REPORT_SENDFILE_MODE,
+    accel_prefix=Config.REPORT_ACCEL_PREFIX,
+    max_age=Config.REPORT_CACHE_MAX_AGE
+)
 
 # Initialize services based on configuration flags
 email_service = None
@@ -44,7 +85,7 @@ else:
 
 sheets_service = None
 if Config.ENABLE_SHEETS_SERVICE:
-    google_sheets_credentials = app.config.get('GOOGLE_SHEETS_CREDENTIALS_JSON')
+    google_sheets_credentials = Config.GOOGLE_SHEETS_CREDENTIALS
     sheet_name = app.config.get('SHEET_NAME')
     if google_sheets_credentials and sheet_name:
         try:
@@ -57,6 +98,19 @@ if Config.ENABLE_SHEETS_SERVICE:
 else:
     logger.info("SheetsService is disabled.")
 
+sheets_row_buffer = None
+if sheets_service and Config.ENABLE_SHEETS_BUFFER:
+    sheets_row_buffer = SheetsRowBuffer(
+        sheets_service.append_records,
+        max_rows=Config.SHEETS_BUFFER_MAX_ROWS,
+        max_age=Config.SHEETS_BUFFER_MAX_AGE,
+        spill_path=Config.SHEETS_SPILL_PATH
+    )
+    sheets_row_buffer.start()
+    # Rows still in memory are written, or spilled, when the process exits
+    atexit.register(sheets_row_buffer.close)
+    logger.info("Sheets rows are buffered.")
+
 mongodb_service = None
 if Config.ENABLE_DATABASE:
     try:
@@ -80,13 +134,34 @@ else:
 pdf_service = None
 if Config.ENABLE_PDF_SERVICE:
     try:
-        pdf_service = PDFService()
+        pdf_service = PDFService(storage=report_storage, artifacts=artifact_store)
         logger.info("PDFService is enabled.")
     except Exception as e:
         logger.error(f"Failed to initialize PDFService: {e}", exc_info=True)
 else:
     logger.info("PDFService is disabled.")
 
+drive_upload_service = None
+if Config.ENABLE_DRIVE_UPLOADS and sheets_service:
+    try:
+        drive_upload_service = DriveUploadService(
+            sheets_service,
+            Config.DRIVE_UPLOAD_DB_PATH,
+            workers=Config.DRIVE_UPLOAD_WORKERS,
+            max_attempts=Config.DRIVE_UPLOAD_MAX_ATTEMPTS,
+            retry_delay=Config.DRIVE_UPLOAD_RETRY_DELAY,
+            batch_size=Config.DRIVE_PERMISSION_BATCH_SIZE,
+            deferred_ttl=Config.DRIVE_DEFERRED_UPLOAD_TTL,
+            on_uploaded=(lambda report_id, drive_url: mongodb_service.update_report(report_id, {'drive_url': drive_url}))
+            if mongodb_service else None
+        )
+        drive_upload_service.start()
+        logger.info("DriveUploadService is enabled.")
+    except Exception as e:
+        logger.error(f"Failed to initialize DriveUploadService: {e}", exc_info=True)
+else:
+    logger.info("DriveUploadService is disabled.")
+
 integration_service = None
 if Config.ENABLE_INTEGRATION_SERVICE:
     try:
@@ -110,6 +185,9 @@ else:
 utilities_service = UtilitiesService()
 logger.info("UtilitiesService is initialized.")
 
+fanout_service = FanoutService()
+logger.info(f"FanoutService is initialized with {Config.FANOUT_MAX_WORKERS} workers.")
+
 # Initialize the ReportGenerator if LLM service is enabled
 report_generator = None
 if llm_service:
@@ -117,7 +195,12 @@ if llm_service:
         report_generator = ReportGenerator(
             client=llm_service.client,
             model=llm_service.model,
-            utilities_service=utilities_service
+            utilities_service=utilities_service,
+            cache=llm_service.cache,
+            backend=llm_service.backend,
+            resilience=llm_service.resilience,
+            budget=llm_service.budget,
+            router=llm_service.router
         )
         logger.info("ReportGenerator is initialized with LLM service.")
     except Exception as e:
@@ -125,6 +208,24 @@ if llm_service:
 else:
     logger.info("ReportGenerator is not initialized because LLM service is disabled.")
 
+# Share precomputed industry-scoped sections across all clients in an industry
+industry_content_service = None
+if report_generator and Config.ENABLE_INDUSTRY_CONTENT:
+    try:
+        industry_content_service = IndustryContentService(
+            report_generator,
+            Config.INDUSTRY_CONTENT_PATH,
+            Config.INDUSTRY_CONTENT_REFRESH_INTERVAL
+        )
+        report_generator.industry_content = industry_content_service
+        if Config.INDUSTRY_CONTENT_REFRESH_IN_WEB:
+            industry_content_service.start_refresher()
+        logger.info("IndustryContentService is enabled.")
+    except Exception as e:
+        logger.error(f"Failed to initialize IndustryContentService: {e}", exc_info=True)
+else:
+    logger.info("IndustryContentService is disabled.")
+
 @app.errorhandler(HTTPException)
 def handle_http_exception(e):
     return utilities_service.handle_http_exception(e)
@@ -138,129 +239,177 @@ def index():
     logger.info("Rendering the main report generation page")
     return render_template('generate_report.html')
 
-# Define the ReportRequestSchema
-class ReportRequestSchema(Schema):
-    client_name = fields.Str(required=True)
-    client_email = fields.Email(required=True)
-    industry = fields.Str(required=True)
-    question1 = fields.Str(required=True)
-    question2 = fields.Str(required=True)
-    question3 = fields.Str(required=True)
+LLM_DISABLED_MESSAGE = "LLM service is disabled, and report generation cannot proceed."
 
-@app.route('/generate_report', methods=['POST'])
-def generate_report():
-    logger.info("Received a request to generate a report")
-    try:
-        # Validate and deserialize input data
-        data = request.json
-        logger.debug(f"Request data received: {data}")
-
-        schema = ReportRequestSchema()
-        validated_data = schema.load(data)
-        logger.debug(f"Validated data: {validated_data}")
-
-        user_name = validated_data.get('client_name')
-        industry = validated_data.get('industry')
-        answers = [
-            validated_data.get('question1'),
-            validated_data.get('question2'),
-            validated_data.get('question3'),
-        ]
+def build_report(validated_data: dict) -> dict:
+    """
+    Runs the full report pipeline for validated request data and returns the
+    report ID and artifact URLs. Used inline by /generate_report and by the job queue workers.
+    """
+    user_name, industry, answers = get_report_inputs(validated_data)
 
+    with stage_breakdown(), usage_tracking(industry):
         # Generate report content
         if Config.ENABLE_LLM_SERVICE and report_generator:
             logger.info("Generating report content using LLM service")
-            html_content = report_generator.generate_report_content(industry, answers, user_name)
+            with track_stage('report.content'):
+                html_content = report_generator.generate_report_content(industry, answers, user_name)
+            if not html_content:
+                record_stage_error('report.content')
+                # A blank report must not be rendered, stored or emailed
+                raise ReportContentError("No report content was generated")
             logger.debug(f"Generated HTML content")
         else:
-            html_content = "LLM service is disabled, and report generation cannot proceed."
+            html_content = LLM_DISABLED_MESSAGE
             logger.warning("LLM service is disabled")
 
-        # Generate PDF
-        pdf_url = None
-        report_id = utilities_service.generate_report_id()
-        if Config.ENABLE_PDF_SERVICE and pdf_service:
-            logger.info("Generating PDF from HTML content")
-            file_name = f"report-{user_name}-{report_id}.pdf"
-            output_path = os.path.join(reports_dir, file_name)
-            pdf_generation_result = pdf_service.generate_pdf(html_content, output_path)
-            if pdf_generation_result:
-                logger.info(f"PDF generated successfully at: {output_path}")
-                pdf_url = f"/reports/{file_name}"
-            else:
-                logger.error("PDF generation failed")
+        return publish_report(validated_data, html_content)
+
+def publish_report(validated_data: dict, html_content: str) -> dict:
+    """
+    Renders the PDF and Google Doc for generated report content, runs the side
+    effects and returns the report ID and artifact URLs.
+    """
+    user_name, industry, _ = get_report_inputs(validated_data)
+
+    # Generate PDF
+    pdf_url = None
+    report_id = utilities_service.generate_report_id()
+    if Config.ENABLE_PDF_SERVICE and pdf_service:
+        logger.info("Generating PDF from HTML content")
+        file_name = f"report-{user_name}-{report_id}.pdf"
+        output_path = report_storage.path_for(file_name)
+        if Config.PDF_RENDER_MODE == 'lazy':
+            # Rendered by serve_pdf on the first download instead of before responding
+            with track_stage('report.pdf_pending'):
+                pdf_generation_result = pdf_service.save_pending(html_content, output_path)
         else:
-            logger.warning("PDF service is disabled")
+            with track_stage('report.pdf'):
+                pdf_generation_result = pdf_service.generate_pdf(html_content, output_path)
+        if pdf_generation_result:
+            logger.info(f"PDF generated successfully at: {output_path}")
+            pdf_url = f"/reports/{file_name}"
+        else:
+            record_stage_error('report.pdf')
+            logger.error("PDF generation failed")
+    else:
+        logger.warning("PDF service is disabled")
 
-        # Create a Google Doc for the report if SheetsService is enabled
-        doc_url = None
-        if Config.ENABLE_SHEETS_SERVICE and sheets_service:
-            logger.info(f"Creating Google Doc for report ID: {report_id}")
+    # Create a Google Doc for the report if SheetsService is enabled
+    doc_url = None
+    if Config.ENABLE_SHEETS_SERVICE and sheets_service:
+        logger.info(f"Creating Google Doc for report ID: {report_id}")
+        with track_stage('report.google_doc'):
             doc_url = sheets_service.create_google_doc(report_id, html_content)
-            logger.debug(f"Google Doc created at URL: {doc_url}")
+        if not doc_url:
+            record_stage_error('report.google_doc')
+        logger.debug(f"Google Doc created at URL: {doc_url}")
+    else:
+        logger.warning("Sheets service is disabled")
+
+    # Prepare report data
+    report_data = {
+        'report_id': report_id,
+        'client_name': validated_data['client_name'],
+        'client_email': validated_data['client_email'],
+        'industry': industry,
+        'pdf_url': pdf_url,
+        'doc_url': doc_url,
+        'created_at': utilities_service.get_current_timestamp(),
+    }
+    usage = current_usage()
+    llm_usage = usage.as_dict() if usage else {}
+
+    # Run the independent side effects concurrently, each with its own deadline
+    sinks = []
+    if Config.ENABLE_DATABASE and mongodb_service:
+        # Usage is only stored in Mongo; the sheet row only has columns for the REPORT_COLUMNS fields
+        sinks.append((
+            'mongodb',
+            lambda: mongodb_service.save_report_data({**report_data, 'llm_usage': llm_usage}),
+            Config.SINK_TIMEOUT_MONGODB
+        ))
+    if Config.ENABLE_SHEETS_SERVICE and sheets_service:
+        if sheets_row_buffer:
+            sinks.append(('sheets', lambda: sheets_row_buffer.add(report_data), Config.SINK_TIMEOUT_SHEETS))
         else:
-            logger.warning("Sheets service is disabled")
-
-        # Prepare report data
-        report_data = {
-            'report_id': report_id,
-            'client_name': validated_data['client_name'],
-            'client_email': validated_data['client_email'],
-            'industry': industry,
-            'pdf_url': pdf_url,
-            'doc_url': doc_url,
-            'created_at': utilities_service.get_current_timestamp(),
-        }
-
-        # Save report data to MongoDB
-        if Config.ENABLE_DATABASE and mongodb_service:
-            try:
-                mongodb_service.save_report_data(report_data)
-                logger.info("Report data saved to MongoDB")
-            except Exception as e:
-                logger.error(f"Error saving report data to MongoDB: {e}", exc_info=True)
-
-        # Save report data to Google Sheets
-        if Config.ENABLE_SHEETS_SERVICE and sheets_service:
-            try:
-                sheets_service.write_data(data=report_data)
-                logger.info("Report data written to Google Sheets")
-            except Exception as e:
-                logger.error(f"Error writing data to Google Sheets: {e}", exc_info=True)
-
-        # Send report email to user
-        if Config.ENABLE_EMAIL_SERVICE and email_service:
-            try:
-                logger.info("Sending report email to user")
-                email_service.send_report_email_to_user(report_data)
-                logger.info("Report email sent to user")
-            except Exception as e:
-                logger.error(f"Failed to send report email to user: {e}", exc_info=True)
+            sinks.append(('sheets', lambda: sheets_service.write_data(data=report_data), Config.SINK_TIMEOUT_SHEETS))
+    if Config.ENABLE_EMAIL_SERVICE and email_service:
+        sinks.append(('user_email', lambda: email_service.send_report_email_to_user(report_data), Config.SINK_TIMEOUT_EMAIL))
+        sinks.append(('admin_email', lambda: email_service.send_notification_email_to_admin(report_data), Config.SINK_TIMEOUT_EMAIL))
+    if Config.ENABLE_SUBSCRIPTION_SERVICE and subscription_service:
+        sinks.append((
+            'subscription',
+            lambda: subscription_service.add_subscriber(validated_data['client_email'], industry),
+            Config.SINK_TIMEOUT_SUBSCRIPTION
+        ))
+    with track_stage('report.side_effects'):
+        sink_outcomes = fanout_service.run(sinks)
+
+    # Queued after the Mongo record is written, which the upload updates with its Drive URL
+    if drive_upload_service and pdf_url:
+        try:
+            # Lazy PDFs are uploaded once their first download has rendered them
+            drive_upload_service.enqueue(
+                report_id, output_path, file_name, deferred=Config.PDF_RENDER_MODE == 'lazy'
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue Drive upload for report {report_id}: {e}", exc_info=True)
+
+    logger.info(f'Report generated successfully with ID: {report_id}')
+    breakdown = current_stage_breakdown()
+    logger.info(json.dumps({
+        'event': 'report_generated',
+        'report_id': report_id,
+        'industry': industry,
+        'stages_ms': breakdown.as_dict() if breakdown else {},
+        'llm_usage': llm_usage,
+        'sinks': sink_outcomes,
+    }))
+    return {
+        "report_id": report_id,
+        "pdf_url": pdf_url,
+        "doc_url": doc_url,
+        "sinks": sink_outcomes
+    }
+
+# Initialize the job queue so /generate_report can hand work to background workers
+job_queue_service = None
+if Config.ENABLE_JOB_QUEUE:
+    try:
+        job_queue_service = JobQueueService(build_report)
+        if Config.JOB_RUN_WORKERS_IN_WEB:
+            job_queue_service.start()
+        logger.info(f"JobQueueService is enabled with the '{Config.JOB_QUEUE_BACKEND}' backend.")
+    except Exception as e:
+        logger.error(f"Failed to initialize JobQueueService: {e}", exc_info=True)
+else:
+    logger.info("JobQueueService is disabled.")
 
-        # Send notification email to admin
-        if Config.ENABLE_EMAIL_SERVICE and email_service:
-            try:
-                logger.info("Sending notification email to admin")
-                email_service.send_notification_email_to_admin(report_data)
-                logger.info("Notification email sent to admin")
-            except Exception as e:
-                logger.error(f"Failed to send notification email to admin: {e}", exc_info=True)
+@app.route('/generate_report', methods=['POST'])
+def generate_report():
+    logger.info("Received a request to generate a report")
+    try:
+        # Validate and deserialize input data
+        data = request.json
+        logger.debug(f"Request data received: {data}")
 
-        # Add the user to the subscription list if enabled
-        if Config.ENABLE_SUBSCRIPTION_SERVICE and subscription_service:
-            try:
-                subscription_service.add_subscriber(validated_data['client_email'], industry)
-                logger.info(f"Subscriber added: {validated_data['client_email']}")
-            except Exception as e:
-                logger.error(f"Failed to add subscriber: {e}", exc_info=True)
+        schema = ReportRequestSchema()
+        validated_data = schema.load(data)
+        logger.debug(f"Validated data: {validated_data}")
 
-        logger.info(f'Report generated successfully with ID: {report_id}')
-        return jsonify({
-            "status": "success",
-            "report_id": report_id,
-            "pdf_url": pdf_url,
-            "doc_url": doc_url
-        })
+        # In job mode the pipeline runs on a background worker
+        if job_queue_service:
+            job_id = job_queue_service.submit(validated_data)
+            status_url = f"/jobs/{job_id}"
+            return jsonify({
+                "status": "queued",
+                "job_id": job_id,
+                "status_url": status_url
+            }), 202, {'Location': status_url}
+
+        result = build_report(validated_data)
+        return jsonify({"status": "success", **result})
     except ValidationError as err:
         logger.error(f"Validation error: {err.messages}")
         return jsonify({
@@ -275,10 +424,96 @@ def generate_report():
             "message": "An error occurred while generating the report."
         }), 500
 
+def format_sse(event: str, data: dict) -> str:
+    """Formats a Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/generate_report/stream', methods=['POST'])
+def generate_report_stream():
+    logger.info("Received a request to stream a report")
+    try:
+        validated_data = ReportRequestSchema().load(request.json)
+    except ValidationError as err:
+        logger.error(f"Validation error: {err.messages}")
+        return jsonify({
+            "status": "error",
+            "message": "Validation error",
+            "details": err.messages
+        }), 400
+
+    def events():
+        try:
+            user_name, industry, answers = get_report_inputs(validated_data)
+            with stage_breakdown(), usage_tracking(industry):
+                if Config.ENABLE_LLM_SERVICE and report_generator:
+                    sections = report_generator.stream_report_content(industry, answers, user_name)
+                    while True:
+                        try:
+                            section_html = next(sections)
+                        except StopIteration as done:
+                            html_content = done.value
+                            break
+                        yield format_sse('section', {"html": section_html})
+                    if not html_content:
+                        record_stage_error('report.content')
+                        raise ReportContentError("No report content was generated")
+                else:
+                    html_content = LLM_DISABLED_MESSAGE
+                    logger.warning("LLM service is disabled")
+
+                result = publish_report(validated_data, html_content)
+            yield format_sse('complete', {"status": "success", **result})
+        except Exception as e:
+            logger.error(f"Error streaming report: {e}", exc_info=True)
+            yield format_sse('error', {
+                "status": "error",
+                "message": "An error occurred while generating the report."
+            })
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    if not job_queue_service:
+        return jsonify({"status": "error", "message": "Job queue is disabled."}), 404
+
+    job = job_queue_service.get_job(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": f"Job {job_id} not found."}), 404
+    return jsonify(job)
+
+@app.route('/metrics')
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
 @app.route('/reports/<filename>')
 def serve_pdf(filename):
     logger.debug(f"Serving PDF file: {filename}")
-    return send_from_directory(reports_dir, filename)
+    output_path = report_storage.path_for(filename) if safe_join(reports_dir, filename) else None
+    if not output_path:
+        abort(404)
+    # A local copy is only kept once the report is in the shared store as well
+    available = os.path.exists(output_path) or artifact_store.exists(filename)
+    rendered = False
+    if not available and pdf_service:
+        # Reports generated in lazy PDF mode are rendered on their first download
+        with track_stage('report.pdf'):
+            rendered = bool(pdf_service.render_on_demand(output_path))
+            available = rendered or artifact_store.exists(filename)
+        if rendered and drive_upload_service:
+            try:
+                drive_upload_service.release(filename)
+            except Exception as e:
+                logger.error(f"Failed to release Drive upload of {filename}: {e}", exc_info=True)
+    download_url = artifact_store.download_url(filename) if available else None
+    if download_url:
+        # Object storage sends the bytes; the worker only signs the URL
+        return redirect(download_url)
+    return report_file_service.send(filename)
 
 @app.route('/dashboard')
 def dashboard():
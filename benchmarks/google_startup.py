@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Measures how long a worker takes to construct SheetsService, in a fresh interpreter per
+# run so that imports are included. Network access is blocked and counted: every request
+# made at startup would be a round trip to Google, and a failure in any of them stops the
+# worker from booting. Pass --repo to measure another checkout, e.g. a `git worktree` of
+# an older commit.
+CHILD = r'''
+import json, os, sys, time
+started_at = time.perf_counter()
+import httplib2, requests
+calls = []
+
+def blocked(*args, **kwargs):
+    calls.append(1)
+    raise ConnectionError('network blocked by benchmark')
+
+httplib2.Http.request = blocked
+requests.Session.send = blocked
+sys.path.insert(0, os.environ['BENCH_REPO'])
+result = {}
+try:
+    from services.sheets_service import SheetsService
+    imported_at = time.perf_counter()
+    result['import_s'] = imported_at - started_at
+    SheetsService(os.environ['BENCH_KEY_FILE'], 'ReportData')
+    result['construct_s'] = time.perf_counter() - imported_at
+    result['ok'] = True
+except Exception as e:
+    result['ok'] = False
+    result['error'] = type(e).__name__
+result['total_s'] = time.perf_counter() - started_at
+result['requests'] = len(calls)
+print(json.dumps(result))
+'''
+
+
+def write_key_file(directory: str) -> tuple:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    info = {
+        'type': 'service_account',
+        'project_id': 'benchmark',
+        'private_key_id': 'benchmark',
+        'private_key': key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode(),
+        'client_email': 'benchmark@benchmark.iam.gserviceaccount.com',
+        'client_id': 'benchmark',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+    }
+    path = os.path.join(directory, 'service-account.json')
+    with open(path, 'w') as f:
+        json.dump(info, f)
+    return path, info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure SheetsService startup time.')
+    parser.add_argument('--repo', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        key_file, info = write_key_file(directory)
+        env = {
+            **os.environ,
+            'BENCH_REPO': os.path.abspath(args.repo),
+            'BENCH_KEY_FILE': key_file,
+            'GOOGLE_SHEETS_TYPE': 'service_account',
+            'GOOGLE_SHEETS_PROJECT_ID': info['project_id'],
+            'GOOGLE_SHEETS_PRIVATE_KEY_ID': info['private_key_id'],
+            'GOOGLE_SHEETS_PRIVATE_KEY': info['private_key'],
+            'GOOGLE_SHEETS_CLIENT_EMAIL': info['client_email'],
+            'GOOGLE_SHEETS_CLIENT_ID': info['client_id'],
+            'GOOGLE_ID_CACHE_PATH': os.path.join(directory, 'google_ids.json'),
+            'OPENAI_API_KEY': 'benchmark',
+            'PDFCO_API_KEY': 'benchmark',
+            'ENABLE_DATABASE': 'False',
+            'ENABLE_EMAIL_SERVICE': 'False',
+            'LOG_LEVEL': 'WARNING',
+        }
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, '-c', CHILD], env=env, cwd=directory, capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'run':>4} {'import s':>9} {'construct s':>12} {'total s':>8} {'requests':>9}  outcome")
+    for index, result in enumerate(results, 1):
+        outcome = 'ok' if result['ok'] else f"failed ({result['error']})"
+        construct = f"{result['construct_s']:.3f}" if 'construct_s' in result else '-'
+        print(f"{index:>4} {result.get('import_s', 0):>9.3f} {construct:>12} {result['total_s']:>8.3f} "
+              f"{result['requests']:>9}  {outcome}")
+    print(f"median total: {statistics.median(r['total_s'] for r in results):.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from flask import Flask
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.report_file_service import (  # noqa: E402
+    ReportFileService, SENDFILE_NONE, SENDFILE_X_ACCEL, SENDFILE_X_SENDFILE
+)
+from services.report_storage import ReportStorage  # noqa: E402
+
+# Measures how many report downloads one Python server can answer per second in each
+# serving mode. Bytes are counted as sent by the Python process, so the x-accel and
+# x-sendfile rows show the work left to the worker once nginx/Apache sends the file.
+FILE_NAME = 'report-benchmark.pdf'
+
+
+def make_app(reports_dir: str, sendfile_mode: str) -> Flask:
+    app = Flask(__name__)
+    app.config['USE_X_SENDFILE'] = sendfile_mode == SENDFILE_X_SENDFILE
+    service = ReportFileService(ReportStorage(reports_dir), sendfile_mode=sendfile_mode, max_age=86400)
+    app.add_url_rule('/reports/<filename>', 'serve_pdf', service.send)
+    return app
+
+
+def run_case(base_url: str, headers: dict, requests: int, concurrency: int, read_body: bool):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(base_url=base_url, limits=limits) as client:
+        def fetch(_):
+            with client.stream('GET', f'/reports/{FILE_NAME}', headers=headers) as response:
+                # With X-Sendfile, Content-Length describes the file the proxy would send, not this body
+                size = len(response.read()) if read_body else 0
+                return response.status_code, size
+
+        # One warm-up request also fills the ETag cache
+        fetch(0)
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started_at
+    statuses = sorted({status for status, _ in results})
+    sent = sum(size for _, size in results)
+    return requests / elapsed, sent / elapsed / 1024 / 1024, statuses
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark report downloads across serving modes.')
+    parser.add_argument('--size-mb', type=float, default=2, help='Size of the served PDF.')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as reports_dir:
+        with open(os.path.join(reports_dir, FILE_NAME), 'wb') as f:
+            f.write(b'%PDF-1.4\n' + os.urandom(int(args.size_mb * 1024 * 1024)))
+
+        etag = ReportFileService(reports_dir).file_etag(
+            os.path.join(reports_dir, FILE_NAME), os.stat(os.path.join(reports_dir, FILE_NAME))
+        )
+        cases = [
+            ('python, full download', SENDFILE_NONE, {}),
+            ('python, 64 KiB range', SENDFILE_NONE, {'Range': 'bytes=0-65535'}),
+            ('python, If-None-Match (304)', SENDFILE_NONE, {'If-None-Match': f'"{etag}"'}),
+            ('x-accel-redirect', SENDFILE_X_ACCEL, {}),
+            ('x-sendfile', SENDFILE_X_SENDFILE, {}),
+        ]
+
+        print(f"{args.size_mb} MiB file, {args.requests} requests, concurrency {args.concurrency}")
+        print(f"{'mode':<32}{'req/s':>10}{'MiB/s':>10}  status")
+        for name, mode, headers in cases:
+            server = make_server('127.0.0.1', 0, make_app(reports_dir, mode), threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                rate, throughput, statuses = run_case(
+                    f'http://127.0.0.1:{server.server_port}', headers, args.requests, args.concurrency,
+                    read_body=mode != SENDFILE_X_SENDFILE
+                )
+            finally:
+                server.shutdown()
+            print(f"{name:<32}{rate:>10.1f}{throughput:>10.1f}  {statuses}")
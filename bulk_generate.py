@@ -0,0 +1,37 @@
+import argparse
+import logging
+import os
+from config import Config
+from services.bulk_report_service import BulkReportService
+from services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+# Generates reports offline for every lead in a CSV (with a header row) or JSONL export,
+# using the same validation, report generator and PDF rendering as /generate_report.
+# Emails, sheets and database writes are skipped. Re-running with the same output
+# directory resumes from its checkpoint and retries failed rows.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate reports in bulk from a CSV or JSONL file.')
+    parser.add_argument('input', help='CSV or .jsonl file with client_name, client_email, industry and question1-3.')
+    parser.add_argument('--output-dir', default='bulk_reports', help='Where reports, the checkpoint and the manifest go.')
+    parser.add_argument('--llm-concurrency', type=int, default=Config.LLM_MAX_CONCURRENCY,
+                        help='Reports generated at once.')
+    parser.add_argument('--pdf-workers', type=int, default=os.cpu_count() or 1,
+                        help='wkhtmltopdf processes rendering PDFs at once.')
+    parser.add_argument('--no-pdf', action='store_true', help='Write HTML files instead of rendering PDFs.')
+    args = parser.parse_args()
+
+    llm_service = LLMService()
+    if not llm_service.client:
+        logger.warning("USE_OPENAI_API is disabled; every row will fail with fallback content.")
+
+    service = BulkReportService(
+        llm_service.report_generator,
+        output_dir=args.output_dir,
+        llm_concurrency=args.llm_concurrency,
+        pdf_workers=args.pdf_workers,
+        render_pdfs=not args.no_pdf
+    )
+    manifest = service.run(args.input)
+    print(f"{manifest['counts']} (estimated cost ${manifest['cost_usd']:.4f}); manifest: {service.manifest_path}")
@@ -38,6 +38,9 @@ class Config:
 
     SHEET_NAME = os.getenv('SHEET_NAME', 'ReportData')
     GOOGLE_DRIVE_FOLDER_NAME = os.getenv('GOOGLE_DRIVE_FOLDER_NAME', 'AI_Reports')
+    # The sheet and Drive folder IDs are looked up on first use and remembered here
+    GOOGLE_ID_CACHE_PATH = os.getenv('GOOGLE_ID_CACHE_PATH', 'google_ids.json')
+    GOOGLE_HTTP_TIMEOUT = float(os.getenv('GOOGLE_HTTP_TIMEOUT', '30'))
 
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
@@ -46,11 +49,132 @@ class Config:
     # LLM Configuration
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     LLM_MODEL = os.getenv('LLM_MODEL')
+    # OpenAI-compatible API to use instead of OpenAI, such as `python llm_stub_server.py` for load tests
+    LLM_BASE_URL = os.getenv('LLM_BASE_URL') or None
     USE_OPENAI_API = strtobool(os.getenv('USE_OPENAI_API', 'True'))
 
+    # Async LLM backend: one pooled client per process with a concurrency limit and a tokens-per-minute bucket
+    ENABLE_ASYNC_LLM = strtobool(os.getenv('ENABLE_ASYNC_LLM', 'False'))
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv('LLM_TOKENS_PER_MINUTE', '90000'))
+    LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+
+    # LLM resilience: per-request timeout, retries with jittered backoff, hedging and circuit breaker
+    LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', '60'))
+    ENABLE_LLM_RESILIENCE = strtobool(os.getenv('ENABLE_LLM_RESILIENCE', 'True'))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    LLM_RETRY_BACKOFF_BASE = float(os.getenv('LLM_RETRY_BACKOFF_BASE', '1'))
+    LLM_RETRY_BACKOFF_MAX = float(os.getenv('LLM_RETRY_BACKOFF_MAX', '10'))
+    ENABLE_LLM_HEDGING = strtobool(os.getenv('ENABLE_LLM_HEDGING', 'False'))
+    LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+    # Threads for first requests, and as many again for hedges, when hedging; defaults to LLM_MAX_CONCURRENCY
+    LLM_HEDGE_WORKERS = int(os.getenv('LLM_HEDGE_WORKERS', '0')) or LLM_MAX_CONCURRENCY
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', '5'))
+    LLM_BREAKER_RESET_TIMEOUT = float(os.getenv('LLM_BREAKER_RESET_TIMEOUT', '30'))
+
+    # Ordered model endpoints for latency-aware routing, as a JSON list. Each entry has a "model"
+    # and optional "name", "base_url", "api_key_env", "timeout", "slow_after", "tiers" ("report",
+    # "section") and "prices"; when empty, LLM_MODEL is used on its own
+    LLM_MODELS = json.loads(os.getenv('LLM_MODELS', '[]'))
+    LLM_ROUTER_PROBE_INTERVAL = float(os.getenv('LLM_ROUTER_PROBE_INTERVAL', '30'))
+    LLM_ROUTER_ERROR_THRESHOLD = float(os.getenv('LLM_ROUTER_ERROR_THRESHOLD', '0.5'))
+
+    # Token usage and cost accounting; prices are USD per million tokens for each model
+    LLM_MODEL_PRICES = json.loads(os.getenv('LLM_MODEL_PRICES', json.dumps({
+        'gpt-4o': {'input': 2.50, 'cached_input': 1.25, 'output': 10.00},
+        'gpt-4o-mini': {'input': 0.15, 'cached_input': 0.075, 'output': 0.60},
+    })))
+    # Daily LLM spend after which reports use cached or mock content; 0 disables the guard
+    LLM_DAILY_BUDGET_USD = float(os.getenv('LLM_DAILY_BUDGET_USD', '0'))
+    LLM_BUDGET_DB_PATH = os.getenv('LLM_BUDGET_DB_PATH', 'llm_budget.sqlite3')
+
+    # LLM response cache (in-memory LRU in front of a size-bounded SQLite file)
+    ENABLE_LLM_CACHE = strtobool(os.getenv('ENABLE_LLM_CACHE', 'True'))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '86400'))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '100'))
+    LLM_CACHE_DB_PATH = os.getenv('LLM_CACHE_DB_PATH', 'llm_cache.sqlite3')
+    LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+    # Report generation: 'single' asks for the whole report in one completion,
+    # 'sections' generates each section with its own concurrent completion
+    REPORT_GENERATION_MODE = os.getenv('REPORT_GENERATION_MODE', 'single')
+    LLM_SECTION_CONCURRENCY = int(os.getenv('LLM_SECTION_CONCURRENCY', '8'))
+    LLM_SECTION_MAX_TOKENS = int(os.getenv('LLM_SECTION_MAX_TOKENS', '400'))
+    LLM_SECTION_RETRIES = int(os.getenv('LLM_SECTION_RETRIES', '2'))
+
+    # Output format for single-completion reports: 'html' has the model write the
+    # full report markup, 'json' has it return section text that is rendered locally
+    REPORT_OUTPUT_MODE = os.getenv('REPORT_OUTPUT_MODE', 'html')
+    LLM_JSON_MAX_TOKENS = int(os.getenv('LLM_JSON_MAX_TOKENS', '1200'))
+
+    # Precomputed industry-scoped sections, shared by all clients in an industry (sections mode only)
+    ENABLE_INDUSTRY_CONTENT = strtobool(os.getenv('ENABLE_INDUSTRY_CONTENT', 'False'))
+    INDUSTRY_CONTENT_PATH = os.getenv('INDUSTRY_CONTENT_PATH', 'industry_content.json')
+    INDUSTRY_CONTENT_REFRESH_INTERVAL = int(os.getenv('INDUSTRY_CONTENT_REFRESH_INTERVAL', str(7 * 24 * 3600)))
+    # Set to True to refresh from the web process instead of running `python warm_industry_content.py` on a schedule
+    INDUSTRY_CONTENT_REFRESH_IN_WEB = strtobool(os.getenv('INDUSTRY_CONTENT_REFRESH_IN_WEB', 'False'))
+
     # PDF.co Configuration
     PDFCO_API_KEY = os.getenv('PDFCO_API_KEY')
 
+    # PDF rendering: wkhtmltopdf processes run at once, renders allowed to wait for one,
+    # seconds before a hung render is killed and seconds a caller waits on a full queue
+    WKHTMLTOPDF_PATH = os.getenv('WKHTMLTOPDF_PATH', 'wkhtmltopdf')
+    PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', '2'))
+    PDF_RENDER_QUEUE_SIZE = int(os.getenv('PDF_RENDER_QUEUE_SIZE', '16'))
+    PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', '30'))
+    PDF_QUEUE_TIMEOUT = float(os.getenv('PDF_QUEUE_TIMEOUT', '10'))
+    # 'eager' renders the PDF before /generate_report responds; 'lazy' stores the HTML and renders on first download
+    # With ENABLE_DRIVE_UPLOADS, a lazy report is only uploaded to Drive after its first download renders it
+    PDF_RENDER_MODE = os.getenv('PDF_RENDER_MODE', 'eager')
+    # Report downloads: 'none' streams files from Python, 'x-accel' hands them to nginx via
+    # X-Accel-Redirect (under REPORT_ACCEL_PREFIX) and 'x-sendfile' sets X-Sendfile for Apache or lighttpd
+    REPORT_SENDFILE_MODE = os.getenv('REPORT_SENDFILE_MODE', 'none')
+    REPORT_ACCEL_PREFIX = os.getenv('REPORT_ACCEL_PREFIX', '/protected-reports')
+    REPORT_CACHE_MAX_AGE = int(os.getenv('REPORT_CACHE_MAX_AGE', '86400'))
+    # Content-addressed PDF store; unset keeps it in a 'blobs' directory next to the reports
+    PDF_STORE_DIR = os.getenv('PDF_STORE_DIR') or None
+
+    # Report retention: remove reports not downloaded for REPORT_MAX_AGE seconds, then the least
+    # recently downloaded ones while storage exceeds REPORT_MAX_BYTES (0 disables either policy)
+    REPORT_MAX_AGE = int(os.getenv('REPORT_MAX_AGE', '0'))
+    REPORT_MAX_BYTES = int(os.getenv('REPORT_MAX_BYTES', '0'))
+    REPORT_SWEEP_INTERVAL = int(os.getenv('REPORT_SWEEP_INTERVAL', '3600'))
+
+    # Where finished reports are kept: 'local' disk, or 's3' for any S3-compatible store (AWS, MinIO)
+    # so every instance can serve every report. Downloads from S3 redirect to presigned URLs.
+    REPORT_STORAGE_BACKEND = os.getenv('REPORT_STORAGE_BACKEND', 'local')
+    S3_BUCKET = os.getenv('S3_BUCKET')
+    S3_PREFIX = os.getenv('S3_PREFIX', 'reports/')
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None
+    S3_REGION = os.getenv('S3_REGION') or None
+    # Unset to use boto3's default credential chain (environment, instance profile...)
+    S3_ACCESS_KEY_ID = os.getenv('S3_ACCESS_KEY_ID') or None
+    S3_SECRET_ACCESS_KEY = os.getenv('S3_SECRET_ACCESS_KEY') or None
+    S3_URL_TTL = int(os.getenv('S3_URL_TTL', '900'))
+    S3_MULTIPART_CHUNK_SIZE = int(os.getenv('S3_MULTIPART_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
+    # Background Google Drive uploads of finished PDFs: chunked resumable sessions, retried from a
+    # SQLite queue with exponential backoff; public-read grants are sent in batches
+    ENABLE_DRIVE_UPLOADS = strtobool(os.getenv('ENABLE_DRIVE_UPLOADS', 'False'))
+    DRIVE_UPLOAD_DB_PATH = os.getenv('DRIVE_UPLOAD_DB_PATH', 'drive_uploads.sqlite3')
+    DRIVE_UPLOAD_WORKERS = int(os.getenv('DRIVE_UPLOAD_WORKERS', '2'))
+    # Drive requires chunk sizes in multiples of 256 KiB
+    DRIVE_UPLOAD_CHUNK_SIZE = int(os.getenv('DRIVE_UPLOAD_CHUNK_SIZE', str(5 * 1024 * 1024)))
+    DRIVE_UPLOAD_MAX_ATTEMPTS = int(os.getenv('DRIVE_UPLOAD_MAX_ATTEMPTS', '8'))
+    DRIVE_UPLOAD_RETRY_DELAY = float(os.getenv('DRIVE_UPLOAD_RETRY_DELAY', '30'))
+    DRIVE_PERMISSION_BATCH_SIZE = int(os.getenv('DRIVE_PERMISSION_BATCH_SIZE', '50'))
+    # Seconds a lazy report's upload waits for its first download before it is dropped;
+    # defaults to REPORT_MAX_AGE, or a week when retention by age is off
+    DRIVE_DEFERRED_UPLOAD_TTL = int(os.getenv('DRIVE_DEFERRED_UPLOAD_TTL', '0')) or REPORT_MAX_AGE or 7 * 86400
+
+    # Sheets rows are buffered and appended in one request once SHEETS_BUFFER_MAX_ROWS are waiting or the
+    # oldest is SHEETS_BUFFER_MAX_AGE seconds old; rows that cannot be written are kept in SHEETS_SPILL_PATH
+    ENABLE_SHEETS_BUFFER = strtobool(os.getenv('ENABLE_SHEETS_BUFFER', 'True'))
+    SHEETS_BUFFER_MAX_ROWS = int(os.getenv('SHEETS_BUFFER_MAX_ROWS', '50'))
+    SHEETS_BUFFER_MAX_AGE = float(os.getenv('SHEETS_BUFFER_MAX_AGE', '5'))
+    SHEETS_SPILL_PATH = os.getenv('SHEETS_SPILL_PATH', 'sheets_spill.jsonl')
+
     # ProtonMail Configuration
     PROTONMAIL_ADDRESS = os.getenv('PROTONMAIL_ADDRESS', '')
     PROTONMAIL_PASSWORD = os.getenv('PROTONMAIL_PASSWORD', '')
@@ -71,6 +195,27 @@ class Config:
     ENABLE_SHEETS_SERVICE = strtobool(os.getenv('ENABLE_SHEETS_SERVICE', 'True'))
     ENABLE_INTEGRATION_SERVICE = strtobool(os.getenv('ENABLE_INTEGRATION_SERVICE', 'True'))
     ENABLE_SUBSCRIPTION_SERVICE = strtobool(os.getenv('ENABLE_SUBSCRIPTION_SERVICE', 'True'))
+    ENABLE_JOB_QUEUE = strtobool(os.getenv('ENABLE_JOB_QUEUE', 'False'))
+
+    # Job Queue Configuration ('inprocess' or 'sqlite')
+    JOB_QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'inprocess')
+    JOB_QUEUE_DB_PATH = os.getenv('JOB_QUEUE_DB_PATH', 'jobs.sqlite3')
+    JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', '2'))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', '3600'))
+    # Seconds without a heartbeat before a running sqlite job is handed to another worker
+    JOB_LEASE_TIMEOUT = float(os.getenv('JOB_LEASE_TIMEOUT', '600'))
+    # Claims of one sqlite job, including reclaims after an expired lease, before it is marked failed
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    # Set to False when jobs are run by a separate `python worker.py` process
+    JOB_RUN_WORKERS_IN_WEB = strtobool(os.getenv('JOB_RUN_WORKERS_IN_WEB', 'True'))
+
+    # Side-effect fan-out: pool size and per-sink deadlines in seconds
+    FANOUT_MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', '8'))
+    SINK_TIMEOUT_MONGODB = float(os.getenv('SINK_TIMEOUT_MONGODB', '5'))
+    SINK_TIMEOUT_SHEETS = float(os.getenv('SINK_TIMEOUT_SHEETS', '10'))
+    SINK_TIMEOUT_EMAIL = float(os.getenv('SINK_TIMEOUT_EMAIL', '15'))
+    SINK_TIMEOUT_SUBSCRIPTION = float(os.getenv('SINK_TIMEOUT_SUBSCRIPTION', '2'))
 
     @classmethod
     def validate_config(cls):
@@ -83,6 +228,8 @@ class Config:
             raise ValueError("PROTONMAIL_ADDRESS and PROTONMAIL_PASSWORD must be set in the environment.")
         if cls.ENABLE_DATABASE and not cls.MONGODB_URI:
             raise ValueError("MONGODB_URI must be set in the environment.")
+        if cls.REPORT_STORAGE_BACKEND == 's3' and not cls.S3_BUCKET:
+            raise ValueError("S3_BUCKET must be set when REPORT_STORAGE_BACKEND is 's3'.")
 
         # Validate Google Sheets credentials
         if cls.ENABLE_SHEETS_SERVICE:
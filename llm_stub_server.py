@@ -0,0 +1,235 @@
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from flask import Flask, Response, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+# Local stand-in for the OpenAI chat completions API, for load tests and offline CI.
+# Point the app at it with LLM_BASE_URL=http://localhost:8001/v1 (any OPENAI_API_KEY works).
+
+CHARS_PER_TOKEN = 4
+JSON_KEY_PATTERN = re.compile(r'^- "(\w+)":', re.MULTILINE)
+SECTION_TITLE_PATTERN = re.compile(r'^### Section: (.+)$', re.MULTILINE)
+
+PARAGRAPH = (
+    "Adopting AI in stages lets the business prove value early while the team builds confidence. "
+    "Start with a narrow, measurable use case, integrate it with the systems already in place and "
+    "review the results every quarter before scaling to further processes."
+)
+
+REPORT_SECTION_TITLES = [
+    'Introduction', 'Industry Trends', 'Technology Integration', 'Workforce Training',
+    'Data Management', 'Risk &amp; Challenges', 'Additional Recommendations', 'Conclusion',
+]
+
+
+def parse_latency(spec: str):
+    """
+    Parses a latency distribution in seconds: 'fixed:S', 'uniform:LOW,HIGH',
+    'normal:MEAN,STDDEV' or 'lognormal:MEDIAN,SIGMA'. Returns a sampling function.
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(',')] if params else []
+    if kind == 'fixed':
+        return lambda: values[0]
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StubSettings:
+    """Behaviour of the stub server; `model_latency` overrides the latency for specific models."""
+
+    def __init__(self, latency: str = 'fixed:0.5', tokens_per_second: float = 50, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, model_latency: dict = None):
+        self.latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.model_latency = {model: parse_latency(spec) for model, spec in (model_latency or {}).items()}
+
+
+def canned_content(payload: dict) -> str:
+    """Returns report content in the shape the request asks for: JSON fields, one section or the full HTML report."""
+    prompt = '\n'.join(message.get('content') or '' for message in payload.get('messages', []))
+    if (payload.get('response_format') or {}).get('type') == 'json_object':
+        return json.dumps({key: [PARAGRAPH, PARAGRAPH] for key in JSON_KEY_PATTERN.findall(prompt)})
+    if SECTION_TITLE_PATTERN.search(prompt):
+        return f"<p>{PARAGRAPH}</p>\n<ul><li>Pilot one use case</li><li>Measure and iterate</li></ul>"
+
+    # Keep any %%PLACEHOLDER%% the prompt asks to be copied verbatim
+    user_name = '%%USER_NAME%%' if '%%USER_NAME%%' in prompt else 'Client'
+    year = '%%CURRENT_YEAR%%' if '%%CURRENT_YEAR%%' in prompt else '2024'
+    sections = ''.join(
+        f"\n        <section>\n            <h2>{title}</h2>\n            <p>{PARAGRAPH}</p>\n        </section>\n"
+        for title in REPORT_SECTION_TITLES
+    )
+    return (
+        "```html\n<body>\n    <header>\n        <div class=\"header-content\">\n"
+        "            <p><a href=\"https://dmotts.github.io/portfolio/\">Daley Mottley AI Consulting</a></p>\n"
+        "            <h1>AI Insights Report</h1>\n            <p class=\"sub-title\">Prepared for</p>\n"
+        f"            <h3>{user_name}</h3>\n        </div>\n    </header>\n\n    <div class=\"container\">{sections}"
+        "    </div>\n\n    <footer>\n        <p><a href=\"https://dmotts.github.io/portfolio/\">Daley Mottley AI Consulting</a>"
+        f" | All Rights Reserved &copy; {year}</p>\n    </footer>\n</body>\n```\n\nLet me know if you need any changes!"
+    )
+
+
+def apply_limits(content: str, payload: dict):
+    """Cuts the content at the first stop sequence or at max_tokens. Returns the content and finish reason."""
+    stops = payload.get('stop') or []
+    for stop in [stops] if isinstance(stops, str) else stops:
+        index = content.find(stop)
+        if index != -1:
+            content = content[:index]
+    max_tokens = payload.get('max_tokens')
+    if max_tokens and len(content) > max_tokens * CHARS_PER_TOKEN:
+        return content[:max_tokens * CHARS_PER_TOKEN], 'length'
+    return content, 'stop'
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def create_app(settings: StubSettings = None) -> Flask:
+    settings = settings or StubSettings()
+    stub = Flask(__name__)
+    stats = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'in_flight': 0, 'max_in_flight': 0}
+    stats_lock = threading.Lock()
+
+    def error_response(status: int, message: str, error_type: str, headers: dict = None):
+        return jsonify({'error': {'message': message, 'type': error_type, 'code': None}}), status, headers or {}
+
+    @stub.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        payload = request.get_json(force=True)
+        roll = random.random()
+        with stats_lock:
+            stats['requests'] += 1
+            if roll < settings.rate_limit_rate:
+                stats['rate_limited'] += 1
+            elif roll < settings.rate_limit_rate + settings.error_rate:
+                stats['errors'] += 1
+        if roll < settings.rate_limit_rate:
+            return error_response(429, 'Rate limit reached (injected by stub)', 'rate_limit_error', {'retry-after': '1'})
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            return error_response(500, 'Internal error (injected by stub)', 'server_error')
+
+        model = payload.get('model') or 'stub-model'
+        content, finish_reason = apply_limits(canned_content(payload), payload)
+        prompt_tokens = count_tokens(json.dumps(payload.get('messages', [])))
+        completion_tokens = count_tokens(content)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_tokens_details': {'cached_tokens': 0},
+        }
+        completion_id = f'chatcmpl-stub-{uuid.uuid4().hex[:12]}'
+        created = int(time.time())
+        first_token_delay = settings.model_latency.get(model, settings.latency)()
+        token_delay = 1 / settings.tokens_per_second if settings.tokens_per_second else 0
+
+        def track(delta: int):
+            with stats_lock:
+                stats['in_flight'] += delta
+                stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+
+        if not payload.get('stream'):
+            track(1)
+            try:
+                time.sleep(first_token_delay + completion_tokens * token_delay)
+            finally:
+                track(-1)
+            return jsonify({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': finish_reason,
+                }],
+                'usage': usage,
+            })
+
+        include_usage = (payload.get('stream_options') or {}).get('include_usage')
+
+        def chunk(delta: dict, finish=None, chunk_usage=None) -> str:
+            body = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [] if chunk_usage else [{'index': 0, 'delta': delta, 'finish_reason': finish}],
+            }
+            if chunk_usage:
+                body['usage'] = chunk_usage
+            return f"data: {json.dumps(body)}\n\n"
+
+        def events():
+            track(1)
+            try:
+                time.sleep(first_token_delay)
+                yield chunk({'role': 'assistant', 'content': ''})
+                for index in range(0, len(content), CHARS_PER_TOKEN):
+                    yield chunk({'content': content[index:index + CHARS_PER_TOKEN]})
+                    time.sleep(token_delay)
+                yield chunk({}, finish=finish_reason)
+                if include_usage:
+                    yield chunk({}, chunk_usage=usage)
+                yield "data: [DONE]\n\n"
+            finally:
+                # Also runs when the client disconnects mid-stream
+                track(-1)
+
+        return Response(events(), mimetype='text/event-stream')
+
+    @stub.route('/v1/models')
+    def models():
+        names = sorted({'stub-model', *settings.model_latency})
+        return jsonify({'object': 'list', 'data': [{'id': name, 'object': 'model', 'owned_by': 'stub'} for name in names]})
+
+    @stub.route('/stats')
+    def get_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    return stub
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local OpenAI-compatible chat completions stub.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', default='fixed:0.5',
+                        help="Time to first token: fixed:S, uniform:LOW,HIGH, normal:MEAN,STDDEV or lognormal:MEDIAN,SIGMA.")
+    parser.add_argument('--model-latency', action='append', default=[], metavar='MODEL=SPEC',
+                        help='Latency distribution for one model, to emulate several endpoints. Repeatable.')
+    parser.add_argument('--tokens-per-second', type=float, default=50, help='Completion token rate; 0 for no delay.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500.')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with a 429.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stub_settings = StubSettings(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        model_latency=dict(entry.split('=', 1) for entry in args.model_latency)
+    )
+    logger.info(f"LLM stub listening on http://{args.host}:{args.port}/v1")
+    create_app(stub_settings).run(host=args.host, port=args.port, threaded=True)
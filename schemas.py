@@ -0,0 +1,20 @@
+from marshmallow import Schema, fields
+
+
+class ReportRequestSchema(Schema):
+    client_name = fields.Str(required=True)
+    client_email = fields.Email(required=True)
+    industry = fields.Str(required=True)
+    question1 = fields.Str(required=True)
+    question2 = fields.Str(required=True)
+    question3 = fields.Str(required=True)
+
+
+def get_report_inputs(validated_data: dict):
+    """Returns the client name, industry and answers from validated request data."""
+    answers = [
+        validated_data.get('question1'),
+        validated_data.get('question2'),
+        validated_data.get('question3'),
+    ]
+    return validated_data.get('client_name'), validated_data.get('industry'), answers
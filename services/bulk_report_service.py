@@ -0,0 +1,213 @@
+import contextvars
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Iterator, Tuple
+from marshmallow import EXCLUDE, ValidationError
+from config import Config
+from schemas import ReportRequestSchema, get_report_inputs
+from services.pdf_engine import PDFRenderEngine
+from services.pdf_service import PDFService
+from services.usage_service import usage_tracking
+
+ROW_OK = 'ok'
+ROW_INVALID = 'invalid'
+ROW_FAILED = 'failed'
+
+UNSAFE_FILENAME_PATTERN = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def read_rows(input_path: str) -> Iterator[Tuple[int, dict]]:
+    """Yields (line number, row) pairs from a CSV file with a header row or a JSONL file, one row at a time."""
+    with open(input_path, 'r', newline='', encoding='utf-8') as f:
+        if input_path.endswith('.jsonl'):
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+        else:
+            # Line 1 is the header
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+
+
+def row_key(line_number: int, row: dict) -> str:
+    """Identifies a row by its position and content, so an edited row is regenerated on resume."""
+    digest = hashlib.sha256(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{line_number}-{digest[:12]}"
+
+
+class BulkReportService:
+    """
+    Generates reports for every row of a CSV or JSONL export. Rows are validated
+    with ReportRequestSchema, generated on a bounded thread pool (LLM calls) and
+    rendered by a separate pool of wkhtmltopdf workers (PDFs). Each finished row is appended to
+    a checkpoint file so that a crashed run resumes where it stopped, and a
+    manifest of all results is written at the end.
+    """
+
+    def __init__(self, report_generator, output_dir: str, llm_concurrency: int, pdf_workers: int,
+                 render_pdfs: bool = True, pdf_renderer=None):
+        self.logger = logging.getLogger(__name__)
+        self.report_generator = report_generator
+        self.output_dir = output_dir
+        self.llm_concurrency = llm_concurrency
+        self.pdf_workers = pdf_workers
+        self.render_pdfs = render_pdfs
+        self.pdf_renderer = pdf_renderer
+        if render_pdfs and not pdf_renderer:
+            engine = PDFRenderEngine(
+                workers=pdf_workers,
+                queue_size=pdf_workers,
+                render_timeout=Config.PDF_RENDER_TIMEOUT,
+                queue_timeout=None,
+                binary=Config.WKHTMLTOPDF_PATH
+            )
+            self.pdf_renderer = PDFService(engine).generate_pdf
+        self.checkpoint_path = os.path.join(output_dir, 'checkpoint.jsonl')
+        self.manifest_path = os.path.join(output_dir, 'manifest.json')
+        os.makedirs(output_dir, exist_ok=True)
+
+    def load_checkpoint(self) -> dict:
+        """Returns the results already recorded, by row key. Later entries win over earlier ones."""
+        results = {}
+        if not os.path.exists(self.checkpoint_path):
+            return results
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partially written last line
+                    continue
+                results[entry['key']] = entry
+        return results
+
+    def run(self, input_path: str) -> dict:
+        """Processes every row not already completed and returns the manifest."""
+        started_at = datetime.now(timezone.utc).isoformat()
+        results = self.load_checkpoint()
+        done = {key for key, entry in results.items() if entry['status'] in (ROW_OK, ROW_INVALID)}
+        if done:
+            self.logger.info(f"Resuming: {len(done)} rows are already complete")
+
+        # Bound the rows in flight so that large inputs are streamed rather than loaded at once
+        max_in_flight = self.llm_concurrency + 2 * max(self.pdf_workers, 1)
+        llm_pool = ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix='bulk-llm')
+        # wkhtmltopdf runs in its own processes, so threads are enough to keep the PDF workers busy
+        pdf_pool = ThreadPoolExecutor(max_workers=self.pdf_workers, thread_name_prefix='bulk-pdf') if self.render_pdfs else None
+        pending = {}
+
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+            def record(entry: dict):
+                results[entry['key']] = entry
+                checkpoint.write(json.dumps(entry) + '\n')
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+                self.logger.info(f"Row {entry['line']} {entry['status']} ({len(results)} recorded)")
+
+            def drain(block_until: int):
+                while len(pending) > block_until:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self._handle(future, pending.pop(future), pending, pdf_pool, record)
+
+            try:
+                for line_number, row in read_rows(input_path):
+                    key = row_key(line_number, row)
+                    if key in done:
+                        continue
+                    try:
+                        # Lead exports usually carry extra columns (owner, source...) that are not report inputs
+                        validated_data = ReportRequestSchema().load(row, unknown=EXCLUDE)
+                    except ValidationError as err:
+                        record({'key': key, 'line': line_number, 'status': ROW_INVALID, 'errors': err.messages})
+                        continue
+
+                    drain(max_in_flight - 1)
+                    context = contextvars.copy_context()
+                    future = llm_pool.submit(context.run, self._generate, validated_data)
+                    pending[future] = ('content', key, line_number, validated_data, None)
+                drain(0)
+            finally:
+                llm_pool.shutdown(wait=True)
+                if pdf_pool:
+                    pdf_pool.shutdown(wait=True)
+
+        return self.write_manifest(input_path, started_at, results)
+
+    def _generate(self, validated_data: dict):
+        user_name, industry, answers = get_report_inputs(validated_data)
+        started_at = time.monotonic()
+        with usage_tracking(industry) as usage:
+            html_content = self.report_generator.generate_report_content(industry, answers, user_name)
+        return html_content, usage.as_dict(), time.monotonic() - started_at
+
+    def _handle(self, future, task: tuple, pending: dict, pdf_pool, record):
+        stage, key, line_number, validated_data, generated = task
+        entry = {'key': key, 'line': line_number, 'client_email': validated_data['client_email']}
+        try:
+            result = future.result()
+        except Exception as e:
+            self.logger.error(f"Row {line_number} failed during {stage}: {e}", exc_info=True)
+            record({**entry, 'status': ROW_FAILED, 'stage': stage, 'error': str(e)})
+            return
+
+        if stage == 'content':
+            html_content, llm_usage, llm_seconds = result
+            generated = {'llm_usage': llm_usage, 'llm_seconds': round(llm_seconds, 2)}
+            if llm_usage['fallback']:
+                # Mock content is not a usable report; leave the row to be retried on resume
+                error = f"LLM unavailable ({llm_usage['fallback']}), fallback content was returned"
+                record({**entry, 'status': ROW_FAILED, 'stage': stage, 'error': error, **generated})
+                return
+            if not html_content:
+                record({**entry, 'status': ROW_FAILED, 'stage': stage, 'error': 'No report content was generated',
+                        **generated})
+                return
+            if not self.render_pdfs:
+                html_path = os.path.join(self.output_dir, self._file_name(validated_data, key, 'html'))
+                with open(html_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                record({**entry, 'status': ROW_OK, 'path': html_path, **generated})
+                return
+            pdf_path = os.path.join(self.output_dir, self._file_name(validated_data, key, 'pdf'))
+            pdf_future = pdf_pool.submit(self.pdf_renderer, html_content, pdf_path)
+            pending[pdf_future] = ('pdf', key, line_number, validated_data, generated)
+            return
+
+        if not result:
+            record({**entry, 'status': ROW_FAILED, 'stage': stage, 'error': 'PDF generation failed', **generated})
+            return
+        record({**entry, 'status': ROW_OK, 'path': result, **generated})
+
+    @staticmethod
+    def _file_name(validated_data: dict, key: str, extension: str) -> str:
+        client = UNSAFE_FILENAME_PATTERN.sub('_', validated_data['client_name']).strip('_') or 'client'
+        return f"report-{client}-{key}.{extension}"
+
+    def write_manifest(self, input_path: str, started_at: str, results: dict) -> dict:
+        """Writes the manifest of every recorded row, including rows from earlier runs, and returns it."""
+        rows = sorted(results.values(), key=lambda entry: entry['line'])
+        counts = {status: 0 for status in (ROW_OK, ROW_INVALID, ROW_FAILED)}
+        for entry in rows:
+            counts[entry['status']] += 1
+        manifest = {
+            'input': os.path.abspath(input_path),
+            'started_at': started_at,
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'counts': counts,
+            'cost_usd': round(sum(entry.get('llm_usage', {}).get('cost_usd', 0) for entry in rows), 6),
+            'rows': rows,
+        }
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+        self.logger.info(f"Bulk run finished: {counts}. Manifest written to {self.manifest_path}")
+        return manifest
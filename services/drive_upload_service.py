@@ -0,0 +1,273 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from googleapiclient.errors import HttpError
+from prometheus_client import Counter, Gauge
+
+DRIVE_UPLOADS = Counter('drive_uploads_total', 'Background Google Drive uploads by outcome', ['outcome'])
+DRIVE_UPLOAD_BYTES = Counter('drive_upload_bytes_total', 'Bytes sent to Google Drive in upload chunks')
+DRIVE_UPLOAD_BACKLOG = Gauge(
+    'drive_upload_backlog', 'Drive uploads waiting to be released, uploaded or shared', multiprocess_mode='livemax'
+)
+
+# Waiting for a lazily rendered PDF to be downloaded, and so rendered, for the first time
+UPLOAD_DEFERRED = 'deferred'
+UPLOAD_PENDING = 'pending'
+UPLOAD_RUNNING = 'uploading'
+UPLOAD_UPLOADED = 'uploaded'
+UPLOAD_DONE = 'done'
+UPLOAD_FAILED = 'failed'
+
+
+class DriveUploadService:
+    """
+    Uploads report PDFs to Google Drive in the background. Uploads are kept in a
+    SQLite queue shared by every process on the host, so they survive restarts and
+    are retried with exponential backoff. Each upload runs as a chunked, resumable
+    Drive session whose URI is saved after every chunk, so a retry continues where
+    the last attempt stopped. Public-read grants for finished uploads are sent
+    together through the Drive batch endpoint, after which `on_uploaded(report_id,
+    drive_url)` is called. Deferred uploads that are not released within
+    `deferred_ttl` seconds are dropped.
+    """
+
+    def __init__(self, sheets_service, db_path: str, workers: int = 2, max_attempts: int = 8,
+                 retry_delay: float = 30, batch_size: int = 50, poll_interval: float = 1.0,
+                 lease_timeout: float = 600, deferred_ttl: float = 7 * 86400, on_uploaded=None):
+        self.logger = logging.getLogger(__name__)
+        self.sheets_service = sheets_service
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        # An upload still marked running after this long belongs to a process that died
+        self.lease_timeout = lease_timeout
+        # A lazy PDF that is never downloaded, or whose HTML the retention sweeper removed, is never released
+        self.deferred_ttl = deferred_ttl
+        self.on_uploaded = on_uploaded
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS drive_uploads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    report_id TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    resumable_uri TEXT,
+                    bytes_sent INTEGER NOT NULL DEFAULT 0,
+                    file_id TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS drive_uploads_status ON drive_uploads (status, next_attempt_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, report_id: str, file_path: str, file_name: str, deferred: bool = False) -> int:
+        """
+        Queues a PDF for upload and returns its upload ID. A deferred upload waits
+        until release() is called for its file, e.g. once a lazy PDF is rendered.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO drive_uploads (report_id, file_path, file_name, status, next_attempt_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (report_id, file_path, file_name, UPLOAD_DEFERRED if deferred else UPLOAD_PENDING, now, now, now)
+            )
+        if not deferred:
+            self._wake.set()
+        self.logger.info(f"Queued {'deferred ' if deferred else ''}Drive upload of {file_name} for report {report_id}")
+        return cursor.lastrowid
+
+    def release(self, file_name: str) -> bool:
+        """Makes a deferred upload of file_name due now. Returns whether one was waiting."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE drive_uploads SET status = ?, next_attempt_at = ?, updated_at = ? WHERE file_name = ? AND status = ?",
+                (UPLOAD_PENDING, now, now, file_name, UPLOAD_DEFERRED)
+            )
+        if cursor.rowcount:
+            self._wake.set()
+        return bool(cursor.rowcount)
+
+    def get(self, upload_id: int):
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM drive_uploads WHERE id = ?", (upload_id,)).fetchone()
+        return dict(row) if row else None
+
+    def start(self):
+        """Starts the upload workers and the permission granter if they are not already running."""
+        if self._threads:
+            return
+        self._stop_event.clear()
+        for index in range(self.workers):
+            self._threads.append(threading.Thread(target=self._upload_loop, name=f'drive-upload-{index}', daemon=True))
+        self._threads.append(threading.Thread(target=self._grant_loop, name='drive-grant', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        self.logger.info(f"Started {self.workers} Drive upload workers")
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def claim(self):
+        """Marks the next due upload as running and returns it, or None when nothing is due."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            # BEGIN IMMEDIATE takes the write lock up front so two workers never claim the same upload
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM drive_uploads WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND updated_at < ?)"
+                " ORDER BY next_attempt_at LIMIT 1",
+                (UPLOAD_PENDING, now, UPLOAD_RUNNING, now - self.lease_timeout)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE drive_uploads SET status = ?, updated_at = ? WHERE id = ?",
+                    (UPLOAD_RUNNING, now, row['id'])
+                )
+            expired = conn.execute(
+                "DELETE FROM drive_uploads WHERE status = ? AND created_at < ?", (UPLOAD_DEFERRED, now - self.deferred_ttl)
+            ).rowcount
+            backlog = conn.execute(
+                "SELECT COUNT(*) FROM drive_uploads WHERE status IN (?, ?, ?, ?)",
+                (UPLOAD_DEFERRED, UPLOAD_PENDING, UPLOAD_RUNNING, UPLOAD_UPLOADED)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if expired:
+            DRIVE_UPLOADS.labels('expired').inc(expired)
+            self.logger.info(f"Dropped {expired} deferred Drive uploads that were never released")
+        DRIVE_UPLOAD_BACKLOG.set(backlog)
+        return dict(row) if row else None
+
+    def upload(self, upload: dict):
+        """Runs one upload attempt and records its outcome."""
+        file_path = upload['file_path']
+        bytes_sent = {'total': upload['bytes_sent']}
+
+        def save_progress(resumable_uri, progress):
+            DRIVE_UPLOAD_BYTES.inc(max(0, progress - bytes_sent['total']))
+            bytes_sent['total'] = progress
+            # Saved after every chunk so that a retry, even from another process, resumes here
+            self._update(upload['id'], resumable_uri=resumable_uri, bytes_sent=progress)
+
+        try:
+            file_id = self.sheets_service.upload_pdf_resumable(
+                file_path, upload['file_name'], resumable_uri=upload['resumable_uri'], on_chunk=save_progress
+            )
+        except Exception as e:
+            fields = {}
+            if isinstance(e, HttpError) and e.resp.status in (404, 410):
+                # The upload session expired; the next attempt starts a new one
+                fields = {'resumable_uri': None, 'bytes_sent': 0}
+            self._retry_later(upload, str(e), **fields)
+            return
+
+        self._update(upload['id'], status=UPLOAD_UPLOADED, file_id=file_id, error=None)
+        DRIVE_UPLOADS.labels('uploaded').inc()
+        self._wake.set()
+        self.logger.info(f"Uploaded {upload['file_name']} to Drive as {file_id}")
+
+    def grant_pending(self) -> int:
+        """Shares a batch of finished uploads. Returns how many were completed."""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute(
+                "SELECT * FROM drive_uploads WHERE status = ? AND next_attempt_at <= ? ORDER BY updated_at LIMIT ?",
+                (UPLOAD_UPLOADED, time.time(), self.batch_size)
+            )]
+        if not rows:
+            return 0
+
+        try:
+            failed = set(self.sheets_service.grant_public_read([row['file_id'] for row in rows]))
+        except Exception as e:
+            self.logger.error(f"Drive permission batch failed: {e}", exc_info=True)
+            failed = {row['file_id'] for row in rows}
+
+        completed = 0
+        for row in rows:
+            if row['file_id'] in failed:
+                self._retry_later(row, 'Permission grant failed', status=UPLOAD_UPLOADED)
+                continue
+            drive_url = self.sheets_service.drive_file_url(row['file_id'])
+            self._update(row['id'], status=UPLOAD_DONE, error=None)
+            DRIVE_UPLOADS.labels('done').inc()
+            completed += 1
+            self.logger.info(f"Report {row['report_id']} is available on Drive: {drive_url}")
+            if self.on_uploaded:
+                try:
+                    self.on_uploaded(row['report_id'], drive_url)
+                except Exception as e:
+                    self.logger.error(f"Error recording Drive URL for report {row['report_id']}: {e}", exc_info=True)
+        return completed
+
+    def _retry_later(self, row: dict, error: str, status: str = UPLOAD_PENDING, **fields):
+        attempts = row['attempts'] + 1
+        if attempts >= self.max_attempts:
+            self._update(row['id'], status=UPLOAD_FAILED, attempts=attempts, error=error, **fields)
+            DRIVE_UPLOADS.labels('failed').inc()
+            self.logger.error(f"Drive upload {row['id']} for report {row['report_id']} failed for good: {error}")
+            return
+        delay = self.retry_delay * 2 ** (attempts - 1)
+        self._update(row['id'], status=status, attempts=attempts, error=error,
+                     next_attempt_at=time.time() + delay, **fields)
+        DRIVE_UPLOADS.labels('retried').inc()
+        self.logger.warning(f"Drive upload {row['id']} attempt {attempts} failed, retrying in {delay:.0f}s: {error}")
+
+    def _update(self, upload_id: int, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{column} = ?' for column in fields)
+        with closing(self._connect()) as conn:
+            conn.execute(f"UPDATE drive_uploads SET {assignments} WHERE id = ?", (*fields.values(), upload_id))
+
+    def _upload_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                upload = self.claim()
+            except Exception as e:
+                self.logger.error(f"Error claiming Drive upload: {e}", exc_info=True)
+                upload = None
+            if upload:
+                self.upload(upload)
+            else:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _grant_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                completed = self.grant_pending()
+            except Exception as e:
+                self.logger.error(f"Error sharing Drive uploads: {e}", exc_info=True)
+                completed = 0
+            if not completed:
+                self._stop_event.wait(self.poll_interval)
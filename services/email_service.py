@@ -1,6 +1,7 @@
 from protonmail import ProtonMail
 import logging
 from config import Config
+from services.metrics_service import track_stage
 import re
 from datetime import datetime
 
@@ -80,18 +81,19 @@ class EmailService:
     def send_email(self, recipient: str, subject: str, body: str, html_body: str = None, attachments=None):
         """
         Sends an email to the specified recipient with both plain text and HTML options.
+        Returns whether the email was sent.
         """
         if not Config.ENABLE_EMAIL_SERVICE:
             self.logger.info('Email service is disabled. Skipping email sending.')
-            return
+            return False
 
         if not self.proton:
             self.logger.warning('ProtonMail client is not initialized. Email cannot be sent.')
-            return
+            return False
 
         if not self.is_valid_email(recipient):
             self.logger.warning(f'Invalid email address provided: {recipient}')
-            return
+            return False
 
         try:
             # Create attachments if any
@@ -104,16 +106,19 @@ class EmailService:
                     attachment_objects.append(attachment_obj)
 
             # Send message
-            message = self.proton.create_message(
-                recipients=[recipient],
-                subject=subject,
-                body=html_body if html_body else body,
-                attachments=attachment_objects
-            )
-            sent_message = self.proton.send_message(message)
+            with track_stage('email.send'):
+                message = self.proton.create_message(
+                    recipients=[recipient],
+                    subject=subject,
+                    body=html_body if html_body else body,
+                    attachments=attachment_objects
+                )
+                sent_message = self.proton.send_message(message)
             self.logger.info(f'Email sent successfully to {recipient}')
+            return True
         except Exception as e:
             self.logger.error(f'Error sending email: {e}')
+            return False
 
     def get_signature(self) -> str:
         """
@@ -211,11 +216,11 @@ class EmailService:
 
     def send_report_email_to_user(self, report_data: dict):
         """
-        Sends a report email to the user with a link to the PDF report.
+        Sends a report email to the user with a link to the PDF report. Returns whether it was sent.
         """
         if not Config.ENABLE_EMAIL_SERVICE:
             self.logger.info('Email service is disabled. Skipping user report email sending.')
-            return
+            return False
 
         recipient = report_data['client_email']
         subject = f"Your AI Insights Report is Ready, {report_data['client_name']}"
@@ -265,15 +270,16 @@ class EmailService:
         html_body = self.inject_styles(html_body_content)
 
         # Send the email
-        self.send_email(recipient, subject, body, html_body)
+        return self.send_email(recipient, subject, body, html_body)
 
     def send_notification_email_to_admin(self, report_data: dict):
         """
         Sends a notification email to the admin with links to the PDF report, database record, and Google Sheets entry.
+        Returns whether it was sent.
         """
         if not Config.ENABLE_EMAIL_SERVICE:
             self.logger.info('Email service is disabled. Skipping admin notification email sending.')
-            return
+            return False
 
         recipient = Config.NOTIFICATION_EMAIL
         subject = f"New AI Insights Report Generated for {report_data['client_name']}"
@@ -329,4 +335,4 @@ class EmailService:
         html_body = self.inject_styles(html_body_content)
 
         # Send the email
-        self.send_email(recipient, subject, body, html_body)
+        return self.send_email(recipient, subject, body, html_body)
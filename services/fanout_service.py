@@ -0,0 +1,77 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import Config
+from services.metrics_service import track_stage
+
+SINK_OK = 'ok'
+SINK_ERROR = 'error'
+SINK_TIMEOUT = 'timeout'
+
+
+class SinkFailedError(Exception):
+    """Raised for a sink that logged its own failure and returned False instead of raising."""
+
+
+class FanoutService:
+    """
+    Runs independent post-generation side effects (database, sheets, emails,
+    subscriptions) concurrently on a bounded thread pool, each with its own deadline.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.logger = logging.getLogger(__name__)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.FANOUT_MAX_WORKERS,
+            thread_name_prefix='report-sink'
+        )
+
+    def run(self, sinks: list) -> dict:
+        """
+        Runs every sink and waits for each one up to its own timeout.
+
+        `sinks` is a list of (name, callable, timeout_seconds) tuples. Returns a dict
+        mapping each sink name to its status, latency in milliseconds and error, if any.
+        A sink that raises or returns False is recorded as an error. A sink that times out keeps running in the background; only the wait is abandoned.
+        """
+        started_at = time.monotonic()
+        futures = []
+        for name, func, timeout in sinks:
+            # Run each sink in a copy of the caller's context so its stage lands in the request breakdown
+            context = contextvars.copy_context()
+            futures.append((name, timeout, self.executor.submit(context.run, self._timed_call, name, func)))
+
+        outcomes = {}
+        for name, timeout, future in futures:
+            remaining = max(0.0, started_at + timeout - time.monotonic())
+            try:
+                latency = future.result(timeout=remaining)
+                outcomes[name] = {'status': SINK_OK, 'latency_ms': round(latency * 1000, 1)}
+            except FutureTimeoutError:
+                outcomes[name] = {
+                    'status': SINK_TIMEOUT,
+                    'latency_ms': round(timeout * 1000, 1),
+                    'error': f'Timed out after {timeout}s'
+                }
+                self.logger.error(f"Sink '{name}' timed out after {timeout}s")
+            except Exception as e:
+                outcomes[name] = {
+                    'status': SINK_ERROR,
+                    'latency_ms': round((time.monotonic() - started_at) * 1000, 1),
+                    'error': str(e)
+                }
+                self.logger.error(f"Sink '{name}' failed: {e}", exc_info=True)
+        return outcomes
+
+    @staticmethod
+    def _timed_call(name: str, func) -> float:
+        started_at = time.monotonic()
+        with track_stage(f'sink.{name}'):
+            # Services that log and swallow their own errors report them by returning False
+            if func() is False:
+                raise SinkFailedError(f"Sink '{name}' reported a failure")
+        return time.monotonic() - started_at
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,71 @@
+import re
+from typing import List, Optional
+
+# Matches a complete top-level block of the report layout (the header or one section)
+REPORT_BLOCK_PATTERN = re.compile(r'<(header|section)\b.*?</\1>', re.DOTALL)
+BODY_OPEN = '<body>'
+BODY_CLOSE = '</body>'
+
+
+class StreamingHTMLExtractor:
+    """
+    Extracts the report <body> from completion text as it streams in. Text before
+    <body> and after </body> is discarded, and each header or section block is
+    returned by feed() as soon as its closing tag arrives.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.body_start = None
+        self.body_end = None
+        self.discarded_after = 0
+        # End of the last block returned by feed()
+        self.position = 0
+
+    @property
+    def done(self) -> bool:
+        """True once </body> has been seen; any further text is discarded."""
+        return self.body_end is not None
+
+    @property
+    def discarded_chars(self) -> int:
+        """Characters received outside the body."""
+        before = self.body_start if self.body_start is not None else len(self.text)
+        return before + self.discarded_after
+
+    def feed(self, delta: str) -> List[str]:
+        """Adds a chunk of completion text and returns the blocks it completed."""
+        if self.done:
+            self.discarded_after += len(delta)
+            return []
+
+        # Tags can be split across chunks, so each search re-checks the tail of the previous text
+        previous_length = len(self.text)
+        self.text += delta
+        if self.body_start is None:
+            start = self.text.find(BODY_OPEN, max(0, previous_length - len(BODY_OPEN)))
+            if start == -1:
+                return []
+            self.body_start = self.position = start
+
+        end = self.text.find(BODY_CLOSE, max(self.body_start, previous_length - len(BODY_CLOSE)))
+        if end != -1:
+            self.body_end = end + len(BODY_CLOSE)
+            self.discarded_after = len(self.text) - self.body_end
+
+        blocks = []
+        for match in REPORT_BLOCK_PATTERN.finditer(self.text, self.position, self.body_end or len(self.text)):
+            self.position = match.end()
+            blocks.append(match.group(0))
+        return blocks
+
+    def finish(self) -> Optional[str]:
+        """
+        Returns the extracted body, adding the closing tag when generation stopped
+        at the </body> stop sequence, or None if no <body> was received.
+        """
+        if self.body_start is None:
+            return None
+        if self.done:
+            return self.text[self.body_start:self.body_end]
+        return self.text[self.body_start:].rstrip() + BODY_CLOSE
@@ -0,0 +1,16 @@
+import os
+import re
+from typing import List
+
+INDUSTRY_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'generate_report.html')
+INDUSTRY_SELECT_PATTERN = re.compile(r'<select[^>]*\bid="industry"[^>]*>(.*?)</select>', re.DOTALL)
+INDUSTRY_OPTION_PATTERN = re.compile(r'<option value="([^"]+)"')
+
+
+def load_industries(template_path: str = INDUSTRY_TEMPLATE_PATH) -> List[str]:
+    """Returns the industries offered in the report form's industry dropdown."""
+    with open(template_path, 'r') as f:
+        match = INDUSTRY_SELECT_PATTERN.search(f.read())
+    if not match:
+        return []
+    return INDUSTRY_OPTION_PATTERN.findall(match.group(1))
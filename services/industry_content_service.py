@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+from services.industries import load_industries
+from services.report_generator import REPORT_SECTIONS
+
+
+class IndustryContentService:
+    """
+    Precomputes the report sections that depend only on the industry (such as
+    Industry Trends) so they can be shared by every client in that industry.
+    Content is stored in a JSON file and regenerated once it is older than the
+    refresh interval. Each section is generated by one caller at a time, so
+    concurrent requests for missing content share a single LLM call.
+    """
+
+    def __init__(self, report_generator, store_path: str, refresh_interval: int, industries: List[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.report_generator = report_generator
+        self.store_path = store_path
+        self.refresh_interval = refresh_interval
+        self.industries = industries if industries is not None else load_industries()
+        self._store = {}
+        self._store_mtime = None
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+        self._refresher = None
+
+    def get_section(self, industry: str, section: dict) -> Optional[str]:
+        """
+        Returns the shared content for an industry-scoped section. Industries from
+        the dropdown that have not been warmed up yet are generated on demand, and
+        stale content is served while it is regenerated in the background; any
+        other industry returns None so the section is generated per request.
+        """
+        if industry not in self.industries:
+            return None
+
+        self._reload()
+        entry = self._entry(industry, section)
+        if not entry:
+            return self._generate_once(industry, section)
+        if not self._is_fresh(entry):
+            self._refresh_in_background(industry, section)
+        return entry['content']
+
+    def warm_up(self, force: bool = False):
+        """Generates every industry-scoped section for every industry whose content is missing or stale."""
+        self._reload()
+        now = time.time()
+        for industry in self.industries:
+            for section in REPORT_SECTIONS:
+                if section.get('scope') != 'industry':
+                    continue
+                if not force and self._is_fresh(self._entry(industry, section), now):
+                    continue
+                try:
+                    self._generate_once(industry, section, force)
+                except Exception as e:
+                    self.logger.error(f"Failed to precompute '{section['key']}' for {industry}: {e}", exc_info=True)
+        self.logger.info(f"Industry content is up to date for {len(self.industries)} industries")
+
+    def start_refresher(self):
+        """Runs warm_up in a background thread now and then once per refresh interval."""
+        if self._refresher:
+            return
+
+        def refresh_loop():
+            while True:
+                self.warm_up()
+                time.sleep(self.refresh_interval)
+
+        self._refresher = threading.Thread(target=refresh_loop, name='industry-content-refresher', daemon=True)
+        self._refresher.start()
+
+    def _entry(self, industry: str, section: dict) -> Optional[dict]:
+        with self._lock:
+            return self._store.get(industry, {}).get(section['key'])
+
+    def _is_fresh(self, entry: Optional[dict], now: float = None) -> bool:
+        return bool(entry) and (now or time.time()) - entry['generated_at'] < self.refresh_interval
+
+    def _generate_once(self, industry: str, section: dict, force: bool = False) -> str:
+        """Generates a section unless another caller has just done so while this one waited for its lock."""
+        with self._lock:
+            key_lock = self._key_locks.setdefault((industry, section['key']), threading.Lock())
+        with key_lock:
+            self._reload()
+            entry = self._entry(industry, section)
+            if not force and self._is_fresh(entry):
+                return entry['content']
+            return self._generate(industry, section)
+
+    def _refresh_in_background(self, industry: str, section: dict):
+        key = (industry, section['key'])
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._generate_once(industry, section)
+            except Exception as e:
+                self.logger.error(f"Failed to refresh '{section['key']}' for {industry}: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"industry-content-refresh-{section['key']}", daemon=True).start()
+
+    def _generate(self, industry: str, section: dict) -> str:
+        content = self.report_generator.generate_industry_section(section, industry)
+        with self._lock:
+            self._store.setdefault(industry, {})[section['key']] = {
+                'content': content,
+                'generated_at': time.time(),
+            }
+            self._save()
+        self.logger.info(f"Precomputed '{section['key']}' for {industry}")
+        return content
+
+    def _reload(self):
+        """Picks up content written by other processes, such as the warm-up job."""
+        try:
+            mtime = os.path.getmtime(self.store_path)
+        except OSError:
+            return
+        with self._lock:
+            if mtime == self._store_mtime:
+                return
+            try:
+                with open(self.store_path, 'r') as f:
+                    self._store = json.load(f)
+                self._store_mtime = mtime
+            except (OSError, json.JSONDecodeError) as e:
+                self.logger.error(f"Failed to load industry content from {self.store_path}: {e}")
+
+    def _save(self):
+        # Write then rename so readers in other processes never see a partial file
+        temp_path = f"{self.store_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._store, f)
+        os.replace(temp_path, self.store_path)
+        self._store_mtime = os.path.getmtime(self.store_path)
@@ -0,0 +1,322 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from config import Config
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+
+class InProcessJobBackend:
+    """
+    Keeps jobs in memory. Jobs are only visible to the process that queued them,
+    so this backend is meant for single-process deployments and local development.
+    """
+
+    def __init__(self, result_ttl: int = 3600):
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_id: str, payload: dict):
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': JOB_QUEUED,
+                'payload': payload,
+                'result': None,
+                'error': None,
+                'created_at': now,
+                'updated_at': now,
+            }
+        self._pending.put(job_id)
+
+    def claim(self, timeout: float):
+        try:
+            job_id = self._pending.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            job['status'] = JOB_RUNNING
+            job['updated_at'] = time.time()
+            return job_id, job['payload']
+
+    def touch(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job['updated_at'] = time.time()
+
+    def update(self, job_id: str, status: str, result: dict = None, error: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(status=status, result=result, error=error, updated_at=time.time())
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def depth(self) -> int:
+        return self._pending.qsize()
+
+    def _prune(self, now: float):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in (JOB_SUCCEEDED, JOB_FAILED) and now - job['updated_at'] > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class SQLiteJobBackend:
+    """
+    Local stand-in broker backed by a SQLite file. Every web and worker process on
+    the host shares the same queue, so a job can be queued by one gunicorn worker,
+    run by another (or by worker.py) and polled from any of them. A running job
+    whose worker has not heartbeated within the lease is handed to another worker,
+    up to `max_attempts` claims in all; after that the job is marked failed, since
+    it is likely what keeps killing its workers.
+    """
+
+    def __init__(self, db_path: str, poll_interval: float = 0.5, result_ttl: int = 3600,
+                 lease_timeout: float = 600, max_attempts: int = 3):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # Queue files created before attempts were counted
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(jobs)")]
+            if 'attempts' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, job_id: str, payload: dict):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_SUCCEEDED, JOB_FAILED, now - self.result_ttl)
+            )
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, json.dumps(payload), now, now)
+            )
+
+    def claim(self, timeout: float):
+        deadline = time.time() + timeout
+        while True:
+            conn = self._connect()
+            try:
+                # BEGIN IMMEDIATE takes the write lock up front so two workers never claim the same job
+                conn.execute("BEGIN IMMEDIATE")
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (JOB_FAILED, f"Worker stopped during each of {self.max_attempts} attempts", now,
+                     JOB_RUNNING, now - self.lease_timeout, self.max_attempts)
+                )
+                # Running jobs past their lease were left behind by a worker that died mid-job
+                row = conn.execute(
+                    "SELECT job_id, payload FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (JOB_QUEUED, JOB_RUNNING, now - self.lease_timeout)
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                        (JOB_RUNNING, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+            if row:
+                return row[0], json.loads(row[1])
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def touch(self, job_id: str):
+        """Renews the lease on a running job."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND status = ?", (time.time(), job_id, JOB_RUNNING)
+            )
+
+    def update(self, job_id: str, status: str, result: dict = None, error: str = None):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+
+    def get(self, job_id: str):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT job_id, status, payload, result, error, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'job_id': row[0],
+            'status': row[1],
+            'payload': json.loads(row[2]),
+            'result': json.loads(row[3]) if row[3] else None,
+            'error': row[4],
+            'created_at': row[5],
+            'updated_at': row[6],
+        }
+
+    def depth(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)).fetchone()[0]
+
+
+class JobQueueService:
+    """
+    Queues report generation jobs and runs them on a fixed number of background
+    worker threads so that web workers can respond immediately.
+    """
+
+    def __init__(self, handler, backend=None, concurrency: int = None):
+        self.logger = logging.getLogger(__name__)
+        self.handler = handler
+        self.backend = backend or self.create_backend()
+        self.concurrency = concurrency or Config.JOB_WORKER_CONCURRENCY
+        self._workers = []
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def create_backend():
+        """Creates the backend selected by JOB_QUEUE_BACKEND."""
+        if Config.JOB_QUEUE_BACKEND == 'sqlite':
+            return SQLiteJobBackend(
+                Config.JOB_QUEUE_DB_PATH, Config.JOB_POLL_INTERVAL, Config.JOB_RESULT_TTL,
+                Config.JOB_LEASE_TIMEOUT, Config.JOB_MAX_ATTEMPTS
+            )
+        if Config.JOB_QUEUE_BACKEND == 'inprocess':
+            return InProcessJobBackend(Config.JOB_RESULT_TTL)
+        raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {Config.JOB_QUEUE_BACKEND}")
+
+    def submit(self, payload: dict) -> str:
+        """Queues a job and returns its ID."""
+        job_id = uuid.uuid4().hex
+        self.backend.enqueue(job_id, payload)
+        self.logger.info(f"Queued job {job_id}")
+        return job_id
+
+    def get_job(self, job_id: str):
+        """Returns the public view of a job, or None if it does not exist."""
+        job = self.backend.get(job_id)
+        if not job:
+            return None
+        return {
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'result': job['result'],
+            'error': job['error'],
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+        }
+
+    def start(self):
+        """Starts the background worker threads if they are not already running."""
+        if self._workers:
+            return
+        self._stop_event.clear()
+        for index in range(self.concurrency):
+            worker = threading.Thread(target=self._worker_loop, name=f"report-job-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info(f"Started {self.concurrency} report job workers")
+
+    def stop(self, timeout: float = None):
+        """Signals the workers to stop after their current job and waits for them."""
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def run_forever(self):
+        """Starts the workers and blocks until interrupted. Used by worker.py."""
+        self.start()
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.logger.info("Stopping report job workers")
+            self.stop()
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                claimed = self.backend.claim(timeout=1)
+            except Exception as e:
+                self.logger.error(f"Error claiming job: {e}", exc_info=True)
+                time.sleep(1)
+                continue
+            if not claimed:
+                continue
+
+            job_id, payload = claimed
+            self.logger.info(f"Running job {job_id}")
+            finished = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._heartbeat, args=(job_id, finished), name=f"report-job-heartbeat-{job_id}", daemon=True
+            )
+            heartbeat.start()
+            try:
+                result = self.handler(payload)
+                self.backend.update(job_id, JOB_SUCCEEDED, result=result)
+                self.logger.info(f"Job {job_id} succeeded")
+            except Exception as e:
+                self.logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+                self.backend.update(job_id, JOB_FAILED, error=str(e))
+            finally:
+                finished.set()
+
+    def _heartbeat(self, job_id: str, finished: threading.Event):
+        # Renewing well inside the lease keeps a slow job from being handed to a second worker
+        while not finished.wait(Config.JOB_LEASE_TIMEOUT / 3):
+            try:
+                self.backend.touch(job_id)
+            except Exception as e:
+                self.logger.warning(f"Could not renew the lease on job {job_id}: {e}")
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import List
+import httpx
+from openai import DEFAULT_MAX_RETRIES, AsyncOpenAI, DefaultAsyncHttpxClient
+from prometheus_client import Gauge, Histogram
+
+LLM_QUEUE_DEPTH = Gauge(
+    'llm_queue_depth', 'LLM requests waiting for a rate limit token or a concurrency slot', multiprocess_mode='livesum'
+)
+LLM_QUEUE_WAIT = Histogram(
+    'llm_queue_wait_seconds', 'Time LLM requests spent queued before being sent',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+LLM_IN_FLIGHT = Gauge('llm_in_flight_requests', 'LLM requests currently being sent', multiprocess_mode='livesum')
+
+# Rough size of a token in characters of English text, used to estimate prompt size before sending
+CHARS_PER_TOKEN = 4
+
+_STREAM_END = object()
+
+
+def estimate_tokens(messages: List[dict], max_tokens: int = 0) -> int:
+    """Estimates the tokens a request will use: the prompt size plus the completion budget."""
+    prompt_chars = sum(len(message['content']) for message in messages)
+    return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+
+class TokenBucket:
+    """
+    Tokens-per-minute limiter. Callers wait, in arrival order, until enough tokens
+    have refilled instead of being rejected.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        # A single request larger than the bucket would wait forever, so cap it at a full bucket
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class AsyncLLMBackend:
+    """
+    Sends chat completions through one shared, connection-pooled AsyncOpenAI client
+    running on a dedicated event loop thread. Every request in the process passes
+    through a concurrency semaphore and a tokens-per-minute bucket, so bursts queue
+    up instead of failing with 429s. Exposes a blocking create() so synchronous
+    Flask code can use it like the OpenAI client.
+    """
+
+    def __init__(self, api_key: str, max_concurrency: int, tokens_per_minute: int, max_connections: int,
+                 base_url: str = None, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.logger = logging.getLogger(__name__)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='llm-event-loop', daemon=True)
+        self._thread.start()
+
+        async def setup():
+            # The client, semaphore and bucket must be created on the loop that uses them
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+            self.client = AsyncOpenAI(
+                api_key=api_key, base_url=base_url, http_client=http_client, max_retries=max_retries
+            )
+            self.semaphore = asyncio.Semaphore(max_concurrency)
+            self.bucket = TokenBucket(tokens_per_minute)
+
+        asyncio.run_coroutine_threadsafe(setup(), self.loop).result()
+        self.logger.info(
+            f"Async LLM backend started with {max_concurrency} concurrent requests and {tokens_per_minute} tokens per minute"
+        )
+
+    def create(self, **kwargs):
+        """Blocking equivalent of client.chat.completions.create; returns an iterator of chunks when stream=True."""
+        if kwargs.get('stream'):
+            return self._stream(kwargs)
+        return asyncio.run_coroutine_threadsafe(self._create(kwargs), self.loop).result()
+
+    async def _acquire(self, kwargs: dict):
+        """Waits for rate limit tokens and a concurrency slot, recording the time spent queued."""
+        queued_at = time.monotonic()
+        LLM_QUEUE_DEPTH.inc()
+        try:
+            await self.bucket.acquire(estimate_tokens(kwargs['messages'], kwargs.get('max_tokens') or 0))
+            await self.semaphore.acquire()
+        finally:
+            LLM_QUEUE_DEPTH.dec()
+            LLM_QUEUE_WAIT.observe(time.monotonic() - queued_at)
+
+    async def _create(self, kwargs: dict):
+        await self._acquire(kwargs)
+        LLM_IN_FLIGHT.inc()
+        try:
+            return await self.client.chat.completions.create(**kwargs)
+        finally:
+            LLM_IN_FLIGHT.dec()
+            self.semaphore.release()
+
+    async def _pump_stream(self, kwargs: dict, chunks: queue.Queue):
+        try:
+            await self._acquire(kwargs)
+            LLM_IN_FLIGHT.inc()
+            try:
+                stream = await self.client.chat.completions.create(**kwargs)
+                async for chunk in stream:
+                    chunks.put(chunk)
+            finally:
+                LLM_IN_FLIGHT.dec()
+                self.semaphore.release()
+        finally:
+            chunks.put(_STREAM_END)
+
+    def _stream(self, kwargs: dict):
+        chunks = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._pump_stream(kwargs, chunks), self.loop)
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+            # Re-raise any error from the request in the consuming thread
+            future.result()
+        finally:
+            # Stops the request if the consumer stopped reading early
+            future.cancel()
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import List, Optional
+from cachetools import TTLCache
+from prometheus_client import Counter, Gauge
+
+CACHE_LOOKUPS = Counter('llm_cache_lookups_total', 'LLM response cache lookups by tier and result', ['tier', 'result'])
+CACHE_DISK_BYTES = Gauge(
+    'llm_cache_disk_bytes', 'Bytes stored in the on-disk LLM response cache', multiprocess_mode='livemax'
+)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of LLM completions. Entries are keyed by a hash of the
+    model and the whitespace-normalized messages, held in an in-memory LRU tier and
+    persisted to a size-bounded SQLite tier that survives restarts.
+    """
+
+    def __init__(self, db_path: str, ttl: int, max_entries: int = 100, max_bytes: int = 50 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+            CACHE_DISK_BYTES.set(self._disk_bytes(conn))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def make_key(model: str, messages: List[dict]) -> str:
+        """Hashes the model and the messages with runs of whitespace collapsed."""
+        normalized = [
+            {'role': message['role'], 'content': WHITESPACE_PATTERN.sub(' ', message['content']).strip()}
+            for message in messages
+        ]
+        payload = json.dumps({'model': model, 'messages': normalized}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached completion for a key, checking memory first and then disk."""
+        with self._lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.stats['memory_hits'] += 1
+                CACHE_LOOKUPS.labels('memory', 'hit').inc()
+                return value
+
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row:
+                self.memory[key] = row[0]
+                self.stats['disk_hits'] += 1
+                CACHE_LOOKUPS.labels('disk', 'hit').inc()
+                return row[0]
+            self.stats['misses'] += 1
+            CACHE_LOOKUPS.labels('disk', 'miss').inc()
+            return None
+
+    def set(self, key: str, value: str):
+        """Stores a completion in both tiers and evicts the least recently used disk entries over the size limit."""
+        with self._lock:
+            self.memory[key] = value
+
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,))
+            self._evict(conn)
+            CACHE_DISK_BYTES.set(self._disk_bytes(conn))
+
+    def _evict(self, conn):
+        total = self._disk_bytes(conn)
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.stats['evictions'] += evicted
+        self.logger.info(f"Evicted {evicted} entries from the LLM response cache")
+
+    @staticmethod
+    def _disk_bytes(conn) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    def get_stats(self) -> dict:
+        """Returns hit, miss and eviction counts along with the current tier sizes."""
+        with closing(self._connect()) as conn:
+            disk_entries, disk_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        with self._lock:
+            return {
+                **self.stats,
+                'memory_entries': len(self.memory),
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes,
+            }
@@ -0,0 +1,187 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import httpx
+import openai
+from prometheus_client import Counter, Gauge
+
+BREAKER_CLOSED = 'closed'
+BREAKER_HALF_OPEN = 'half_open'
+BREAKER_OPEN = 'open'
+BREAKER_STATE_VALUES = {BREAKER_CLOSED: 0, BREAKER_HALF_OPEN: 1, BREAKER_OPEN: 2}
+
+LLM_BREAKER_STATE = Gauge(
+    'llm_circuit_breaker_state', 'LLM circuit breaker state (0 closed, 1 half-open, 2 open)', multiprocess_mode='livemax'
+)
+LLM_RETRIES = Counter('llm_retries_total', 'LLM calls retried after a failure')
+LLM_HEDGES = Counter('llm_hedged_requests_total', 'Hedged LLM calls by which request answered first', ['winner'])
+LLM_FALLBACKS = Counter('llm_fallbacks_total', 'Reports served from fallback content instead of the LLM', ['reason'])
+
+# Hedging needs a meaningful latency distribution before it can pick a threshold
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for failures a later attempt can fix: timeouts, connection errors, 429 and 5xx responses."""
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError, openai.APIConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+class CircuitBreaker:
+    """
+    Opens after a run of consecutive failures so that callers fail fast, then lets a
+    single trial request through after the reset timeout to probe for recovery.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        LLM_BREAKER_STATE.set(BREAKER_STATE_VALUES[self.state])
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            if self.state == BREAKER_OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(BREAKER_HALF_OPEN)
+            if self.state == BREAKER_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            self._set_state(BREAKER_CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(BREAKER_OPEN)
+
+    def record_cancelled(self):
+        """Releases the half-open trial slot for a request that was abandoned before it finished."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logging.getLogger(__name__).warning(f"LLM circuit breaker is now {state}")
+        self.state = state
+        LLM_BREAKER_STATE.set(BREAKER_STATE_VALUES[state])
+
+
+class ResilientCaller:
+    """
+    Wraps LLM calls with a circuit breaker, retries with exponential backoff and
+    full jitter and, optionally, a hedged second request sent when the first one
+    is slower than the recent latency percentile. Only retryable failures are
+    retried and counted by the breaker. With hedging, first requests and hedges
+    run on separate pools of `hedge_workers` threads, so a hedge never waits
+    behind the requests it races.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, max_retries: int, backoff_base: float, backoff_max: float,
+                 hedge: bool = False, hedge_percentile: float = 95, hedge_workers: int = 8):
+        self.logger = logging.getLogger(__name__)
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._latency_lock = threading.Lock()
+        self.executor = None
+        self.hedge_executor = None
+        if hedge:
+            self.executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='llm-primary')
+            self.hedge_executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='llm-hedge')
+
+    def call(self, func):
+        """
+        Calls func, retrying timeouts, connection errors, 429s and 5xx responses; other
+        errors are raised at once. Raises CircuitOpenError without calling func while
+        the breaker is open.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("LLM circuit breaker is open")
+            try:
+                result = self._call_hedged(func) if self.hedge else self._call_timed(func)
+            except Exception as e:
+                if not is_retryable(e):
+                    # A bad request or revoked key fails the same way every time and says nothing about availability
+                    self.breaker.record_cancelled()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                self.logger.warning(
+                    f"LLM call failed on attempt {attempt + 1}/{self.max_retries + 1}: {e}. Retrying in {delay:.2f}s"
+                )
+                LLM_RETRIES.inc()
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def hedge_threshold(self):
+        """Returns the latency percentile used to trigger a hedged request, or None until enough calls are recorded."""
+        with self._latency_lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    def _call_timed(self, func):
+        started_at = time.monotonic()
+        result = func()
+        with self._latency_lock:
+            self.latencies.append(time.monotonic() - started_at)
+        return result
+
+    def _call_hedged(self, func):
+        threshold = self.hedge_threshold()
+        primary = self.executor.submit(self._call_timed, func)
+        if threshold is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        # The primary is slower than usual: race a second request against it.
+        # A sync request cannot be cancelled, so the loser runs to completion and is discarded.
+        hedge = self.hedge_executor.submit(self._call_timed, func)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    LLM_HEDGES.labels('primary' if future is primary else 'hedge').inc()
+                    return future.result()
+                error = future.exception()
+        raise error
@@ -1,9 +1,15 @@
 import logging
+import os
 from typing import List  # Import List from typing
-from openai import OpenAI  # Ensure OpenAI is imported
-from cachetools import cached, TTLCache
+from openai import DEFAULT_MAX_RETRIES, OpenAI  # Ensure OpenAI is imported
 from config import Config
+from services.llm_backend import AsyncLLMBackend
+from services.llm_cache_service import LLMResponseCache
+from services.llm_resilience import CircuitBreaker, ResilientCaller
+from services.model_router import ModelEndpoint, ModelRouter, TIER_REPORT, TIER_SECTION
+from services.usage_service import DailyBudget
 from services.report_generator import ReportGenerator  # Import the ReportGenerator
+from services.utilities_service import UtilitiesService
 
 class LLMService:
     def __init__(self):
@@ -12,14 +18,93 @@ class LLMService:
         if Config.USE_OPENAI_API:
             self.openai_api_key = Config.OPENAI_API_KEY
             self.model = Config.LLM_MODEL
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = OpenAI(api_key=self.openai_api_key, base_url=Config.LLM_BASE_URL)
         else:
             logging.info('LLM service is disabled.')
             self.client = None
             self.model = None
 
-        self.cache = TTLCache(maxsize=100, ttl=300)  # Cache results for 5 minutes
-        self.report_generator = ReportGenerator(self.client, self.model)  # Instantiate ReportGenerator
+        # Retries, hedging and the circuit breaker replace the OpenAI client's own retries
+        self.resilience = None
+        if self.client and Config.ENABLE_LLM_RESILIENCE:
+            self.client = self.client.with_options(max_retries=0)
+            self.resilience = ResilientCaller(
+                CircuitBreaker(Config.LLM_BREAKER_FAILURE_THRESHOLD, Config.LLM_BREAKER_RESET_TIMEOUT),
+                max_retries=Config.LLM_MAX_RETRIES,
+                backoff_base=Config.LLM_RETRY_BACKOFF_BASE,
+                backoff_max=Config.LLM_RETRY_BACKOFF_MAX,
+                hedge=Config.ENABLE_LLM_HEDGING,
+                hedge_percentile=Config.LLM_HEDGE_PERCENTILE,
+                hedge_workers=Config.LLM_HEDGE_WORKERS
+            )
+
+        # Several endpoints, routed by their recent latency and error rate
+        self.router = None
+        if self.client and Config.LLM_MODELS:
+            self.router = ModelRouter(
+                [self.create_endpoint(spec) for spec in Config.LLM_MODELS],
+                probe_interval=Config.LLM_ROUTER_PROBE_INTERVAL,
+                error_threshold=Config.LLM_ROUTER_ERROR_THRESHOLD
+            )
+            self.model = self.router.endpoints[0].model
+            self.logger.info(f"LLM router configured with {len(self.router.endpoints)} endpoints")
+
+        # Shared async client with process-wide concurrency and tokens-per-minute limits
+        self.backend = None
+        if self.client and Config.ENABLE_ASYNC_LLM and not self.router:
+            self.backend = AsyncLLMBackend(
+                api_key=self.openai_api_key,
+                max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                tokens_per_minute=Config.LLM_TOKENS_PER_MINUTE,
+                max_connections=Config.LLM_MAX_CONNECTIONS,
+                max_retries=0 if self.resilience else DEFAULT_MAX_RETRIES,
+                base_url=Config.LLM_BASE_URL
+            )
+
+        self.cache = None
+        if Config.ENABLE_LLM_CACHE:
+            self.cache = LLMResponseCache(
+                Config.LLM_CACHE_DB_PATH,
+                ttl=Config.LLM_CACHE_TTL,
+                max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+                max_bytes=Config.LLM_CACHE_MAX_BYTES
+            )
+
+        self.budget = None
+        if self.client and Config.LLM_DAILY_BUDGET_USD > 0:
+            self.budget = DailyBudget(Config.LLM_DAILY_BUDGET_USD, Config.LLM_BUDGET_DB_PATH)
+
+        self.report_generator = ReportGenerator(
+            self.client, self.model, UtilitiesService(), cache=self.cache, backend=self.backend,
+            resilience=self.resilience, budget=self.budget, router=self.router
+        )  # Instantiate ReportGenerator
+
+    def create_endpoint(self, spec: dict) -> ModelEndpoint:
+        """Builds a routed endpoint, with its own client, from one LLM_MODELS entry."""
+        api_key = os.getenv(spec['api_key_env']) if spec.get('api_key_env') else self.openai_api_key
+        if Config.ENABLE_ASYNC_LLM:
+            create = AsyncLLMBackend(
+                api_key=api_key,
+                max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                tokens_per_minute=Config.LLM_TOKENS_PER_MINUTE,
+                max_connections=Config.LLM_MAX_CONNECTIONS,
+                max_retries=0 if self.resilience else DEFAULT_MAX_RETRIES,
+                base_url=spec.get('base_url', Config.LLM_BASE_URL)
+            ).create
+        else:
+            client = OpenAI(api_key=api_key, base_url=spec.get('base_url', Config.LLM_BASE_URL))
+            if self.resilience:
+                client = client.with_options(max_retries=0)
+            create = client.chat.completions.create
+        return ModelEndpoint(
+            name=spec.get('name', spec['model']),
+            model=spec['model'],
+            create=create,
+            timeout=spec.get('timeout', Config.LLM_REQUEST_TIMEOUT),
+            tiers=spec.get('tiers', (TIER_REPORT, TIER_SECTION)),
+            slow_after=spec.get('slow_after'),
+            prices=spec.get('prices')
+        )
 
     def generate_report_content(self, industry: str, answers: List[str], user_name: str) -> str:
         """Delegate report generation to the ReportGenerator."""
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# Report stages span from milliseconds (Mongo) to minutes (LLM), so the buckets are wide
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_DURATION = Histogram(
+    'report_stage_duration_seconds', 'Time spent in each report pipeline stage', ['stage'], buckets=LATENCY_BUCKETS
+)
+STAGE_CALLS = Counter('report_stage_calls_total', 'Number of times each report pipeline stage ran', ['stage'])
+STAGE_ERRORS = Counter('report_stage_errors_total', 'Number of errors raised in each report pipeline stage', ['stage'])
+STAGE_IN_FLIGHT = Gauge(
+    'report_stage_in_flight', 'Report pipeline stages currently running', ['stage'], multiprocess_mode='livesum'
+)
+
+_current_breakdown = ContextVar('stage_breakdown', default=None)
+
+
+class StageBreakdown:
+    """Accumulates stage durations for a single request, including stages run on other threads."""
+
+    def __init__(self):
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._durations[stage] = self._durations.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        """Returns the stage durations in milliseconds."""
+        with self._lock:
+            return {stage: round(seconds * 1000, 1) for stage, seconds in self._durations.items()}
+
+
+@contextmanager
+def stage_breakdown():
+    """Collects the durations of every stage tracked inside the block."""
+    breakdown = StageBreakdown()
+    token = _current_breakdown.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _current_breakdown.reset(token)
+
+
+def current_stage_breakdown():
+    """Returns the breakdown collected for the current request, or None outside stage_breakdown()."""
+    return _current_breakdown.get()
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Times a pipeline stage. Records its latency, call count, in-flight count and
+    any exception raised inside the block, and adds it to the current request's breakdown.
+    """
+    STAGE_IN_FLIGHT.labels(stage).inc()
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        duration = time.perf_counter() - started_at
+        STAGE_IN_FLIGHT.labels(stage).dec()
+        STAGE_CALLS.labels(stage).inc()
+        STAGE_DURATION.labels(stage).observe(duration)
+        breakdown = _current_breakdown.get()
+        if breakdown is not None:
+            breakdown.add(stage, duration)
+
+
+def record_stage_error(stage: str):
+    """Counts an error for a stage that handles its own exceptions."""
+    STAGE_ERRORS.labels(stage).inc()
+
+
+def render_metrics():
+    """
+    Returns the Prometheus exposition body and content type. When
+    PROMETHEUS_MULTIPROC_DIR is set (gunicorn with several workers), metrics from
+    every worker process are aggregated.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Callable, List, Tuple
+from prometheus_client import Counter, Gauge
+
+ROUTE_DECISIONS = Counter(
+    'llm_route_decisions_total', 'Endpoint that served each LLM call and why it was chosen',
+    ['tier', 'endpoint', 'reason']
+)
+ENDPOINT_REQUESTS = Counter('llm_endpoint_requests_total', 'LLM calls per endpoint by outcome', ['endpoint', 'outcome'])
+ENDPOINT_LATENCY = Gauge(
+    'llm_endpoint_latency_ewma_seconds', 'Smoothed recent latency of each LLM endpoint', ['endpoint'],
+    multiprocess_mode='livemax'
+)
+ENDPOINT_ERROR_RATE = Gauge(
+    'llm_endpoint_error_rate', 'Smoothed recent error rate of each LLM endpoint', ['endpoint'],
+    multiprocess_mode='livemax'
+)
+
+TIER_REPORT = 'report'
+TIER_SECTION = 'section'
+
+ROUTE_PREFERRED = 'preferred'
+ROUTE_REROUTED = 'rerouted'
+ROUTE_PROBE = 'probe'
+ROUTE_FALLBACK = 'fallback'
+
+
+class ModelEndpoint:
+    """
+    One model behind an OpenAI-compatible API, with its own timeout and prices,
+    the tiers of work it serves and smoothed latency and error statistics.
+    """
+
+    def __init__(self, name: str, model: str, create: Callable, timeout: float,
+                 tiers: Tuple[str, ...] = (TIER_REPORT, TIER_SECTION), slow_after: float = None,
+                 prices: dict = None):
+        self.name = name
+        self.model = model
+        self.create = create
+        self.timeout = timeout
+        self.tiers = tuple(tiers)
+        # An endpoint whose smoothed latency passes this is routed around while a faster one is available
+        self.slow_after = slow_after if slow_after is not None else timeout / 2
+        self.prices = prices
+        self.latency = None
+        self.error_rate = 0.0
+        self.last_attempt = 0.0
+
+
+class ModelRouter:
+    """
+    Routes each LLM call to the first healthy endpoint for its tier, in configured
+    order. Endpoints that are slow or failing are moved behind the others and
+    probed again after `probe_interval` seconds; when a call fails the next
+    endpoint is tried within the same call.
+    """
+
+    def __init__(self, endpoints: List[ModelEndpoint], probe_interval: float = 30, error_threshold: float = 0.5,
+                 smoothing: float = 0.2):
+        self.logger = logging.getLogger(__name__)
+        self.endpoints = endpoints
+        self.probe_interval = probe_interval
+        self.error_threshold = error_threshold
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    def is_degraded(self, endpoint: ModelEndpoint) -> bool:
+        slow = endpoint.latency is not None and endpoint.latency > endpoint.slow_after
+        return slow or endpoint.error_rate > self.error_threshold
+
+    def candidates(self, tier: str) -> List[Tuple[ModelEndpoint, str]]:
+        """Returns the endpoints to try for a tier, in order, with the reason each would be chosen."""
+        eligible = [endpoint for endpoint in self.endpoints if tier in endpoint.tiers] or list(self.endpoints)
+        now = time.monotonic()
+        healthy, degraded = [], []
+        with self._lock:
+            for endpoint in eligible:
+                if not self.is_degraded(endpoint):
+                    healthy.append((endpoint, ROUTE_PREFERRED if endpoint is eligible[0] else ROUTE_REROUTED))
+                elif now - endpoint.last_attempt >= self.probe_interval:
+                    # Send one call to a degraded endpoint now and then so it can recover
+                    endpoint.last_attempt = now
+                    healthy.append((endpoint, ROUTE_PROBE))
+                else:
+                    degraded.append((endpoint, ROUTE_FALLBACK))
+        return healthy + degraded
+
+    def create(self, tier: str, **kwargs):
+        """Sends a chat completion to the best endpoint for the tier, falling back on errors. Returns (endpoint, response)."""
+        error = None
+        for attempt, (endpoint, reason) in enumerate(self.candidates(tier)):
+            started_at = time.monotonic()
+            endpoint.last_attempt = started_at
+            try:
+                response = endpoint.create(**{**kwargs, 'model': endpoint.model, 'timeout': endpoint.timeout})
+            except Exception as e:
+                self.record(endpoint, time.monotonic() - started_at, failed=True, reset=reason == ROUTE_PROBE)
+                self.logger.warning(f"LLM endpoint '{endpoint.name}' failed for {tier} work: {e}")
+                error = e
+                continue
+            self.record(endpoint, time.monotonic() - started_at, failed=False, reset=reason == ROUTE_PROBE)
+            reason = ROUTE_FALLBACK if attempt else reason
+            ROUTE_DECISIONS.labels(tier, endpoint.name, reason).inc()
+            if reason != ROUTE_PREFERRED:
+                self.logger.info(f"Routed {tier} work to LLM endpoint '{endpoint.name}' ({reason})")
+            return endpoint, response
+        raise error
+
+    def record(self, endpoint: ModelEndpoint, latency: float, failed: bool, reset: bool = False):
+        """
+        Folds one call into the endpoint's smoothed latency and error rate. A probe
+        resets them instead, since the history it replaces is stale.
+        """
+        with self._lock:
+            if not failed:
+                endpoint.latency = latency if endpoint.latency is None or reset else (
+                    self.smoothing * latency + (1 - self.smoothing) * endpoint.latency
+                )
+            endpoint.error_rate = float(failed) if reset else (
+                self.smoothing * float(failed) + (1 - self.smoothing) * endpoint.error_rate
+            )
+            ENDPOINT_LATENCY.labels(endpoint.name).set(endpoint.latency or 0)
+            ENDPOINT_ERROR_RATE.labels(endpoint.name).set(endpoint.error_rate)
+        ENDPOINT_REQUESTS.labels(endpoint.name, 'error' if failed else 'ok').inc()
+
+    def snapshot(self) -> List[dict]:
+        """Returns each endpoint's current statistics and whether it is being routed around."""
+        with self._lock:
+            return [{
+                'name': endpoint.name,
+                'model': endpoint.model,
+                'latency': endpoint.latency,
+                'error_rate': endpoint.error_rate,
+                'degraded': self.is_degraded(endpoint),
+            } for endpoint in self.endpoints]
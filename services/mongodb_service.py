@@ -2,6 +2,7 @@ import logging
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from config import Config
+from services.metrics_service import track_stage
 
 class MongoDBService:
     def __init__(self):
@@ -43,20 +44,24 @@ class MongoDBService:
 
     def save_report_data(self, report_data: dict):
         """
-        Saves report data to MongoDB.
+        Saves report data to MongoDB. Returns whether the write succeeded.
         """
         try:
-            self.collection.insert_one(report_data)
+            with track_stage('mongodb.save_report'):
+                self.collection.insert_one(report_data)
             self.logger.info('Data written to MongoDB successfully')
+            return True
         except Exception as e:
             self.logger.error(f'Error saving report data to MongoDB: {e}')
+            return False
 
     def get_report_by_id(self, report_id: str):
         """
         Retrieves a report from MongoDB by its ID.
         """
         try:
-            report = self.collection.find_one({"report_id": report_id})
+            with track_stage('mongodb.get_report'):
+                report = self.collection.find_one({"report_id": report_id})
             if report:
                 self.logger.info(f"Report retrieved successfully for ID {report_id}")
                 return report
@@ -67,6 +72,20 @@ class MongoDBService:
             self.logger.error(f'Error retrieving report from MongoDB: {e}')
             return None
 
+    def update_report(self, report_id: str, fields: dict):
+        """
+        Sets fields on an existing report.
+        """
+        try:
+            with track_stage('mongodb.update_report'):
+                result = self.collection.update_one({"report_id": report_id}, {"$set": fields})
+            if result.matched_count:
+                self.logger.info(f'Report with ID {report_id} updated successfully')
+            else:
+                self.logger.warning(f'No report found to update for ID {report_id}')
+        except Exception as e:
+            self.logger.error(f'Error updating report in MongoDB: {e}')
+
     def delete_report(self, report_id: str):
         """
         Deletes a report from MongoDB by its ID.
@@ -0,0 +1,170 @@
+import logging
+import mimetypes
+import os
+import shutil
+from typing import BinaryIO, Optional
+from config import Config
+from services.report_storage import ReportStorage
+
+# boto3 is only needed when the S3 backend is configured
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+STORAGE_LOCAL = 'local'
+STORAGE_S3 = 's3'
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def content_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def is_not_found(error) -> bool:
+    return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+
+class LocalArtifactStore:
+    """
+    Keeps report artifacts on this instance's disk, in ReportStorage. Downloads are
+    served by ReportFileService, so download_url returns None.
+    """
+
+    # Other instances cannot see these files
+    shared = False
+
+    def __init__(self, storage: ReportStorage):
+        self.storage = storage
+
+    def path(self, name: str) -> str:
+        return self.storage.path_for(name)
+
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(self.path(name))
+
+    def put_file(self, name: str, path: str):
+        destination = self.path(name)
+        if os.path.abspath(path) != os.path.abspath(destination):
+            with open(path, 'rb') as f:
+                self.put_stream(name, f)
+
+    def put_stream(self, name: str, stream: BinaryIO):
+        destination = self.path(name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_path = f'{destination}.tmp'
+        with open(temp_path, 'wb') as f:
+            shutil.copyfileobj(stream, f, COPY_CHUNK_SIZE)
+        os.replace(temp_path, destination)
+
+    def get_stream(self, name: str) -> Optional[BinaryIO]:
+        try:
+            return open(self.path(name), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def delete(self, name: str):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def download_url(self, name: str) -> Optional[str]:
+        return None
+
+
+class S3ArtifactStore:
+    """
+    Stores report artifacts in an S3-compatible bucket (AWS S3, MinIO, R2...), so
+    that any instance can serve a report rendered by another. Uploads stream from
+    disk or a file object in multipart chunks, and downloads are redirected to
+    short-lived presigned URLs instead of passing through the app workers.
+    """
+
+    shared = True
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: str = None, region: str = None,
+                 access_key_id: str = None, secret_access_key: str = None, url_ttl: int = 900,
+                 chunk_size: int = 8 * 1024 * 1024, client=None):
+        if boto3 is None:
+            raise RuntimeError("REPORT_STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.logger = logging.getLogger(__name__)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.url_ttl = url_ttl
+        self.client = client or boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Path-style addressing and SigV4 work with MinIO as well as AWS
+            config=BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path'})
+        )
+        # Parts of chunk_size are read and sent one at a time, so whole files are never held in memory
+        self.transfer_config = TransferConfig(
+            multipart_threshold=chunk_size, multipart_chunksize=chunk_size, max_concurrency=4
+        )
+
+    def key(self, name: str) -> str:
+        return f'{self.prefix}{name}'
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+            return True
+        except ClientError as e:
+            if is_not_found(e):
+                return False
+            raise
+
+    def put_file(self, name: str, path: str):
+        self.client.upload_file(
+            path, self.bucket, self.key(name),
+            ExtraArgs={'ContentType': content_type(name)}, Config=self.transfer_config
+        )
+        self.logger.info(f'Uploaded {name} to s3://{self.bucket}/{self.key(name)}')
+
+    def put_stream(self, name: str, stream: BinaryIO):
+        self.client.upload_fileobj(
+            stream, self.bucket, self.key(name),
+            ExtraArgs={'ContentType': content_type(name)}, Config=self.transfer_config
+        )
+
+    def get_stream(self, name: str) -> Optional[BinaryIO]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.key(name))['Body']
+        except ClientError as e:
+            if is_not_found(e):
+                return None
+            raise
+
+    def delete(self, name: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(name))
+
+    def download_url(self, name: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self.key(name), 'ResponseContentType': content_type(name)},
+            ExpiresIn=self.url_ttl
+        )
+
+
+def create_artifact_store(storage: ReportStorage):
+    """Returns the artifact store selected by REPORT_STORAGE_BACKEND."""
+    if Config.REPORT_STORAGE_BACKEND == STORAGE_S3:
+        return S3ArtifactStore(
+            Config.S3_BUCKET,
+            prefix=Config.S3_PREFIX,
+            endpoint_url=Config.S3_ENDPOINT_URL,
+            region=Config.S3_REGION,
+            access_key_id=Config.S3_ACCESS_KEY_ID,
+            secret_access_key=Config.S3_SECRET_ACCESS_KEY,
+            url_ttl=Config.S3_URL_TTL,
+            chunk_size=Config.S3_MULTIPART_CHUNK_SIZE
+        )
+    return LocalArtifactStore(storage)
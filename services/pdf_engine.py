@@ -0,0 +1,138 @@
+import logging
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from prometheus_client import Counter, Gauge, Histogram
+
+PDF_RENDER_DURATION = Histogram(
+    'pdf_render_seconds', 'Time wkhtmltopdf took to render one report',
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+)
+PDF_RENDERS = Counter('pdf_renders_total', 'PDF renders by outcome', ['outcome'])
+PDF_QUEUE_DEPTH = Gauge('pdf_render_queue_depth', 'PDF renders waiting for a free worker', multiprocess_mode='livesum')
+PDF_QUEUE_WAIT = Histogram(
+    'pdf_render_queue_wait_seconds', 'Time PDF renders spent queued before a worker picked them up',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+PDF_WORKERS_BUSY = Gauge('pdf_render_workers_busy', 'PDF workers currently running wkhtmltopdf', multiprocess_mode='livesum')
+
+RENDER_OK = 'ok'
+RENDER_ERROR = 'error'
+RENDER_TIMEOUT = 'timeout'
+RENDER_REJECTED = 'rejected'
+
+_STOP = object()
+
+
+class PDFRenderError(Exception):
+    """wkhtmltopdf exited with an error or produced no output."""
+
+
+class PDFRenderTimeoutError(PDFRenderError):
+    """wkhtmltopdf did not finish within the render timeout and was killed."""
+
+
+class PDFEngineBusyError(PDFRenderError):
+    """The render queue stayed full for longer than the caller was willing to wait."""
+
+
+class PDFRenderEngine:
+    """
+    Renders HTML to PDF with a fixed number of worker threads, each running at most
+    one wkhtmltopdf process at a time. HTML is piped to stdin and the PDF read from
+    stdout, so no temporary files are written. Requests wait in a bounded queue;
+    when it is full, callers block for up to `queue_timeout` seconds and are then
+    rejected, which pushes back on the request path instead of forking without limit.
+    """
+
+    def __init__(self, workers: int, queue_size: int, render_timeout: float, queue_timeout: float,
+                 binary: str = 'wkhtmltopdf', options: dict = None):
+        self.logger = logging.getLogger(__name__)
+        self.render_timeout = render_timeout
+        self.queue_timeout = queue_timeout
+        self.command = [binary, '--quiet', '--encoding', 'UTF-8']
+        for option, value in (options or {}).items():
+            self.command.append(f'--{option}')
+            if value not in (None, ''):
+                self.command.append(str(value))
+        # '-' '-' reads the HTML from stdin and writes the PDF to stdout
+        self.command += ['-', '-']
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._workers = [
+            threading.Thread(target=self._work, name=f'pdf-render-{index}', daemon=True)
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, html_content: str) -> Future:
+        """Queues a render and returns a Future for the PDF bytes. Raises PDFEngineBusyError when the queue stays full."""
+        future = Future()
+        PDF_QUEUE_DEPTH.inc()
+        try:
+            self._queue.put((html_content, future, time.monotonic()), timeout=self.queue_timeout)
+        except queue.Full:
+            PDF_QUEUE_DEPTH.dec()
+            PDF_RENDERS.labels(RENDER_REJECTED).inc()
+            raise PDFEngineBusyError(f'PDF render queue is full (waited {self.queue_timeout}s)')
+        return future
+
+    def render(self, html_content: str) -> bytes:
+        """Renders the HTML and returns the PDF bytes, blocking until a worker has finished it."""
+        return self.submit(html_content).result()
+
+    def shutdown(self, wait: bool = True):
+        """Stops the workers once the renders already queued have finished."""
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            html_content, future, queued_at = item
+            PDF_QUEUE_DEPTH.dec()
+            PDF_QUEUE_WAIT.observe(time.monotonic() - queued_at)
+            if not future.set_running_or_notify_cancel():
+                continue
+            PDF_WORKERS_BUSY.inc()
+            try:
+                future.set_result(self._run(html_content))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                PDF_WORKERS_BUSY.dec()
+
+    def _run(self, html_content: str) -> bytes:
+        started_at = time.monotonic()
+        try:
+            process = subprocess.Popen(
+                self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            PDF_RENDERS.labels(RENDER_ERROR).inc()
+            raise PDFRenderError(f'Could not start {self.command[0]}: {e}')
+        try:
+            pdf_bytes, stderr = process.communicate(html_content.encode('utf-8'), timeout=self.render_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            # Reap the killed process so it does not linger as a zombie
+            process.communicate()
+            PDF_RENDERS.labels(RENDER_TIMEOUT).inc()
+            self.logger.error(f'wkhtmltopdf timed out after {self.render_timeout}s and was killed')
+            raise PDFRenderTimeoutError(f'PDF render timed out after {self.render_timeout}s')
+        finally:
+            PDF_RENDER_DURATION.observe(time.monotonic() - started_at)
+
+        if process.returncode != 0 or not pdf_bytes:
+            PDF_RENDERS.labels(RENDER_ERROR).inc()
+            message = stderr.decode('utf-8', 'replace').strip()[-500:]
+            raise PDFRenderError(f'wkhtmltopdf exited with code {process.returncode}: {message}')
+        PDF_RENDERS.labels(RENDER_OK).inc()
+        return pdf_bytes
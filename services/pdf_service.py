@@ -1,21 +1,172 @@
+import fcntl
+import hashlib
+import io
+import json
 import logging
-import pdfkit  # For generating PDF from HTML
+import os
+import shutil
+from contextlib import closing
+from prometheus_client import Counter
+from config import Config
+from services.metrics_service import track_stage
+from services.pdf_engine import PDFRenderEngine
+from services.report_storage import ReportStorage, atomic_write
+
+PDF_CACHE_LOOKUPS = Counter('pdf_cache_lookups_total', 'PDF renders looked up in the content-addressed store', ['result'])
+PDF_ON_DEMAND = Counter(
+    'pdf_on_demand_renders_total', 'Lazy PDF downloads by whether they rendered, waited on another render or failed', ['result']
+)
 
 class PDFService:
-    def __init__(self):
+    def __init__(self, engine: PDFRenderEngine = None, storage: ReportStorage = None, artifacts=None):
         # Initialize logger
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Shared wkhtmltopdf worker pool; bounds how many renders run at once in this process
+        self.engine = engine or PDFRenderEngine(
+            workers=Config.PDF_RENDER_WORKERS,
+            queue_size=Config.PDF_RENDER_QUEUE_SIZE,
+            render_timeout=Config.PDF_RENDER_TIMEOUT,
+            queue_timeout=Config.PDF_QUEUE_TIMEOUT,
+            binary=Config.WKHTMLTOPDF_PATH
+        )
+        # Where stored PDFs and pending HTML live; without one, they go next to each output file
+        self.storage = storage
+        # Shared artifact store (e.g. S3) that finished PDFs and pending HTML are uploaded to
+        self.artifacts = artifacts if artifacts is not None and artifacts.shared else None
+
+    def storage_for(self, output_path):
+        return self.storage or ReportStorage(os.path.dirname(output_path), blob_dir=Config.PDF_STORE_DIR)
+
+    def render_key(self, html_content):
+        """
+        Hashes the HTML together with the render options, so the same report
+        rendered with the same settings maps to the same stored PDF.
+        """
+        # The binary path is left out so that moving wkhtmltopdf does not invalidate the store
+        options = json.dumps(self.engine.command[1:])
+        return hashlib.sha256(f'{options}\n{html_content}'.encode('utf-8')).hexdigest()
+
+    def blob_path(self, html_content, output_path):
+        """Returns where the PDF for this HTML is stored in the content-addressed store."""
+        return self.storage_for(output_path).blob_path(self.render_key(html_content))
+
+    def pending_path(self, output_path):
+        """Returns where the HTML of a lazily rendered report is kept until its first download."""
+        return self.storage_for(output_path).pending_path(os.path.basename(output_path))
+
+    @staticmethod
+    def pending_name(output_path):
+        """Returns the artifact name of a report's pending HTML in the shared store."""
+        return f'pending/{os.path.basename(output_path)}.html'
 
     def generate_pdf(self, html_content, output_path):
         """
         Generates a PDF from the provided HTML content and saves it to the output_path.
+        Identical content is rendered once; later reports link to the stored PDF.
         """
         self.logger.debug(f'Generating PDF at {output_path}')
         try:
-            # Generate PDF from HTML content and save to the specified output path
-            pdfkit.from_string(html_content, output_path)
+            blob_path = self.blob_path(html_content, output_path)
+            if os.path.exists(blob_path):
+                PDF_CACHE_LOOKUPS.labels('hit').inc()
+                self.logger.info(f'Reusing stored PDF {os.path.basename(blob_path)}')
+                pdf_bytes = None
+            else:
+                PDF_CACHE_LOOKUPS.labels('miss').inc()
+                # Render through the worker pool and publish the result in one step
+                with track_stage('pdf.render'):
+                    pdf_bytes = self.engine.render(html_content)
+                atomic_write(blob_path, pdf_bytes)
+            if self.artifacts:
+                # Uploaded before the local file appears, so a local copy always means it is shared too
+                with track_stage('pdf.upload'):
+                    self.artifacts.put_file(os.path.basename(output_path), blob_path)
+            if not self.link(blob_path, output_path):
+                # The sweeper removed the stored PDF in the meantime; keep the report as a plain file
+                atomic_write(output_path, pdf_bytes if pdf_bytes is not None else self.engine.render(html_content))
             self.logger.info(f'PDF generated and saved to: {output_path}')
             return output_path
         except Exception as e:
             self.logger.error(f'Error generating PDF: {e}', exc_info=True)
-            return None
\ No newline at end of file
+            return None
+
+    def save_pending(self, html_content, output_path):
+        """Stores the HTML so that render_on_demand can produce the PDF at output_path later."""
+        pending_path = self.pending_path(output_path)
+        atomic_write(pending_path, html_content.encode('utf-8'))
+        if self.artifacts:
+            # Lets whichever instance receives the first download render the PDF
+            self.artifacts.put_stream(self.pending_name(output_path), io.BytesIO(html_content.encode('utf-8')))
+        self.logger.info(f'HTML stored for on-demand PDF rendering: {pending_path}')
+        return output_path
+
+    def render_on_demand(self, output_path):
+        """
+        Renders a pending report on its first download. Concurrent downloads of the
+        same report, from any thread or process, wait on a file lock for the one render
+        in progress. Returns output_path, or None when nothing is pending or rendering failed.
+        """
+        if os.path.exists(output_path):
+            return output_path
+        pending_path = self.pending_path(output_path)
+        if not os.path.exists(pending_path) and not self.fetch_pending(output_path):
+            return None
+
+        lock_path = f'{pending_path}.lock'
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(output_path):
+                    PDF_ON_DEMAND.labels('coalesced').inc()
+                    return output_path
+                try:
+                    with open(pending_path, 'r', encoding='utf-8') as f:
+                        html_content = f.read()
+                except FileNotFoundError:
+                    return None
+                if not self.generate_pdf(html_content, output_path):
+                    PDF_ON_DEMAND.labels('failed').inc()
+                    return None
+                PDF_ON_DEMAND.labels('rendered').inc()
+                os.remove(pending_path)
+                if self.artifacts:
+                    self.artifacts.delete(self.pending_name(output_path))
+                # Waiters re-check output_path once they get the lock, so removing it here is safe
+                os.remove(lock_path)
+                return output_path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def fetch_pending(self, output_path):
+        """Copies pending HTML saved by another instance from the shared store. Returns whether it was found."""
+        if not self.artifacts:
+            return False
+        stream = self.artifacts.get_stream(self.pending_name(output_path))
+        if stream is None:
+            return False
+        with closing(stream):
+            atomic_write(self.pending_path(output_path), stream.read())
+        return True
+
+    @staticmethod
+    def link(blob_path, output_path):
+        """
+        Points the per-report file at the stored PDF, copying when a hard link is not
+        possible. Returns False when the stored PDF no longer exists.
+        """
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        temp_path = f'{output_path}.tmp'
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(blob_path, temp_path)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            # Hard links need the store and the reports on the same filesystem
+            try:
+                shutil.copyfile(blob_path, temp_path)
+            except FileNotFoundError:
+                return False
+        os.replace(temp_path, output_path)
+        return True
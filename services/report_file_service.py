@@ -0,0 +1,85 @@
+import hashlib
+import logging
+import os
+import threading
+from cachetools import LRUCache
+from flask import Response, request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from services.report_storage import ReportStorage
+
+SENDFILE_NONE = 'none'
+SENDFILE_X_ACCEL = 'x-accel'
+SENDFILE_X_SENDFILE = 'x-sendfile'
+
+
+class ReportFileService:
+    """
+    Serves generated report files with strong content-hash ETags, conditional GETs
+    (If-None-Match / If-Modified-Since) and byte ranges. In 'x-accel' or 'x-sendfile'
+    mode only the headers are produced here and the front proxy sends the bytes.
+    """
+
+    def __init__(self, storage: ReportStorage, sendfile_mode: str = SENDFILE_NONE, accel_prefix: str = '/protected-reports',
+                 max_age: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.storage = storage
+        self.sendfile_mode = sendfile_mode
+        self.accel_prefix = accel_prefix.rstrip('/')
+        self.max_age = max_age
+        # Reports are hard links into the content-addressed store, so the inode identifies the content
+        self._etags = LRUCache(maxsize=4096)
+        self._lock = threading.Lock()
+
+    def file_etag(self, path: str, stat: os.stat_result) -> str:
+        """Returns the SHA-256 of the file, hashed once per inode and modification time."""
+        key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            etag = self._etags.get(key)
+        if etag:
+            return etag
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        etag = digest.hexdigest()
+        with self._lock:
+            self._etags[key] = etag
+        return etag
+
+    def send(self, filename: str) -> Response:
+        """Returns the response for a report file download. Raises NotFound for unknown files."""
+        if not safe_join(self.storage.root, filename):
+            raise NotFound()
+        path = self.storage.path_for(filename)
+        if not os.path.isfile(path):
+            raise NotFound()
+        self.storage.touch(path)
+        stat = os.stat(path)
+        etag = self.file_etag(path, stat)
+
+        if self.sendfile_mode == SENDFILE_X_ACCEL:
+            # nginx answers Range requests itself once it follows the internal redirect
+            response = Response(mimetype='application/pdf')
+            response.headers['X-Accel-Redirect'] = f'{self.accel_prefix}/{self.storage.relative_path(path)}'
+            response.set_etag(etag)
+            response.last_modified = stat.st_mtime
+            self._set_cache_headers(response)
+            return response.make_conditional(request)
+
+        # 'x-sendfile' reuses Flask's support: the body is left empty and X-Sendfile is set instead
+        response = send_from_directory(
+            os.path.dirname(path), filename, etag=etag, conditional=True, max_age=self.max_age or None
+        )
+        self._set_cache_headers(response)
+        return response
+
+    def _set_cache_headers(self, response: Response):
+        # Report file names are never reused, so their content never changes
+        if self.max_age:
+            response.cache_control.public = False
+            response.cache_control.private = True
+            response.cache_control.max_age = self.max_age
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
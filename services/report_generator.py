@@ -1,18 +1,285 @@
+import contextvars
+import json
 import logging
-from typing import List
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+from jinja2 import Template
+from markupsafe import escape
+from marshmallow import EXCLUDE, Schema, fields, validate
 from services.utilities_service import UtilitiesService
+from services.metrics_service import track_stage
+from services.llm_resilience import CircuitOpenError, LLM_FALLBACKS, is_retryable
+from services.llm_backend import CHARS_PER_TOKEN, estimate_tokens
+from services.usage_service import BudgetExceededError, current_usage, record_llm_usage
+from services.model_router import TIER_REPORT, TIER_SECTION
+from services.html_stream_extractor import BODY_CLOSE, REPORT_BLOCK_PATTERN, StreamingHTMLExtractor
 from openai import OpenAI
+from prometheus_client import Counter
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+LLM_PROMPT_TOKENS = Counter('llm_prompt_tokens_total', 'Prompt tokens sent to the LLM', ['stage'])
+LLM_CACHED_PROMPT_TOKENS = Counter(
+    'llm_cached_prompt_tokens_total', 'Prompt tokens served from the provider prompt cache', ['stage']
+)
+LLM_DISCARDED_TOKENS = Counter(
+    'llm_discarded_completion_tokens_total', 'Estimated streamed completion tokens received outside the report body'
+)
+LLM_EARLY_STOPS = Counter('llm_streams_stopped_early_total', 'Report streams closed as soon as </body> arrived')
+
+CODE_FENCE_PATTERN = re.compile(r'^```[a-z]*\s*|\s*```$')
+SECTION_HEADING_PATTERN = re.compile(r'^\s*<h[1-6][^>]*>.*?</h[1-6]>', re.DOTALL)
+
+# Sections of the report in document order, with the brief used when each one is generated on its own
+REPORT_SECTIONS = [
+    {
+        'key': 'executive_summary',
+        'title': 'Introduction',
+        'instruction': 'Provide a brief executive summary of the operational plan for integrating AI into the business.'
+    },
+    {
+        'key': 'industry_trends',
+        'title': 'Industry Trends',
+        # Depends only on the industry, so it can be precomputed and shared across clients
+        'scope': 'industry',
+        'instruction': 'Identify and analyze the latest trends in the {industry} industry that may impact or benefit from AI integration, and suggest ways AI can be used to capitalize on these trends to stay ahead of the competition.'
+    },
+    {
+        'key': 'technology_integration',
+        'title': 'Technology Integration',
+        'instruction': 'Detail the steps for integrating AI technologies into existing business processes given the current technology stack, evaluate the compatibility of AI tools with existing systems, and recommend how to scale AI solutions as the business grows.'
+    },
+    {
+        'key': 'workforce_training',
+        'title': 'Workforce Training',
+        'instruction': "Outline a training plan based on the team's current skill level, recommend areas for skill development, and suggest methods for ongoing training to keep the workforce up-to-date with AI advancements."
+    },
+    {
+        'key': 'data_management',
+        'title': 'Data Management',
+        'instruction': 'Describe strategies for managing and utilizing the available data to support AI, including data privacy and security considerations and compliance with relevant industry regulations.'
+    },
+    {
+        'key': 'risk_and_challenges',
+        'title': 'Risk & Challenges',
+        'instruction': 'Identify potential risks and challenges of AI integration, propose preventative measures to mitigate them and develop contingency plans in case they materialize.'
+    },
+    {
+        'key': 'additional_recommendations',
+        'title': 'Additional Recommendations',
+        'instruction': 'Offer extra insights or suggest emerging technologies that might be relevant to the business.'
+    },
+    {
+        'key': 'conclusion',
+        'title': 'Conclusion',
+        'instruction': 'Summarize the expected impact of AI integration on business operations.'
+    },
+]
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant."
+
+# Kept verbatim by the model and substituted locally, so the prompt prefix stays identical for every client
+USER_NAME_PLACEHOLDER = '%%USER_NAME%%'
+YEAR_PLACEHOLDER = '%%CURRENT_YEAR%%'
+
+# Static instructions sent as the system prompt. Nothing request-specific may appear
+# here: providers only reuse cached prompt tokens for a byte-identical prefix.
+REPORT_PROMPT_PREFIX = f"""You are a helpful assistant.
+
+### Instruction:
+As an AI consultant specializing in business and entrepreneurship, your task is to develop a strategic operational plan for integrating artificial intelligence into the client's business operations within the client's industry. The client's industry and business overview follow in the user message.
+
+### Industry Trends:
+- **Current Trends**: Identify and analyze the latest trends in the client's industry that may impact or benefit from AI integration.
+- **Opportunities**: Suggest ways in which AI can be used to capitalize on these trends, helping the business stay ahead of the competition.
+
+### Requirements:
+1. **Technology Integration**:
+   - **Integration Steps**: Detail the steps for integrating AI technologies into existing business processes, considering the current technology stack.
+   - **System Compatibility**: Evaluate the compatibility of AI tools with existing systems.
+   - **Scalability**: Provide recommendations on how to scale AI solutions as the business grows.
+
+2. **Workforce Training**:
+   - **Training Plan**: Outline a comprehensive training plan based on the team’s current skill level and the specific needs identified.
+   - **Skill Development**: Recommend areas for skill development to maximize the effectiveness of AI integration.
+   - **Continuous Learning**: Suggest methods for ongoing training to keep the workforce up-to-date with AI advancements.
+
+3. **Data Management**:
+   - **Data Strategy**: Describe the strategies for managing and utilizing the data available to support AI implementation.
+   - **Data Security**: Include considerations for data privacy and security, especially in relation to AI processing.
+   - **Compliance**: Ensure that data management practices comply with relevant industry regulations.
+
+4. **Risk and Challenges**:
+   - **Risk Identification**: Identify potential risks and challenges that could arise during AI integration.
+   - **Preventative Measures**: Propose preventative measures to mitigate these risks.
+   - **Contingency Plans**: Develop contingency plans in case these challenges materialize.
+
+### Output Structure:
+- **Executive Summary**: Provide a brief overview of the operational plan.
+- **Industry Trends**: Analysis of current trends in the client's industry and AI-driven opportunities.
+- **Technology Integration**: Detailed steps for integrating AI, system compatibility, and scalability.
+- **Workforce Training**: Comprehensive training plan, skill development, and continuous learning strategies.
+- **Data Management**: Data strategies, security considerations, and compliance measures.
+- **Risk and Challenges**: Identification, preventative measures, and contingency plans.
+- **Additional Recommendations**: Offer extra insights or suggest emerging technologies that might be relevant to the business.
+- **Conclusion**: Summarize the expected impact of AI integration on business operations.
+
+Ensure the report is structured professionally, with clear headings and well-organized content.
+
+The report should be in the following format embedded in HTML code with the braces filled in with the appropriate content. Copy {USER_NAME_PLACEHOLDER} and {YEAR_PLACEHOLDER} exactly as written; they are filled in later.
+
+## Format
+```
+<body>
+    <header>
+        <div class="header-content">
+            <p><a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a></p>
+            <h1>AI Insights Report</h1>
+            <p class="sub-title">Prepared for</p>
+            <h3>{USER_NAME_PLACEHOLDER}</h3>
+        </div>
+    </header>
+
+    <div class="container">
+        <section>
+            <h2>Introduction</h2>
+            <p>{{ executive_summary }}</p>
+        </section>
+
+        <section>
+            <h2>Industry Trends</h2>
+            <p>{{ industry_trends }}</p>
+        </section>
+
+        <section>
+            <h2>Technology Integration</h2>
+            <p>{{ technology_integration }}</p>
+        </section>
+
+        <section>
+            <h2>Workforce Training</h2>
+            <p>{{ workforce_training }}</p>
+        </section>
+
+        <section>
+            <h2>Data Management</h2>
+            <p>{{ data_management }}</p>
+        </section>
+
+        <section>
+            <h2>Risk & Challenges</h2>
+            <p>{{ risk_and_challenges }}</p>
+        </section>
+
+        <section>
+            <h2>Additional Recommendations</h2>
+            <p>{{ additional_recommendations }}</p>
+        </section>
+
+        <section>
+            <h2>Conclusion</h2>
+            <p>{{ conclusion }}</p>
+        </section>
+
+        <section class="cta">
+            <h2>Ready to Implement AI in Your Business?</h2>
+            <p>Contact <a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a> for expert guidance on how AI can transform your business. Let us help you stay ahead of the competition with cutting-edge AI solutions.</p>
+            <a href="https://dmotts.github.io/portfolio/" class="cta-btn">Learn More</a>
+        </section>
+    </div>
+
+    <footer>
+        <p><a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a> | All Rights Reserved &copy; {YEAR_PLACEHOLDER}</p>
+    </footer>
+</body>
+```
+"""
+
+JSON_REPORT_PROMPT_PREFIX = """You are a helpful assistant.
+
+### Instruction:
+As an AI consultant specializing in business and entrepreneurship, your task is to develop a strategic operational plan for integrating artificial intelligence into the client's business operations within the client's industry. The client's industry and business overview follow in the user message.
+
+### Output Format:
+Respond with a single JSON object with exactly the keys below. Each value is an array of one to three paragraphs of plain text, without HTML or Markdown.
+""" + "\n".join(
+    '- "{}": {}'.format(section['key'], section['instruction'].format(industry="client's")) for section in REPORT_SECTIONS
+) + "\n"
+
+
+def record_fallback(reason: str):
+    """Counts a report served from fallback content and flags it on the current report's usage."""
+    LLM_FALLBACKS.labels(reason).inc()
+    usage = current_usage()
+    if usage:
+        usage.mark_fallback(reason)
+
+
+# Shape of a report returned in JSON output mode: one list of plain-text paragraphs per section
+ReportContentSchema = Schema.from_dict({
+    section['key']: fields.List(
+        fields.String(validate=validate.Length(min=1)), required=True, validate=validate.Length(min=1)
+    )
+    for section in REPORT_SECTIONS
+}, name='ReportContentSchema')
+
+REPORT_HEADER_TEMPLATE = Template("""<header>
+        <div class="header-content">
+            <p><a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a></p>
+            <h1>AI Insights Report</h1>
+            <p class="sub-title">Prepared for</p>
+            <h3>{{ user_name }}</h3>
+        </div>
+    </header>""", autoescape=True)
+
+REPORT_SECTION_TEMPLATE = Template("""<section>
+            <h2>{{ title }}</h2>
+            {{ content | safe }}
+        </section>""", autoescape=True)
+
+REPORT_PARAGRAPHS_TEMPLATE = Template("""{% for paragraph in paragraphs %}<p>{{ paragraph }}</p>
+            {% endfor %}""", autoescape=True)
+
+REPORT_LAYOUT_TEMPLATE = Template("""<body>
+    {{ header | safe }}
+
+    <div class="container">
+        {% for section in sections %}{{ section | safe }}
+
+        {% endfor %}<section class="cta">
+            <h2>Ready to Implement AI in Your Business?</h2>
+            <p>Contact <a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a> for expert guidance on how AI can transform your business. Let us help you stay ahead of the competition with cutting-edge AI solutions.</p>
+            <a href="https://dmotts.github.io/portfolio/" class="cta-btn">Learn More</a>
+        </section>
+    </div>
+
+    <footer>
+        <p><a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a> | All Rights Reserved &copy; {{ year }}</p>
+    </footer>
+</body>""", autoescape=True)
+
+
+class ReportContentError(Exception):
+    """Raised by callers when the LLM produced no report content, so that nothing is published."""
+
 
 class ReportGenerator:
 
-    def __init__(self, client=None, model=None, utilities_service=None):
+    def __init__(self, client=None, model=None, utilities_service=None, cache=None, industry_content=None,
+                 backend=None, resilience=None, budget=None, router=None):
         self.client = client
         self.model = model
         self.util = utilities_service
+        self.cache = cache
+        self.industry_content = industry_content
+        self.backend = backend
+        self.resilience = resilience
+        self.budget = budget
+        self.router = router
+        self.section_executor = None
 
     def generate_report_content(self, industry: str, answers: List[str],
                                 user_name: str) -> str:
@@ -22,34 +289,432 @@ class ReportGenerator:
         if not self.client:
             logger.info(
                 'LLM API usage is disabled. Returning mock report content.')
+            record_fallback('disabled')
             return self.generate_mock_report(industry, answers)
 
         try:
-            prompt = self.build_prompt(industry, answers, user_name)
-            logger.debug('Generating report content with LLM API')
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{
-                    "role": "system",
-                    "content": "You are a helpful assistant."
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }],
-                max_tokens=1500)
-            report_content = response.choices[0].message.content
+            if Config.REPORT_GENERATION_MODE == 'sections':
+                return self.generate_report_by_sections(industry, answers, user_name)
+            if Config.REPORT_OUTPUT_MODE == 'json':
+                sections = self.generate_json_sections(industry, answers, user_name)
+                return self.inject_styles(self.render_report_body(user_name, sections))
 
+            messages = self.build_messages(self.build_prompt(industry, answers), REPORT_PROMPT_PREFIX)
+            logger.debug('Generating report content with LLM API')
+            report_content = self.complete(messages, max_tokens=1500, stop=[BODY_CLOSE])
             logger.info('Report content generated successfully')
-            html_body_content = self.extract_html(report_content)
+
+            html_body_content = self.fill_placeholders(self.extract_html(report_content), user_name)
             logger.info('HTML content extracted from the response')
             styled_html_content = self.inject_styles(html_body_content)
             return styled_html_content
+        except BudgetExceededError:
+            # Cached completions were already tried inside complete(), so fall back to the mock report
+            logger.warning('Daily LLM budget exceeded. Returning mock report content.')
+            record_fallback('budget')
+            return self.generate_mock_report(industry, answers)
+        except CircuitOpenError:
+            logger.warning('LLM circuit breaker is open. Returning mock report content.')
+            record_fallback('circuit_open')
+            return self.generate_mock_report(industry, answers)
         except Exception as e:
+            # Only an unavailable LLM warrants mock content; callers raise ReportContentError for the empty result
             logger.error(f'Error generating report content: {e}',
                          exc_info=True)
             return ""
 
+    def create_completion(self, tier: str = TIER_REPORT, **kwargs):
+        """
+        Sends a chat completion through the model router when one is configured, or
+        else the rate-limited async backend or the client. Returns the endpoint that
+        served it (None without a router) and the response.
+        """
+        kwargs.setdefault('timeout', Config.LLM_REQUEST_TIMEOUT)
+        if self.router:
+            return self.router.create(tier, **kwargs)
+        if self.backend:
+            return None, self.backend.create(**kwargs)
+        return None, self.client.chat.completions.create(**kwargs)
+
+    def complete(self, messages: List[dict], max_tokens: int, stage: str = 'llm.completion', parse=None,
+                 tier: str = TIER_REPORT, **request_options):
+        """
+        Returns the completion for the messages, from the response cache when possible.
+        When `parse` is given its result is returned instead, and a completion it
+        rejects by raising is not cached.
+        """
+        parse = parse or (lambda content: content)
+        cache_key = self.cache.make_key(self.model, messages) if self.cache else None
+        if self.cache:
+            cached_content = self.cache.get(cache_key)
+            if cached_content:
+                logger.info('Completion served from the LLM response cache')
+                return parse(cached_content)
+
+        self.check_budget()
+
+        def request():
+            return self.create_completion(
+                tier, model=self.model, messages=messages, max_tokens=max_tokens, **request_options
+            )
+
+        started_at = time.monotonic()
+        with track_stage(stage):
+            endpoint, response = self.resilience.call(request) if self.resilience else request()
+        content = response.choices[0].message.content
+        self.record_usage(
+            getattr(response, 'usage', None), stage, time.monotonic() - started_at, messages, content, endpoint
+        )
+        result = parse(content)
+        if self.cache and content:
+            self.cache.set(cache_key, content)
+        return result
+
+    def check_budget(self):
+        """Raises BudgetExceededError when today's LLM spend has reached the daily budget."""
+        if self.budget and self.budget.exceeded():
+            raise BudgetExceededError(f"Daily LLM budget of ${self.budget.limit_usd:.2f} exceeded")
+
+    def record_usage(self, usage, stage: str, latency: float, messages: List[dict], completion: str = None,
+                     endpoint=None):
+        """
+        Records the tokens, cost and latency of a call against the current report
+        and the daily budget. Token counts are estimated from the text when the
+        response carried no usage, such as a stream closed before its final chunk.
+        """
+        if usage and getattr(usage, 'prompt_tokens', None):
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens or 0
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached_tokens = getattr(details, 'cached_tokens', None) or 0
+            estimated = False
+        else:
+            prompt_tokens = estimate_tokens(messages)
+            completion_tokens = len(completion or '') // CHARS_PER_TOKEN
+            cached_tokens = 0
+            estimated = True
+
+        LLM_PROMPT_TOKENS.labels(stage).inc(prompt_tokens)
+        LLM_CACHED_PROMPT_TOKENS.labels(stage).inc(cached_tokens)
+        model = endpoint.model if endpoint else self.model
+        prices = endpoint.prices if endpoint else None
+        cost = record_llm_usage(model, prompt_tokens, completion_tokens, cached_tokens, latency, estimated, prices)
+        if self.budget:
+            self.budget.add(cost)
+        logger.debug(
+            f"{stage} used {prompt_tokens} prompt ({cached_tokens} cached) and {completion_tokens} completion tokens"
+        )
+
+    def generate_json_sections(self, industry: str, answers: List[str],
+                               user_name: str) -> List[str]:
+        """Asks for the report as JSON section text and renders each section block locally."""
+        messages = self.build_messages(self.build_json_prompt(industry, answers), JSON_REPORT_PROMPT_PREFIX)
+        logger.debug('Generating JSON report content with LLM API')
+        content = self.complete(
+            messages,
+            max_tokens=Config.LLM_JSON_MAX_TOKENS,
+            parse=self.parse_json_report,
+            response_format={'type': 'json_object'}
+        )
+        logger.info('JSON report content generated successfully')
+        return [
+            self.render_section(section['title'], REPORT_PARAGRAPHS_TEMPLATE.render(paragraphs=content[section['key']]))
+            for section in REPORT_SECTIONS
+        ]
+
+    def parse_json_report(self, content: str) -> Dict[str, List[str]]:
+        """Parses and validates a JSON report; raises ValueError or ValidationError when it is malformed."""
+        return ReportContentSchema(unknown=EXCLUDE).load(json.loads(CODE_FENCE_PATTERN.sub('', content.strip())))
+
+    def generate_report_by_sections(self, industry: str, answers: List[str],
+                                    user_name: str) -> str:
+        """Generates every section with its own concurrent LLM call and assembles the styled report."""
+        futures = self.submit_sections(industry, answers, user_name)
+        sections = [
+            self.render_section(section['title'], future.result())
+            for section, future in zip(REPORT_SECTIONS, futures)
+        ]
+        logger.info('Report sections generated successfully')
+        return self.inject_styles(self.render_report_body(user_name, sections))
+
+    def submit_sections(self, industry: str, answers: List[str], user_name: str) -> list:
+        """
+        Queues one generation task per section on the shared section pool, which
+        caps how many section calls run at once across all requests. Returns the
+        futures in document order.
+        """
+        if not self.section_executor:
+            self.section_executor = ThreadPoolExecutor(
+                max_workers=Config.LLM_SECTION_CONCURRENCY,
+                thread_name_prefix='report-section'
+            )
+        return [
+            # Copy the caller's context so section timings land in the request's stage breakdown
+            self.section_executor.submit(
+                contextvars.copy_context().run, self.resolve_section, section, industry, answers, user_name
+            )
+            for section in REPORT_SECTIONS
+        ]
+
+    def resolve_section(self, section: dict, industry: str, answers: List[str],
+                        user_name: str) -> str:
+        """Returns precomputed content for industry-scoped sections when available, otherwise generates the section."""
+        if section.get('scope') == 'industry' and self.industry_content:
+            content = self.industry_content.get_section(industry, section)
+            if content:
+                return content
+        return self.generate_section(section, industry, answers, user_name)
+
+    def generate_section(self, section: dict, industry: str, answers: List[str],
+                         user_name: str) -> str:
+        """Generates the HTML for one section for a specific client."""
+        messages = self.build_messages(self.build_section_prompt(section, industry, answers, user_name))
+        return self.complete_section(section, messages)
+
+    def generate_industry_section(self, section: dict, industry: str) -> str:
+        """Generates the HTML for a section that is shared by every client in an industry."""
+        messages = self.build_messages(self.build_industry_section_prompt(section, industry))
+        return self.complete_section(section, messages)
+
+    def complete_section(self, section: dict, messages: List[dict]) -> str:
+        """Completes a section prompt, retrying only this section when its call fails."""
+        attempts = Config.LLM_SECTION_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                content = self.complete(
+                    messages, max_tokens=Config.LLM_SECTION_MAX_TOKENS, stage='llm.section', tier=TIER_SECTION
+                )
+                return self.clean_section_html(content)
+            except (BudgetExceededError, CircuitOpenError):
+                # Retrying cannot help until the budget resets or the breaker closes
+                raise
+            except Exception as e:
+                if attempt == attempts:
+                    raise
+                logger.warning(f"Section '{section['key']}' failed on attempt {attempt}/{attempts}: {e}")
+                time.sleep(0.5 * 2 ** (attempt - 1))
+
+    def build_section_prompt(self, section: dict, industry: str, answer: List[str],
+                             user_name: str) -> str:
+        return f"""
+        ### Instruction:
+As an AI consultant specializing in business and entrepreneurship, you are writing one section of a strategic operational plan for integrating artificial intelligence into the business operations of {user_name} within the {industry} industry.
+
+### Business Overview:
+- **Objectives**: The primary objectives for AI integration are to {answer[0]}.
+- **Current Technology and Data**: The business currently uses {answer[1]}, and AI will need to integrate with these existing systems and data.
+- **Workforce and Training Needs**: The team’s skill level is currently at {answer[2]}, and they will require training to effectively use AI.
+
+### Section: {section['title']}
+{section['instruction'].format(industry=industry)}
+
+Respond with the content of this section only, as HTML paragraphs (<p>) and lists (<ul>, <li>). Do not include the section heading, <html> or <body> tags, or code fences.
+        """
+
+    def build_industry_section_prompt(self, section: dict, industry: str) -> str:
+        return f"""
+        ### Instruction:
+As an AI consultant specializing in business and entrepreneurship, you are writing one section of a strategic operational plan for integrating artificial intelligence into business operations within the {industry} industry. The section is shared by all businesses in this industry, so do not refer to a specific business.
+
+### Section: {section['title']}
+{section['instruction'].format(industry=industry)}
+
+Respond with the content of this section only, as HTML paragraphs (<p>) and lists (<ul>, <li>). Do not include the section heading, <html> or <body> tags, or code fences.
+        """
+
+    def clean_section_html(self, content: str) -> str:
+        """Strips code fences and a leading heading the model may add around a section."""
+        content = CODE_FENCE_PATTERN.sub('', content.strip())
+        return SECTION_HEADING_PATTERN.sub('', content).strip()
+
+    def render_header(self, user_name: str) -> str:
+        return REPORT_HEADER_TEMPLATE.render(user_name=user_name)
+
+    def render_section(self, title: str, content: str) -> str:
+        return REPORT_SECTION_TEMPLATE.render(title=title, content=content)
+
+    def render_report_body(self, user_name: str, sections: List[str]) -> str:
+        """Renders the report <body> from rendered section blocks using the standard layout."""
+        return REPORT_LAYOUT_TEMPLATE.render(
+            header=self.render_header(user_name),
+            sections=sections,
+            year=self.util.get_current_year()
+        )
+
+    def stream_report_content(self, industry: str, answers: List[str],
+                              user_name: str) -> Iterator[str]:
+        """
+        Streams the report from the LLM, yielding the header and each section as
+        soon as its closing tag arrives. The generator's return value is the full
+        styled HTML, the same as generate_report_content would return.
+        """
+        user_name = user_name.capitalize()
+
+        if not self.client:
+            logger.info(
+                'LLM API usage is disabled. Streaming mock report content.')
+            record_fallback('disabled')
+            return (yield from self.stream_mock_report(industry, answers))
+
+        if Config.REPORT_GENERATION_MODE == 'sections':
+            # Sections are generated concurrently and yielded in document order as they finish
+            yield self.render_header(user_name)
+            sections = []
+            futures = self.submit_sections(industry, answers, user_name)
+            for index, (section, future) in enumerate(zip(REPORT_SECTIONS, futures)):
+                try:
+                    content = future.result()
+                except (BudgetExceededError, CircuitOpenError) as e:
+                    # The header is already out, so this and the remaining sections get mock content
+                    reason = 'budget' if isinstance(e, BudgetExceededError) else 'circuit_open'
+                    logger.warning(f"LLM unavailable ({reason}) at section '{section['key']}'. Streaming mock sections.")
+                    record_fallback(reason)
+                    for pending in futures[index:]:
+                        pending.cancel()
+                    for remaining in REPORT_SECTIONS[index:]:
+                        sections.append(self.render_section(
+                            remaining['title'], self.generate_mock_section(remaining, industry)
+                        ))
+                        yield sections[-1]
+                    break
+                except Exception as e:
+                    logger.error(f"Error generating section '{section['key']}': {e}", exc_info=True)
+                    for pending in futures[index:]:
+                        pending.cancel()
+                    return ""
+                sections.append(self.render_section(section['title'], content))
+                yield sections[-1]
+            return self.inject_styles(self.render_report_body(user_name, sections))
+
+        if Config.REPORT_OUTPUT_MODE == 'json':
+            # Partial JSON cannot be rendered, so the sections are yielded once the completion is validated
+            try:
+                sections = self.generate_json_sections(industry, answers, user_name)
+            except BudgetExceededError:
+                logger.warning('Daily LLM budget exceeded. Streaming mock report content.')
+                record_fallback('budget')
+                return (yield from self.stream_mock_report(industry, answers))
+            except CircuitOpenError:
+                logger.warning('LLM circuit breaker is open. Streaming mock report content.')
+                record_fallback('circuit_open')
+                return (yield from self.stream_mock_report(industry, answers))
+            except Exception as e:
+                logger.error(f'Error generating report content: {e}', exc_info=True)
+                return ""
+            yield self.render_header(user_name)
+            yield from sections
+            return self.inject_styles(self.render_report_body(user_name, sections))
+
+        messages = self.build_messages(self.build_prompt(industry, answers), REPORT_PROMPT_PREFIX)
+        cache_key = self.cache.make_key(self.model, messages) if self.cache else None
+        cached_content = self.cache.get(cache_key) if self.cache else None
+
+        if cached_content:
+            logger.info('Streaming report content from the LLM response cache')
+            for match in REPORT_BLOCK_PATTERN.finditer(cached_content):
+                yield self.fill_placeholders(match.group(0), user_name)
+            return self.inject_styles(self.fill_placeholders(self.extract_html(cached_content), user_name))
+
+        if self.budget and self.budget.exceeded():
+            logger.warning('Daily LLM budget exceeded. Streaming mock report content.')
+            record_fallback('budget')
+            return (yield from self.stream_mock_report(industry, answers))
+
+        # A partially streamed report cannot be retried, but the breaker still applies
+        if self.resilience and not self.resilience.breaker.allow_request():
+            logger.warning('LLM circuit breaker is open. Streaming mock report content.')
+            record_fallback('circuit_open')
+            return (yield from self.stream_mock_report(industry, answers))
+
+        logger.debug('Streaming report content with LLM API')
+        extractor = StreamingHTMLExtractor()
+        stream = None
+        endpoint = None
+        stream_usage = None
+        started_at = time.monotonic()
+        try:
+            with track_stage('llm.stream'):
+                endpoint, stream = self.create_completion(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=1500,
+                    stop=[BODY_CLOSE],
+                    stream=True,
+                    stream_options={'include_usage': True})
+
+                for chunk in stream:
+                    # With include_usage the final chunk carries the token usage and no choices
+                    if getattr(chunk, 'usage', None):
+                        stream_usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    for block in extractor.feed(delta):
+                        yield self.fill_placeholders(block, user_name)
+                    if extractor.done:
+                        # Whatever follows </body> would be thrown away, so stop generating it
+                        LLM_EARLY_STOPS.inc()
+                        break
+        except GeneratorExit:
+            # The client went away mid-stream; that says nothing about the provider's health
+            if self.resilience:
+                self.resilience.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            if self.resilience:
+                if is_retryable(e):
+                    self.resilience.breaker.record_failure()
+                else:
+                    self.resilience.breaker.record_cancelled()
+            raise
+        finally:
+            # Closing the stream drops the connection, which cancels the generation upstream
+            if stream is not None:
+                if hasattr(stream, 'close'):
+                    stream.close()
+                self.record_usage(
+                    stream_usage, 'llm.stream', time.monotonic() - started_at, messages, extractor.text, endpoint
+                )
+        if self.resilience:
+            self.resilience.breaker.record_success()
+
+        discarded_tokens = extractor.discarded_chars // CHARS_PER_TOKEN
+        LLM_DISCARDED_TOKENS.inc(discarded_tokens)
+        logger.info(
+            f'Report content streamed in {time.monotonic() - started_at:.2f}s, '
+            f'~{discarded_tokens} tokens discarded outside the body'
+        )
+
+        html_body_content = extractor.finish()
+        if html_body_content is None:
+            logger.error("HTML content not found in the response")
+            return self.inject_styles(self.fill_placeholders(extractor.text, user_name))
+        if self.cache:
+            self.cache.set(cache_key, html_body_content)
+        return self.inject_styles(self.fill_placeholders(html_body_content, user_name))
+
+    def stream_mock_report(self, industry: str, answers: List[str]) -> Iterator[str]:
+        """Yields the blocks of the mock report and returns the full mock report."""
+        mock_report = self.generate_mock_report(industry, answers)
+        for match in REPORT_BLOCK_PATTERN.finditer(mock_report):
+            yield match.group(0)
+        return mock_report
+
+    def build_messages(self, prompt: str, system_prompt: str = DEFAULT_SYSTEM_PROMPT) -> List[dict]:
+        """
+        Builds the chat messages sent to the LLM. Static instructions belong in the
+        system prompt so that it forms a byte-identical prefix the provider can cache.
+        """
+        return [{
+            "role": "system",
+            "content": system_prompt
+        }, {
+            "role": "user",
+            "content": prompt
+        }]
+
     def inject_styles(self, html_content: str) -> str:
         """Injects CSS styles and user's name into the HTML content."""
         styles = """
@@ -194,135 +859,42 @@ footer p {
         </body></html>
         """
 
-    def build_prompt(self, industry: str, answer: List[str],
-                     user_name) -> str:
-        return f"""
-        ### Instruction:
-As an AI consultant specializing in business and entrepreneurship, your task is to develop a strategic operational plan for integrating artificial intelligence into the user's business operations within the {industry} industry.
+    def build_prompt(self, industry: str, answer: List[str]) -> str:
+        """Builds the per-request part of the report prompt, sent after the static REPORT_PROMPT_PREFIX."""
+        return f"""### Client Industry: {industry}
 
 ### Business Overview:
 - **Objectives**: The primary objectives for AI integration are to {answer[0]}.
 - **Current Technology and Data**: The business currently uses {answer[1]}, and AI will need to integrate with these existing systems and data.
 - **Workforce and Training Needs**: The team’s skill level is currently at {answer[2]}, and they will require training to effectively use AI.
+"""
 
-### Industry Trends:
-- **Current Trends in {industry}**: Identify and analyze the latest trends in the {industry} industry that may impact or benefit from AI integration.
-- **Opportunities**: Suggest ways in which AI can be used to capitalize on these trends, helping the business stay ahead of the competition.
-
-### Requirements:
-1. **Technology Integration**:
-   - **Integration Steps**: Detail the steps for integrating AI technologies into existing business processes, considering the current technology stack.
-   - **System Compatibility**: Evaluate the compatibility of AI tools with existing systems.
-   - **Scalability**: Provide recommendations on how to scale AI solutions as the business grows.
-
-2. **Workforce Training**:
-   - **Training Plan**: Outline a comprehensive training plan based on the team’s current skill level and the specific needs identified.
-   - **Skill Development**: Recommend areas for skill development to maximize the effectiveness of AI integration.
-   - **Continuous Learning**: Suggest methods for ongoing training to keep the workforce up-to-date with AI advancements.
-
-3. **Data Management**:
-   - **Data Strategy**: Describe the strategies for managing and utilizing the data available to support AI implementation.
-   - **Data Security**: Include considerations for data privacy and security, especially in relation to AI processing.
-   - **Compliance**: Ensure that data management practices comply with relevant industry regulations.
-
-4. **Risk and Challenges**:
-   - **Risk Identification**: Identify potential risks and challenges that could arise during AI integration.
-   - **Preventative Measures**: Propose preventative measures to mitigate these risks.
-   - **Contingency Plans**: Develop contingency plans in case these challenges materialize.
-
-### Output Structure:
-- **Executive Summary**: Provide a brief overview of the operational plan.
-- **Industry Trends**: Analysis of current trends in {industry} and AI-driven opportunities.
-- **Technology Integration**: Detailed steps for integrating AI, system compatibility, and scalability.
-- **Workforce Training**: Comprehensive training plan, skill development, and continuous learning strategies.
-- **Data Management**: Data strategies, security considerations, and compliance measures.
-- **Risk and Challenges**: Identification, preventative measures, and contingency plans.
-- **Additional Recommendations**: Offer extra insights or suggest emerging technologies that might be relevant to the business.
-- **Conclusion**: Summarize the expected impact of AI integration on business operations.
-
-
-        Ensure the report is structured professionally, with clear headings and well-organized content. 
-
-        The report should be in the following format embedded in HTML code with the brackets filled in with the appropriate content:
-
-        ## Format
-        ```
-        <body>
-    <header>
-        <div class="header-content">
-            <p><a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a></p>
-            <h1>AI Insights Report</h1>
-            <p class="sub-title">Prepared for</p>
-            <h3>{ user_name }</h3>
-        </div>
-    </header>
-
-    <div class="container">
-        <section>
-            <h2>Introduction</h2>
-            <p>{{ executive_summary }}</p>
-        </section>
-
-        <section>
-            <h2>Industry Trends</h2>
-            <p>{{ industry_trends }}</p>
-        </section>
+    def build_json_prompt(self, industry: str, answer: List[str]) -> str:
+        """Builds the per-request part of the JSON report prompt, sent after JSON_REPORT_PROMPT_PREFIX."""
+        return self.build_prompt(industry, answer)
 
-        <section>
-            <h2>Technology Integration</h2>
-            <p>{{ technology_integration }}</p>
-        </section>
-
-        <section>
-            <h2>Workforce Training</h2>
-            <p>{{ workforce_training }}</p>
-        </section>
-
-        <section>
-            <h2>Data Management</h2>
-            <p>{{ data_management }}</p>
-        </section>
-
-        <section>
-            <h2>Risk & Challenges</h2>
-            <p>{{ risk_And_challenges }}</p>
-        </section>
-
-        <section>
-            <h2>Additional Recommendations</h2>
-            <p>{{ additional_recommendations }}</p>
-        </section>
-
-        <section>
-            <h2>Conclusion</h2>
-            <p>{{ conclusion }}</p>
-        </section>
-
-        <section class="cta">
-            <h2>Ready to Implement AI in Your Business?</h2>
-            <p>Contact <a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a> for expert guidance on how AI can transform your business. Let us help you stay ahead of the competition with cutting-edge AI solutions.</p>
-            <a href="https://dmotts.github.io/portfolio/" class="cta-btn">Learn More</a>
-        </section>
-    </div>
-
-    <footer>
-        <p><a href="https://dmotts.github.io/portfolio/">Daley Mottley AI Consulting</a> | All Rights Reserved &copy; { self.util.get_current_year() }</p>
-    </footer>
-</body>
-        ```       
-        """
+    def fill_placeholders(self, html_content: str, user_name: str) -> str:
+        """Substitutes the client name and year for the placeholders the prompt asks the model to keep."""
+        return html_content.replace(USER_NAME_PLACEHOLDER, str(escape(user_name))).replace(
+            YEAR_PLACEHOLDER, str(self.util.get_current_year())
+        )
 
     def extract_html(self, content: str) -> str:
         """
-        Extracts HTML content from the LLM response.
-        Assumes the content is wrapped in a ```html block.
+        Extracts HTML content from the LLM response, ignoring any code fence or
+        prose around it. A missing </body> (the stop sequence) is added back.
         """
-        start = content.find("<body>")
-        end = content.find("</body>") + len("</body>")
-        if start == -1 or end == -1:
+        extractor = StreamingHTMLExtractor()
+        extractor.feed(content)
+        html_content = extractor.finish()
+        if html_content is None:
             logger.error("HTML content not found in the response")
             return content  # Fallback to returning the whole content
-        return content[start:end]
+        return html_content
+
+    def generate_mock_section(self, section: dict, industry: str) -> str:
+        """Generates mock content for one section when the LLM is unavailable."""
+        return f"<p>Mock {section['title'].lower()} for the {industry} industry.</p>"
 
     def generate_mock_report(self, industry: str, answers: List[str]) -> str:
         """Generates a mock report for testing without using the LLM API."""
@@ -0,0 +1,227 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from prometheus_client import Counter, Gauge
+
+STORAGE_BYTES = Gauge('report_storage_bytes', 'Bytes used by stored reports, counting linked files once',
+                      multiprocess_mode='livemax')
+STORAGE_FILES = Gauge('report_storage_files', 'Files in report storage by kind', ['kind'], multiprocess_mode='livemax')
+STORAGE_EVICTIONS = Counter('report_storage_evictions_total', 'Files removed by the retention sweeper', ['kind', 'reason'])
+STORAGE_SWEEP_DURATION = Gauge('report_storage_last_sweep_seconds', 'Duration of the last retention sweep',
+                               multiprocess_mode='livemax')
+
+KIND_REPORT = 'report'
+KIND_BLOB = 'blob'
+KIND_PENDING = 'pending'
+
+BLOBS_DIR_NAME = 'blobs'
+PENDING_DIR_NAME = 'pending'
+SWEEP_LOCK_NAME = '.sweep.lock'
+# A stored PDF is linked to its report right after it is written; leave new ones alone
+ORPHAN_GRACE_SECONDS = 300
+
+
+def atomic_write(path: str, data: bytes):
+    """Writes data to a unique temp file next to path and renames it into place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class ReportStorage:
+    """
+    Stores report files under two levels of hash-sharded subdirectories
+    (reports/ab/cd/report-...pdf) so that no directory grows to tens of thousands
+    of entries. Stored PDFs and pending HTML get their own sharded trees. A
+    background sweeper removes files not accessed within `max_age` seconds and
+    then the least recently accessed ones until the total is under `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_age: int = 0, max_bytes: int = 0, sweep_interval: int = 3600,
+                 blob_dir: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.root = root
+        self.blob_dir = blob_dir or os.path.join(root, BLOBS_DIR_NAME)
+        self.pending_dir = os.path.join(root, PENDING_DIR_NAME)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._sweeper = None
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def shard(name: str, levels: int = 2) -> list:
+        digest = hashlib.sha256(name.encode('utf-8')).hexdigest()
+        return [digest[index * 2:index * 2 + 2] for index in range(levels)]
+
+    def path_for(self, filename: str) -> str:
+        """
+        Returns the path of a report file. Files written before sharding was
+        introduced are still found at the top level of the root.
+        """
+        legacy_path = os.path.join(self.root, filename)
+        if os.path.isfile(legacy_path):
+            return legacy_path
+        return os.path.join(self.root, *self.shard(filename), filename)
+
+    def relative_path(self, path: str) -> str:
+        return os.path.relpath(path, self.root)
+
+    def blob_path(self, key: str) -> str:
+        """Returns where the stored PDF with this content hash lives."""
+        return os.path.join(self.blob_dir, key[:2], f'{key}.pdf')
+
+    def pending_path(self, filename: str) -> str:
+        """Returns where the HTML of a lazily rendered report waits for its first download."""
+        return os.path.join(self.pending_dir, self.shard(filename, levels=1)[0], f'{filename}.html')
+
+    @staticmethod
+    def touch(path: str):
+        """Records an access for LRU retention without relying on the filesystem's atime settings."""
+        try:
+            stat = os.stat(path)
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        except OSError:
+            pass
+
+    @staticmethod
+    def link_count(path: str) -> int:
+        try:
+            return os.stat(path).st_nlink
+        except FileNotFoundError:
+            return 0
+
+    def start_sweeper(self):
+        """Runs sweep in a background thread now and then once per sweep interval."""
+        if self._sweeper or not (self.max_age or self.max_bytes):
+            return
+
+        def sweep_loop():
+            while True:
+                try:
+                    self.sweep()
+                except Exception as e:
+                    self.logger.error(f"Report storage sweep failed: {e}", exc_info=True)
+                time.sleep(self.sweep_interval)
+
+        self._sweeper = threading.Thread(target=sweep_loop, name='report-storage-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def scan(self) -> list:
+        """Returns (kind, path, stat) for every stored file."""
+        entries = []
+        blob_root = os.path.abspath(self.blob_dir)
+        pending_root = os.path.abspath(self.pending_dir)
+        roots = [self.root] + ([self.blob_dir] if not blob_root.startswith(os.path.abspath(self.root)) else [])
+        for root in roots:
+            for directory, _, names in os.walk(root):
+                absolute = os.path.abspath(directory)
+                if absolute.startswith(blob_root):
+                    kind = KIND_BLOB
+                elif absolute.startswith(pending_root):
+                    kind = KIND_PENDING
+                else:
+                    kind = KIND_REPORT
+                for name in names:
+                    if name.endswith(('.tmp', '.lock')):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        entries.append((kind, path, os.stat(path)))
+                    except FileNotFoundError:
+                        continue
+        return entries
+
+    def sweep(self) -> dict:
+        """
+        Applies the retention policies once and publishes storage metrics. Only one
+        process sweeps at a time. Returns the number of files removed by reason.
+        """
+        removed = {'age': 0, 'size': 0, 'orphan': 0}
+        with open(os.path.join(self.root, SWEEP_LOCK_NAME), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return removed
+            try:
+                started_at = time.monotonic()
+                self._sweep(removed)
+                STORAGE_SWEEP_DURATION.set(time.monotonic() - started_at)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        if any(removed.values()):
+            self.logger.info(f"Report storage sweep removed {removed}")
+        return removed
+
+    def _sweep(self, removed: dict):
+        entries = self.scan()
+        now = time.time()
+
+        def remove(kind, path, reason):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            removed[reason] += 1
+            STORAGE_EVICTIONS.labels(kind, reason).inc()
+
+        # Age policy: reports and pending HTML that nobody opened within max_age
+        kept = []
+        for kind, path, stat in entries:
+            if kind != KIND_BLOB and self.max_age and now - stat.st_atime > self.max_age:
+                remove(kind, path, 'age')
+            else:
+                kept.append((kind, path, stat))
+
+        # Stored PDFs no report links to any more; a blob with a single link is only in the store
+        entries = []
+        for kind, path, stat in kept:
+            if kind == KIND_BLOB and self.link_count(path) <= 1 and now - stat.st_mtime > ORPHAN_GRACE_SECONDS:
+                remove(kind, path, 'orphan')
+            else:
+                entries.append((kind, path, stat))
+
+        # Size policy: evict the least recently accessed reports until the total fits.
+        # Hard-linked files share one inode, so its bytes are freed with its last link.
+        links = {}
+        sizes = {}
+        for kind, path, stat in entries:
+            inode = (stat.st_dev, stat.st_ino)
+            links.setdefault(inode, []).append((kind, path))
+            sizes[inode] = stat.st_size
+        total = sum(sizes.values())
+        if self.max_bytes and total > self.max_bytes:
+            candidates = sorted((stat.st_atime, kind, path, (stat.st_dev, stat.st_ino))
+                                for kind, path, stat in entries if kind != KIND_BLOB)
+            for _, kind, path, inode in candidates:
+                if total <= self.max_bytes:
+                    break
+                remove(kind, path, 'size')
+                links[inode].remove((kind, path))
+                remaining = links[inode]
+                if remaining and all(link_kind == KIND_BLOB for link_kind, _ in remaining):
+                    for blob_kind, blob_path in remaining:
+                        remove(blob_kind, blob_path, 'orphan')
+                    remaining.clear()
+                if not remaining:
+                    total -= sizes.pop(inode)
+
+        counts = {KIND_REPORT: 0, KIND_BLOB: 0, KIND_PENDING: 0}
+        for inode, inode_links in links.items():
+            for kind, _ in inode_links:
+                counts[kind] += 1
+        for kind, count in counts.items():
+            STORAGE_FILES.labels(kind).set(count)
+        STORAGE_BYTES.set(sum(sizes.values()))
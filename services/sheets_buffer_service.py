@@ -0,0 +1,154 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from prometheus_client import Counter, Gauge
+
+SHEETS_BUFFERED_ROWS = Gauge('sheets_buffered_rows', 'Rows waiting in memory for the next Sheets append',
+                             multiprocess_mode='livesum')
+SHEETS_ROWS = Counter('sheets_rows_total', 'Rows flushed to Google Sheets by outcome', ['outcome'])
+SHEETS_FLUSHES = Counter('sheets_flushes_total', 'Batched Google Sheets appends by outcome', ['outcome'])
+
+
+class SheetsRowBuffer:
+    """
+    Write-behind buffer for Google Sheets rows. Records are collected in memory and
+    sent by a background thread in a single `write_records(records)` call once
+    `max_rows` are waiting or the oldest has waited `max_age` seconds. When the write
+    fails the records are appended to `spill_path` and sent ahead of new ones on the
+    next flush, by whichever process flushes first.
+    """
+
+    def __init__(self, write_records, max_rows: int = 50, max_age: float = 5.0, spill_path: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.write_records = write_records
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.spill_path = spill_path
+        self._records = []
+        self._oldest = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def add(self, record: dict):
+        """Queues a record for the next flush."""
+        with self._cond:
+            self._records.append(dict(record))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            SHEETS_BUFFERED_ROWS.inc()
+            if len(self._records) >= self.max_rows:
+                self._cond.notify()
+            closed = self._closed
+        if closed:
+            self.flush()
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name='sheets-row-buffer', daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 30):
+        """Stops the background thread and flushes whatever is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _due(self) -> bool:
+        return bool(self._records) and (
+            len(self._records) >= self.max_rows or time.monotonic() - self._oldest >= self.max_age
+        )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and not self._due():
+                    wait = self.max_age - (time.monotonic() - self._oldest) if self._records else self.max_age
+                    self._cond.wait(max(wait, 0))
+                if self._closed:
+                    return
+                due = self._due()
+            # Spilled rows are retried every max_age seconds even when nothing new arrives
+            if due or self._has_spill():
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.logger.error(f"Error flushing rows to Google Sheets: {e}", exc_info=True)
+
+    def _has_spill(self) -> bool:
+        return bool(self.spill_path) and os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) > 0
+
+    def flush(self) -> int:
+        """Writes spilled and buffered records in one call. Returns how many were written."""
+        with self._flush_lock:
+            with self._cond:
+                records, self._records, self._oldest = self._records, [], None
+            SHEETS_BUFFERED_ROWS.dec(len(records))
+            if not self.spill_path:
+                return self._write(records, [])
+
+            # The lock keeps another process from sending the same spilled rows
+            with open(self.spill_path, 'a+', encoding='utf-8') as spill:
+                fcntl.flock(spill, fcntl.LOCK_EX)
+                try:
+                    spill.seek(0)
+                    spilled = self._read_spill(spill)
+                    written = self._write(spilled + records, spilled, spill)
+                finally:
+                    fcntl.flock(spill, fcntl.LOCK_UN)
+            return written
+
+    def _write(self, records: list, spilled: list, spill=None) -> int:
+        if not records:
+            return 0
+        try:
+            self.write_records(records)
+        except Exception as e:
+            SHEETS_FLUSHES.labels('error').inc()
+            if spill is None:
+                # Without a spill file the rows stay in memory for the next flush
+                with self._cond:
+                    self._records[:0] = records
+                    if self._oldest is None:
+                        self._oldest = time.monotonic()
+                SHEETS_BUFFERED_ROWS.inc(len(records))
+                self.logger.error(f"Error writing {len(records)} rows to Google Sheets, keeping them buffered: {e}")
+                return 0
+            unsaved = records[len(spilled):]
+            spill.seek(0, os.SEEK_END)
+            for record in unsaved:
+                spill.write(json.dumps(record, default=str) + '\n')
+            spill.flush()
+            os.fsync(spill.fileno())
+            SHEETS_ROWS.labels('spilled').inc(len(unsaved))
+            self.logger.error(f"Error writing {len(records)} rows to Google Sheets, spilled to {self.spill_path}: {e}")
+            return 0
+
+        if spill is not None and spilled:
+            spill.truncate(0)
+        SHEETS_FLUSHES.labels('success').inc()
+        SHEETS_ROWS.labels('written').inc(len(records))
+        self.logger.info(f"Wrote {len(records)} rows to Google Sheets ({len(spilled)} from the spill file)")
+        return len(records)
+
+    def _read_spill(self, spill) -> list:
+        records = []
+        for line in spill:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line cut short by a crash mid-write
+                self.logger.warning(f"Skipping unreadable line in {self.spill_path}")
+        return records
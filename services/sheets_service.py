@@ -1,16 +1,40 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import json
+import logging
+import os
+import threading
+import google_auth_httplib2
+import httplib2
+from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import HttpRequest, MediaFileUpload
 from config import Config
-import logging
+from services.metrics_service import track_stage
+from services.report_storage import atomic_write
+
+# Sheet columns for report rows, in the order used when the sheet has no header yet
+REPORT_COLUMNS = ['report_id', 'client_name', 'client_email', 'industry', 'pdf_url', 'doc_url', 'created_at']
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/documents"
+]
 
 class SheetsService:
+    """
+    Google Sheets, Docs and Drive access. Construction does no network I/O: the API
+    clients are built from the discovery documents bundled with google-api-python-client,
+    and the spreadsheet and Drive folder IDs are looked up on first use and cached in
+    GOOGLE_ID_CACHE_PATH. All clients share one set of credentials. httplib2
+    connections are not thread-safe, so every thread gets its own pooled connection.
+    """
 
-    def __init__(self, credentials_json, sheet_name):
-        self.sheet = None  # Initialize the sheet attribute
-        self.folder_id = None  # Initialize the folder_id attribute
+    def __init__(self, credentials, sheet_name):
+        self.sheet_name = sheet_name
+        self._ids = {}
+        self._ids_lock = threading.Lock()
+        self._header = None
 
         if not Config.ENABLE_SHEETS_SERVICE:
             logging.info('Sheets service is disabled.')
@@ -18,46 +42,108 @@ class SheetsService:
 
         self.logger = logging.getLogger(__name__)
 
-        self.scope = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-            "https://www.googleapis.com/auth/documents"
-        ]
-        self.creds = ServiceAccountCredentials.from_json_keyfile_name(
-            credentials_json, self.scope)
-        self.client = gspread.authorize(self.creds)
-        self.drive_service = build('drive', 'v3', credentials=self.creds)
-        self.docs_service = build('docs', 'v1', credentials=self.creds)
-        self.sheets_service = build('sheets', 'v4', credentials=self.creds)
-        self.sheet = self._get_or_create_sheet(sheet_name)
-        self.folder_id = self._get_or_create_folder(Config.GOOGLE_DRIVE_FOLDER_NAME)
+        # Accepts the parsed service account JSON (Config.GOOGLE_SHEETS_CREDENTIALS) or a key file path
+        if isinstance(credentials, dict):
+            self.creds = service_account.Credentials.from_service_account_info(credentials, scopes=SCOPES)
+        else:
+            self.creds = service_account.Credentials.from_service_account_file(credentials, scopes=SCOPES)
+        self._local = threading.local()
+        self.drive_service = self._build('drive', 'v3')
+        self.docs_service = self._build('docs', 'v1')
+        self.sheets_service = self._build('sheets', 'v4')
+
+    def _http(self):
+        """Returns this thread's authorized connection, which keeps its sockets open between requests."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http(timeout=Config.GOOGLE_HTTP_TIMEOUT))
+            self._local.http = http
+        return http
+
+    def _build(self, service_name, version):
+        def request_builder(http, *args, **kwargs):
+            # Requests run on the connection of the thread that creates them, not one shared by all
+            return HttpRequest(self._http(), *args, **kwargs)
+
+        return build(
+            service_name, version, http=self._http(), requestBuilder=request_builder,
+            static_discovery=True, cache_discovery=False
+        )
+
+    @property
+    def spreadsheet_id(self):
+        return self._resolve_id('spreadsheet', self.sheet_name, self._get_or_create_sheet)
+
+    @property
+    def folder_id(self):
+        return self._resolve_id('folder', Config.GOOGLE_DRIVE_FOLDER_NAME, self._get_or_create_folder)
+
+    def _resolve_id(self, kind, name, lookup):
+        """Returns the ID for a named spreadsheet or folder from memory, the disk cache or Google."""
+        key = f'{kind}:{name}'
+        if key in self._ids:
+            return self._ids[key]
+        with self._ids_lock:
+            if key not in self._ids:
+                cached = self._read_id_cache()
+                # IDs belong to the service account that created or found them
+                account_ids = cached.get(self.creds.service_account_email, {})
+                if key not in account_ids:
+                    account_ids[key] = lookup(name)
+                    cached[self.creds.service_account_email] = account_ids
+                    self._write_id_cache(cached)
+                self._ids[key] = account_ids[key]
+        return self._ids[key]
+
+    def _read_id_cache(self):
+        try:
+            with open(Config.GOOGLE_ID_CACHE_PATH, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f'Ignoring unreadable Google ID cache {Config.GOOGLE_ID_CACHE_PATH}: {e}')
+            return {}
+
+    def _write_id_cache(self, cached):
+        try:
+            atomic_write(os.path.abspath(Config.GOOGLE_ID_CACHE_PATH), json.dumps(cached, indent=2).encode('utf-8'))
+        except OSError as e:
+            self.logger.warning(f'Could not write Google ID cache {Config.GOOGLE_ID_CACHE_PATH}: {e}')
 
     def _get_or_create_sheet(self, sheet_name):
         try:
-            # Try to open the existing sheet by name
-            sheet = self.client.open(sheet_name).sheet1
-            self.logger.info(f'Using existing sheet: {sheet_name}')
-            return sheet
-        except gspread.SpreadsheetNotFound:
-            self.logger.info(f'Sheet "{sheet_name}" not found. Creating a new sheet.')
-            try:
-                spreadsheet = {"properties": {"title": sheet_name}}
-                spreadsheet = self.sheets_service.spreadsheets().create(
-                    body=spreadsheet, fields="spreadsheetId"
+            # Try to find the existing sheet by name
+            with track_stage('sheets.find_sheet'):
+                response = self.drive_service.files().list(
+                    q=f"name='{sheet_name}' and mimeType='application/vnd.google-apps.spreadsheet' and trashed=false",
+                    spaces='drive',
+                    fields='files(id)'
                 ).execute()
-                sheet_id = spreadsheet.get("spreadsheetId")
-                self.logger.info(f'Created new sheet: {sheet_name}, ID: {sheet_id}')
-                return self.client.open_by_key(sheet_id).sheet1  # Open the newly created sheet
-            except HttpError as e:
-                self.logger.error(f'Error creating Google Sheet: {e}')
-                raise
+            if response.get('files'):
+                self.logger.info(f'Using existing sheet: {sheet_name}')
+                return response['files'][0]['id']
+
+            self.logger.info(f'Sheet "{sheet_name}" not found. Creating a new sheet.')
+            spreadsheet = {"properties": {"title": sheet_name}}
+            spreadsheet = self.sheets_service.spreadsheets().create(
+                body=spreadsheet, fields="spreadsheetId"
+            ).execute()
+            sheet_id = spreadsheet.get("spreadsheetId")
+            self.logger.info(f'Created new sheet: {sheet_name}, ID: {sheet_id}')
+            return sheet_id
+        except HttpError as e:
+            self.logger.error(f'Error finding or creating Google Sheet: {e}')
+            raise
 
     def _get_or_create_folder(self, folder_name):
         try:
-            response = self.drive_service.files().list(
-                q=f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false",
-                spaces='drive'
-            ).execute()
+            with track_stage('drive.find_folder'):
+                response = self.drive_service.files().list(
+                    q=f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false",
+                    spaces='drive',
+                    fields='files(id)'
+                ).execute()
 
             if len(response.get('files', [])) > 0:
                 self.logger.info(f'Using existing folder: {folder_name}')
@@ -76,30 +162,87 @@ class SheetsService:
             self.logger.error(f'An error occurred while accessing Google Drive: {error}')
             raise
 
+    @staticmethod
+    def drive_file_url(file_id):
+        return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
+
+    def upload_pdf_resumable(self, file_path, file_name, resumable_uri=None, on_chunk=None):
+        """
+        Uploads a PDF to the Drive folder in chunks of DRIVE_UPLOAD_CHUNK_SIZE through a
+        resumable upload session. Passing the session URI of an interrupted upload
+        continues it from the last byte Drive received. `on_chunk(resumable_uri, bytes_sent)`
+        is called after every chunk. Returns the Drive file ID.
+        """
+        file_metadata = {
+            'name': file_name,
+            'parents': [self.folder_id],
+            'mimeType': 'application/pdf'
+        }
+        media = MediaFileUpload(
+            file_path, mimetype='application/pdf', chunksize=Config.DRIVE_UPLOAD_CHUNK_SIZE, resumable=True
+        )
+        request = self.drive_service.files().create(body=file_metadata, media_body=media, fields='id')
+        if resumable_uri:
+            # Ask Drive how many bytes the session already holds and continue from there
+            resp, content = request.http.request(
+                resumable_uri, method='PUT', headers={'Content-Length': '0', 'Content-Range': f'bytes */{media.size()}'}
+            )
+            if resp.status in (200, 201):
+                return json.loads(content)['id']
+            if resp.status != 308:
+                raise HttpError(resp, content, uri=resumable_uri)
+            # The range header reads "bytes=0-N"; without one Drive has not received anything yet
+            request.resumable_uri = resumable_uri
+            request.resumable_progress = int(resp['range'].rsplit('-', 1)[1]) + 1 if 'range' in resp else 0
+
+        response = None
+        while response is None:
+            status, response = request.next_chunk(num_retries=3)
+            if status and on_chunk:
+                on_chunk(request.resumable_uri, status.resumable_progress)
+        return response['id']
+
+    def grant_public_read(self, file_ids):
+        """
+        Makes the files readable by anyone with the link, sending all grants in one
+        request to the Drive batch endpoint. Returns the IDs whose grant failed.
+        """
+        failed = []
+
+        def on_response(request_id, response, exception):
+            if exception:
+                self.logger.error(f'Error granting access to Drive file {request_id}: {exception}')
+                failed.append(request_id)
+
+        batch = self.drive_service.new_batch_http_request(callback=on_response)
+        for file_id in file_ids:
+            batch.add(
+                self.drive_service.permissions().create(
+                    fileId=file_id,
+                    body={
+                        'type': 'anyone',
+                        'role': 'reader'
+                    },
+                    fields='id'
+                ),
+                request_id=file_id
+            )
+        with track_stage('drive.grant_permissions'):
+            batch.execute()
+        return failed
+
     def save_pdf_to_drive(self, file_path, file_name):
-        if not Config.ENABLE_SHEETS_SERVICE or not self.folder_id:
-            logging.info('Sheets service is disabled or folder ID is missing. Skipping PDF saving to Drive.')
+        if not Config.ENABLE_SHEETS_SERVICE:
+            logging.info('Sheets service is disabled. Skipping PDF saving to Drive.')
             return None
 
         try:
-            file_metadata = {
-                'name': file_name,
-                'parents': [self.folder_id],
-                'mimeType': 'application/pdf'
-            }
-            media = MediaFileUpload(file_path, mimetype='application/pdf')
-            file = self.drive_service.files().create(body=file_metadata, media_body=media, fields='id').execute()
-            file_id = file.get('id')
-            pdf_url = f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
-
-            # Make the PDF publicly accessible
-            self.drive_service.permissions().create(
-                fileId=file_id,
-                body={
-                    'type': 'anyone',
-                    'role': 'reader'
-                }
-            ).execute()
+            with track_stage('drive.upload_pdf'):
+                file_id = self.upload_pdf_resumable(file_path, file_name)
+                # Make the PDF publicly accessible
+                if self.grant_public_read([file_id]):
+                    return None
+            pdf_url = self.drive_file_url(file_id)
 
             self.logger.info(f'PDF saved to Google Drive: {pdf_url}')
             return pdf_url
@@ -114,32 +257,33 @@ class SheetsService:
 
         self.logger.debug('Creating Google Doc for the report')
         try:
-            # Create the Google Doc
-            doc_title = f"AI Insights Report - {report_id}"
-            body = {'title': doc_title}
-            doc = self.docs_service.documents().create(body=body).execute()
-
-            # Insert content into the document
-            requests = [{
-                'insertText': {
-                    'location': {
-                        'index': 1
-                    },
-                    'text': content
-                }
-            }]
-            self.docs_service.documents().batchUpdate(
-                documentId=doc.get('documentId'), body={'requests': requests}
-            ).execute()
+            with track_stage('sheets.create_doc'):
+                # Create the Google Doc
+                doc_title = f"AI Insights Report - {report_id}"
+                body = {'title': doc_title}
+                doc = self.docs_service.documents().create(body=body).execute()
 
-            # Make the document publicly accessible
-            self.drive_service.permissions().create(
-                fileId=doc.get('documentId'),
-                body={
-                    'type': 'anyone',
-                    'role': 'reader'
-                }
-            ).execute()
+                # Insert content into the document
+                requests = [{
+                    'insertText': {
+                        'location': {
+                            'index': 1
+                        },
+                        'text': content
+                    }
+                }]
+                self.docs_service.documents().batchUpdate(
+                    documentId=doc.get('documentId'), body={'requests': requests}
+                ).execute()
+
+                # Make the document publicly accessible
+                self.drive_service.permissions().create(
+                    fileId=doc.get('documentId'),
+                    body={
+                        'type': 'anyone',
+                        'role': 'reader'
+                    }
+                ).execute()
 
             doc_url = f"https://docs.google.com/document/d/{doc.get('documentId')}/edit"
             self.logger.info(f'Document created successfully: {doc_url}')
@@ -148,29 +292,66 @@ class SheetsService:
             self.logger.error(f'Error creating Google Doc: {e}')
             return None
 
+    def get_header(self):
+        """
+        Returns the column names in the sheet's first row, writing REPORT_COLUMNS
+        there when the sheet is empty. Cached after the first call.
+        """
+        if self._header:
+            return self._header
+        spreadsheet_id = self.spreadsheet_id
+        with track_stage('sheets.read_header'):
+            result = self.sheets_service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id, range='1:1'
+            ).execute()
+        header = (result.get('values') or [[]])[0]
+        if not header:
+            with track_stage('sheets.write_header'):
+                self.sheets_service.spreadsheets().values().update(
+                    spreadsheetId=spreadsheet_id,
+                    range='A1',
+                    valueInputOption='RAW',
+                    body={'values': [REPORT_COLUMNS]}
+                ).execute()
+            header = REPORT_COLUMNS
+        elif not set(header) & set(REPORT_COLUMNS):
+            # Rows written before the header existed start at row 1 in REPORT_COLUMNS order
+            self.logger.warning('The first sheet row is not a header; writing columns in the default order')
+            header = REPORT_COLUMNS
+        self._header = list(header)
+        return self._header
+
+    def append_records(self, records):
+        """
+        Appends the records as rows in one request, placing each value under the
+        header column of the same name. Raises on failure.
+        """
+        header = self.get_header()
+        values = [['' if record.get(column) is None else record.get(column) for column in header]
+                  for record in records]
+        with track_stage('sheets.append_rows'):
+            result = self.sheets_service.spreadsheets().values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range="A1",
+                valueInputOption="USER_ENTERED",
+                insertDataOption="INSERT_ROWS",
+                body={"values": values}
+            ).execute()
+        self.logger.info(f"{result.get('updates', {}).get('updatedCells')} cells updated in Google Sheets.")
+        return result
+
     def write_data(self, data: dict):
+        """Appends one report row to the sheet. Returns whether the write succeeded."""
         if not Config.ENABLE_SHEETS_SERVICE:
             logging.info('Sheets service is disabled. Skipping data write to Google Sheets.')
-            return
+            return False
 
         try:
             # Write to Google Sheets
-            if self.sheet and self.sheet.id:
-                range_name = "A1"
-                values = [list(data.values())]
-                body = {"values": values}
-
-                result = self.sheets_service.spreadsheets().values().append(
-                    spreadsheetId=self.sheet.id,
-                    range=range_name,
-                    valueInputOption="USER_ENTERED",
-                    insertDataOption="INSERT_ROWS",
-                    body=body
-                ).execute()
-
-                self.logger.info(f"{result.get('updates').get('updatedCells')} cells updated in Google Sheets.")
-
+            self.append_records([data])
+            return True
         except HttpError as error:
             self.logger.error(f'An error occurred while writing data to Google Sheets: {error}')
         except Exception as e:
             self.logger.error(f'Error writing data: {e}')
+        return False
@@ -0,0 +1,182 @@
+import logging
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import lru_cache
+from prometheus_client import Counter, Gauge, Histogram
+from config import Config
+from services.industries import load_industries
+
+LLM_TOKENS = Counter('llm_tokens_total', 'LLM tokens used by model, industry and kind', ['model', 'industry', 'kind'])
+LLM_COST = Counter('llm_cost_usd_total', 'Estimated LLM spend in USD by model and industry', ['model', 'industry'])
+LLM_CALL_LATENCY = Histogram(
+    'llm_call_latency_seconds', 'LLM call latency by model', ['model'],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+LLM_DAILY_SPEND = Gauge('llm_daily_spend_usd', 'Estimated LLM spend so far today in USD', multiprocess_mode='livemax')
+
+# Label used for calls made outside a report, such as precomputing shared content
+NO_INDUSTRY = 'none'
+# Label for industries outside the form's dropdown, which keeps free-text input from creating new series
+OTHER_INDUSTRY = 'other'
+
+_current_usage = ContextVar('report_usage', default=None)
+
+
+class BudgetExceededError(Exception):
+    """Raised instead of calling the LLM once the daily budget has been spent."""
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0,
+                  prices: dict = None) -> float:
+    """Estimates the USD cost of a call from the given prices or LLM_MODEL_PRICES; unknown models cost 0."""
+    prices = prices or Config.LLM_MODEL_PRICES.get(model)
+    if not prices:
+        return 0.0
+    uncached_tokens = prompt_tokens - cached_tokens
+    cost = (
+        uncached_tokens * prices['input']
+        + cached_tokens * prices.get('cached_input', prices['input'])
+        + completion_tokens * prices['output']
+    )
+    return cost / 1_000_000
+
+
+class ReportUsage:
+    """Accumulates the LLM calls made for a single report, including calls made on other threads."""
+
+    def __init__(self, industry: str):
+        self.industry = industry
+        self._totals = {
+            'calls': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cached_tokens': 0,
+            'cost_usd': 0.0,
+            'latency_ms': 0.0,
+        }
+        self._models = set()
+        self._estimated = False
+        self._fallback = None
+        self._lock = threading.Lock()
+
+    def add(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int,
+            cost: float, latency: float, estimated: bool = False):
+        with self._lock:
+            self._totals['calls'] += 1
+            self._totals['prompt_tokens'] += prompt_tokens
+            self._totals['completion_tokens'] += completion_tokens
+            self._totals['cached_tokens'] += cached_tokens
+            self._totals['cost_usd'] += cost
+            self._totals['latency_ms'] += latency * 1000
+            self._models.add(model)
+            self._estimated = self._estimated or estimated
+
+    def mark_fallback(self, reason: str):
+        """Flags that the report was served from fallback content instead of the LLM."""
+        with self._lock:
+            self._fallback = reason
+
+    def as_dict(self) -> dict:
+        """Returns the totals for the report, with the cost in USD and the summed call latency in milliseconds."""
+        with self._lock:
+            return {
+                **self._totals,
+                'cost_usd': round(self._totals['cost_usd'], 6),
+                'latency_ms': round(self._totals['latency_ms'], 1),
+                'models': sorted(self._models),
+                'estimated': self._estimated,
+                'fallback': self._fallback,
+            }
+
+
+@contextmanager
+def usage_tracking(industry: str):
+    """Collects the token usage and cost of every LLM call made inside the block."""
+    usage = ReportUsage(industry)
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def current_usage():
+    """Returns the usage collected for the current report, or None outside usage_tracking()."""
+    return _current_usage.get()
+
+
+@lru_cache(maxsize=1)
+def _known_industries() -> frozenset:
+    return frozenset(load_industries())
+
+
+def industry_label(industry: str) -> str:
+    """Returns the metric label for an industry: its name if the form offers it, otherwise 'other'."""
+    return industry if industry in _known_industries() else OTHER_INDUSTRY
+
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int,
+                     latency: float, estimated: bool = False, prices: dict = None) -> float:
+    """Records one LLM call in the metrics and the current report's usage. Returns its estimated cost."""
+    cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens, prices)
+    usage = current_usage()
+    industry = industry_label(usage.industry) if usage else NO_INDUSTRY
+    LLM_TOKENS.labels(model, industry, 'prompt').inc(prompt_tokens)
+    LLM_TOKENS.labels(model, industry, 'completion').inc(completion_tokens)
+    LLM_TOKENS.labels(model, industry, 'cached').inc(cached_tokens)
+    LLM_COST.labels(model, industry).inc(cost)
+    LLM_CALL_LATENCY.labels(model).observe(latency)
+    if usage:
+        usage.add(model, prompt_tokens, completion_tokens, cached_tokens, cost, latency, estimated)
+    return cost
+
+
+class DailyBudget:
+    """
+    Tracks estimated LLM spend per UTC day in a SQLite file shared by every
+    process, so the limit holds across web and worker processes.
+    """
+
+    def __init__(self, limit_usd: float, db_path: str):
+        self.logger = logging.getLogger(__name__)
+        self.limit_usd = limit_usd
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_spend (day TEXT PRIMARY KEY, spent_usd REAL NOT NULL)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def spent_today(self) -> float:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT spent_usd FROM llm_spend WHERE day = ?", (self._today(),)).fetchone()
+        return row[0] if row else 0.0
+
+    def exceeded(self) -> bool:
+        spent = self.spent_today()
+        LLM_DAILY_SPEND.set(spent)
+        return spent >= self.limit_usd
+
+    def add(self, cost: float):
+        if cost <= 0:
+            return
+        day = self._today()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO llm_spend (day, spent_usd) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET spent_usd = spent_usd + excluded.spent_usd",
+                (day, cost)
+            )
+            spent = conn.execute("SELECT spent_usd FROM llm_spend WHERE day = ?", (day,)).fetchone()[0]
+        LLM_DAILY_SPEND.set(spent)
+        if spent >= self.limit_usd and spent - cost < self.limit_usd:
+            self.logger.warning(f"Daily LLM budget of ${self.limit_usd:.2f} reached; serving cached or mock reports")
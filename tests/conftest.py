@@ -0,0 +1,78 @@
+import os
+import stat
+import sys
+import pytest
+
+# Config validates credentials at import time, so provide placeholders and keep
+# external services switched off before any application module is imported.
+os.environ.setdefault('GOOGLE_SHEETS_TYPE', 'service_account')
+os.environ.setdefault('GOOGLE_SHEETS_PROJECT_ID', 'test-project')
+os.environ.setdefault('GOOGLE_SHEETS_PRIVATE_KEY_ID', 'test-key-id')
+os.environ.setdefault('GOOGLE_SHEETS_PRIVATE_KEY', 'test-private-key')
+os.environ.setdefault('GOOGLE_SHEETS_CLIENT_EMAIL', 'test@example.com')
+os.environ.setdefault('GOOGLE_SHEETS_CLIENT_ID', 'test-client-id')
+os.environ.setdefault('OPENAI_API_KEY', 'test_key')
+os.environ.setdefault('PDFCO_API_KEY', 'test_pdfco_key')
+os.environ.setdefault('ENABLE_DATABASE', 'False')
+os.environ.setdefault('ENABLE_EMAIL_SERVICE', 'False')
+os.environ.setdefault('ENABLE_SHEETS_SERVICE', 'False')
+os.environ.setdefault('ENABLE_LLM_CACHE', 'False')
+
+# Stands in for wkhtmltopdf: reads HTML from stdin and writes a fake PDF to stdout
+FAKE_WKHTMLTOPDF = """#!{python}
+import sys, time
+html = sys.stdin.read()
+if 'SLEEP' in html:
+    time.sleep(float(html.split('SLEEP')[1]))
+if 'FAIL' in html:
+    sys.stderr.write('Error: failed to load page')
+    sys.exit(1)
+sys.stdout.write('%PDF-1.4 ' + html)
+"""
+
+
+@pytest.fixture
+def fake_binary(tmp_path):
+    path = tmp_path / 'wkhtmltopdf'
+    path.write_text(FAKE_WKHTMLTOPDF.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def service_account_info():
+    """A service account key that parses like a real one; nothing accepts it."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return {
+        'type': 'service_account',
+        'project_id': 'test-project',
+        'private_key_id': 'test-key-id',
+        'private_key': key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode(),
+        'client_email': 'reports@test-project.iam.gserviceaccount.com',
+        'client_id': 'test-client-id',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+    }
+
+
+@pytest.fixture
+def make_sheets_service(monkeypatch, tmp_path, service_account_info):
+    """Builds a SheetsService whose Google API clients answer from HttpMockSequence responses."""
+    from googleapiclient.discovery import build
+    from googleapiclient.http import HttpMockSequence
+    from config import Config
+    from services.sheets_service import SheetsService
+
+    monkeypatch.setattr(Config, 'ENABLE_SHEETS_SERVICE', True)
+    monkeypatch.setattr(Config, 'GOOGLE_ID_CACHE_PATH', str(tmp_path / 'google_ids.json'))
+
+    def make(drive=(), sheets=()):
+        service = SheetsService(service_account_info, 'ReportData')
+        service.drive_service = build('drive', 'v3', http=HttpMockSequence(list(drive)))
+        service.sheets_service = build('sheets', 'v4', http=HttpMockSequence(list(sheets)))
+        return service
+
+    return make
@@ -0,0 +1,84 @@
+import json
+from services.bulk_report_service import BulkReportService, ROW_FAILED, ROW_INVALID, ROW_OK
+from services.report_generator import record_fallback
+
+
+class FakeGenerator:
+    """Returns a small report, falling back to mock content for the industries in `failing`."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def generate_report_content(self, industry, answers, user_name):
+        self.calls.append(industry)
+        if industry in self.failing:
+            record_fallback('circuit_open')
+            return '<body>mock</body>'
+        return f'<body><h3>{user_name}</h3><p>{industry}</p></body>'
+
+
+def fake_pdf_renderer(html_content, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return output_path
+
+
+def lead(name, industry, email=None):
+    return {
+        'client_name': name,
+        'client_email': email or f'{name.lower()}@example.com',
+        'industry': industry,
+        'question1': 'a', 'question2': 'b', 'question3': 'c',
+    }
+
+
+def write_jsonl(path, rows):
+    path.write_text(''.join(json.dumps(row) + '\n' for row in rows))
+
+
+def test_bulk_run_checkpoints_and_resumes_failed_rows(tmp_path):
+    input_path = tmp_path / 'leads.jsonl'
+    write_jsonl(input_path, [
+        lead('Ann', 'Retail'),
+        lead('Bob', 'Healthcare'),
+        lead('Cat', 'Retail', email='not-an-email'),
+    ])
+    output_dir = tmp_path / 'out'
+
+    generator = FakeGenerator(failing={'Healthcare'})
+    service = BulkReportService(generator, str(output_dir), llm_concurrency=2, pdf_workers=1,
+                                render_pdfs=False)
+    manifest = service.run(str(input_path))
+
+    assert manifest['counts'] == {ROW_OK: 1, ROW_INVALID: 1, ROW_FAILED: 1}
+    statuses = {row['line']: row['status'] for row in manifest['rows']}
+    assert statuses == {1: ROW_OK, 2: ROW_FAILED, 3: ROW_INVALID}
+    assert 'fallback' in manifest['rows'][1]['error']
+    assert '<h3>Ann</h3>' in open(manifest['rows'][0]['path']).read()
+
+    # Only the failed row is generated again
+    generator = FakeGenerator()
+    service = BulkReportService(generator, str(output_dir), llm_concurrency=2, pdf_workers=1,
+                                render_pdfs=False)
+    manifest = service.run(str(input_path))
+
+    assert generator.calls == ['Healthcare']
+    assert manifest['counts'] == {ROW_OK: 2, ROW_INVALID: 1, ROW_FAILED: 0}
+    assert json.loads((output_dir / 'manifest.json').read_text())['counts'] == manifest['counts']
+
+
+def test_bulk_run_renders_pdfs_from_csv(tmp_path):
+    input_path = tmp_path / 'leads.csv'
+    # Extra columns from the CRM export are ignored
+    rows = [{**lead('Ann', 'Retail'), 'owner': 'sales'}, {**lead('Bob', 'Finance'), 'owner': 'marketing'}]
+    header = list(rows[0])
+    input_path.write_text('\n'.join([','.join(header)] + [','.join(row[key] for key in header) for row in rows]) + '\n')
+
+    service = BulkReportService(FakeGenerator(), str(tmp_path / 'out'), llm_concurrency=2, pdf_workers=1,
+                                pdf_renderer=fake_pdf_renderer)
+    manifest = service.run(str(input_path))
+
+    assert manifest['counts'][ROW_OK] == 2
+    assert [row['line'] for row in manifest['rows']] == [2, 3]
+    assert all(row['path'].endswith('.pdf') for row in manifest['rows'])
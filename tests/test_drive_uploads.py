@@ -0,0 +1,233 @@
+import time
+from contextlib import closing
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence
+from prometheus_client import REGISTRY
+from config import Config
+from services.drive_upload_service import DriveUploadService
+from services.sheets_service import SheetsService
+
+CHUNK_SIZE = 256 * 1024
+
+
+class FakeDrive:
+    """Implements the SheetsService methods DriveUploadService uses, failing where told to."""
+
+    def __init__(self, chunks=2):
+        self.chunks = chunks
+        self.fail_after_chunk = None
+        self.upload_error = None
+        self.failed_grants = set()
+        self.resumed_from = []
+        self.grant_batches = []
+
+    def upload_pdf_resumable(self, file_path, file_name, resumable_uri=None, on_chunk=None):
+        self.resumed_from.append(resumable_uri)
+        uri = resumable_uri or f'https://upload.example/{file_name}'
+        for chunk in range(1, self.chunks + 1):
+            if self.fail_after_chunk is not None and chunk > self.fail_after_chunk:
+                self.fail_after_chunk = None
+                raise ConnectionError('connection reset')
+            on_chunk(uri, chunk * CHUNK_SIZE)
+        if self.upload_error:
+            raise self.upload_error
+        return f'id-{file_name}'
+
+    def grant_public_read(self, file_ids):
+        self.grant_batches.append(list(file_ids))
+        return [file_id for file_id in file_ids if file_id in self.failed_grants]
+
+    @staticmethod
+    def drive_file_url(file_id):
+        return SheetsService.drive_file_url(file_id)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / 'report-ann-1.pdf'
+    path.write_bytes(b'%PDF' + b'x' * (CHUNK_SIZE + 1000))
+    return str(path)
+
+
+def make_service(tmp_path, drive, **kwargs):
+    uploaded = []
+    kwargs.setdefault('retry_delay', 0)
+    service = DriveUploadService(
+        drive, str(tmp_path / 'uploads.sqlite3'), workers=1, batch_size=10, poll_interval=0.05,
+        on_uploaded=lambda report_id, url: uploaded.append((report_id, url)), **kwargs
+    )
+    return service, uploaded
+
+
+def run_once(service):
+    upload = service.claim()
+    if upload:
+        service.upload(upload)
+    return upload
+
+
+def test_uploads_are_shared_in_one_batch_and_recorded(tmp_path, pdf_path):
+    drive = FakeDrive()
+    service, uploaded = make_service(tmp_path, drive)
+    first = service.enqueue('r1', pdf_path, 'one.pdf')
+    second = service.enqueue('r2', pdf_path, 'two.pdf')
+
+    run_once(service)
+    run_once(service)
+    assert service.get(first)['status'] == 'uploaded'
+    assert service.get(first)['bytes_sent'] == 2 * CHUNK_SIZE
+
+    assert service.grant_pending() == 2
+    assert drive.grant_batches == [['id-one.pdf', 'id-two.pdf']]
+    assert service.get(second)['status'] == 'done'
+    assert uploaded == [
+        ('r1', 'https://drive.google.com/file/d/id-one.pdf/view?usp=sharing'),
+        ('r2', 'https://drive.google.com/file/d/id-two.pdf/view?usp=sharing'),
+    ]
+
+
+def test_interrupted_upload_resumes_from_saved_session(tmp_path, pdf_path):
+    drive = FakeDrive(chunks=3)
+    drive.fail_after_chunk = 1
+    service, _ = make_service(tmp_path, drive, retry_delay=60)
+    upload_id = service.enqueue('r1', pdf_path, 'one.pdf')
+
+    run_once(service)
+    row = service.get(upload_id)
+    assert row['status'] == 'pending'
+    assert row['attempts'] == 1
+    assert row['resumable_uri'] == 'https://upload.example/one.pdf'
+    assert row['next_attempt_at'] > time.time() + 30
+    # Not due until the backoff has passed
+    assert service.claim() is None
+
+    service.retry_delay = 0
+    service._update(upload_id, next_attempt_at=0)
+    run_once(service)
+    assert drive.resumed_from == [None, 'https://upload.example/one.pdf']
+    assert service.get(upload_id)['status'] == 'uploaded'
+
+
+def test_expired_session_restarts_and_attempts_are_capped(tmp_path, pdf_path):
+    drive = FakeDrive()
+    drive.upload_error = HttpError(httplib2.Response({'status': 404}), b'Not Found')
+    service, uploaded = make_service(tmp_path, drive, max_attempts=2)
+    upload_id = service.enqueue('r1', pdf_path, 'one.pdf')
+
+    run_once(service)
+    assert service.get(upload_id)['resumable_uri'] is None
+    run_once(service)
+    row = service.get(upload_id)
+    assert row['status'] == 'failed'
+    assert row['attempts'] == 2
+    assert service.claim() is None
+    assert uploaded == []
+
+
+def test_failed_grant_is_retried_without_uploading_again(tmp_path, pdf_path):
+    drive = FakeDrive()
+    drive.failed_grants = {'id-one.pdf'}
+    service, uploaded = make_service(tmp_path, drive)
+    upload_id = service.enqueue('r1', pdf_path, 'one.pdf')
+    run_once(service)
+
+    assert service.grant_pending() == 0
+    assert service.get(upload_id)['status'] == 'uploaded'
+    drive.failed_grants = set()
+    assert service.grant_pending() == 1
+    assert len(drive.resumed_from) == 1
+    assert uploaded == [('r1', 'https://drive.google.com/file/d/id-one.pdf/view?usp=sharing')]
+
+
+def test_deferred_upload_waits_until_released(tmp_path, pdf_path):
+    drive = FakeDrive()
+    service, _ = make_service(tmp_path, drive)
+    upload_id = service.enqueue('r1', pdf_path, 'one.pdf', deferred=True)
+    assert service.claim() is None
+
+    assert service.release('one.pdf')
+    assert not service.release('one.pdf')
+    run_once(service)
+    assert service.get(upload_id)['status'] == 'uploaded'
+
+
+def test_deferred_upload_that_is_never_released_expires(tmp_path, pdf_path):
+    service, _ = make_service(tmp_path, FakeDrive(), deferred_ttl=60)
+    stale = service.enqueue('r1', pdf_path, 'one.pdf', deferred=True)
+    fresh = service.enqueue('r2', pdf_path, 'two.pdf', deferred=True)
+    with closing(service._connect()) as conn:
+        conn.execute("UPDATE drive_uploads SET created_at = ? WHERE id = ?", (time.time() - 120, stale))
+
+    assert service.claim() is None
+    assert service.get(stale) is None
+    assert service.get(fresh)['status'] == 'deferred'
+    assert REGISTRY.get_sample_value('drive_upload_backlog') == 1
+
+
+def test_upload_left_running_by_a_dead_process_is_reclaimed(tmp_path, pdf_path):
+    service, _ = make_service(tmp_path, FakeDrive(), lease_timeout=60)
+    upload_id = service.enqueue('r1', pdf_path, 'one.pdf')
+    assert service.claim()['id'] == upload_id
+    assert service.claim() is None
+
+    # The claiming process stopped heartbeating two minutes ago
+    with closing(service._connect()) as conn:
+        conn.execute("UPDATE drive_uploads SET updated_at = ? WHERE id = ?", (time.time() - 120, upload_id))
+    assert service.claim()['id'] == upload_id
+
+
+def test_background_workers_upload_and_share(tmp_path, pdf_path):
+    service, uploaded = make_service(tmp_path, FakeDrive())
+    service.start()
+    try:
+        service.enqueue('r1', pdf_path, 'one.pdf')
+        deadline = time.time() + 5
+        while not uploaded and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        service.stop(timeout=5)
+    assert uploaded == [('r1', 'https://drive.google.com/file/d/id-one.pdf/view?usp=sharing')]
+
+
+def test_resumable_upload_sends_chunks_and_resumes_session(monkeypatch, make_sheets_service, pdf_path):
+    monkeypatch.setattr(Config, 'DRIVE_UPLOAD_CHUNK_SIZE', CHUNK_SIZE)
+    monkeypatch.setattr(SheetsService, 'folder_id', 'folder')
+    progress = []
+    sheets = make_sheets_service(drive=[
+        ({'status': '200', 'location': 'https://upload.example/session'}, ''),
+        ({'status': '308', 'range': f'bytes=0-{CHUNK_SIZE - 1}'}, ''),
+        ({'status': '200'}, '{"id": "file-1"}'),
+    ])
+    assert sheets.upload_pdf_resumable(pdf_path, 'one.pdf', on_chunk=lambda *args: progress.append(args)) == 'file-1'
+    assert progress == [('https://upload.example/session', CHUNK_SIZE)]
+
+    # A saved session first asks Drive what it has and sends only the rest;
+    # starting a new session instead would fail without a location header
+    sent = []
+    original_request = HttpMockSequence.request
+
+    def record(http, uri, method='GET', body=None, headers=None, **kwargs):
+        sent.append((method, headers.get('Content-Range') or headers.get('content-range')))
+        return original_request(http, uri, method, body, headers, **kwargs)
+
+    monkeypatch.setattr(HttpMockSequence, 'request', record)
+    sheets = make_sheets_service(drive=[
+        ({'status': '308', 'range': f'bytes=0-{CHUNK_SIZE - 1}'}, ''),
+        ({'status': '200'}, '{"id": "file-1"}'),
+    ])
+    assert sheets.upload_pdf_resumable(pdf_path, 'one.pdf', resumable_uri='https://upload.example/session') == 'file-1'
+    size = CHUNK_SIZE + 1004
+    assert sent == [('PUT', f'bytes */{size}'), ('PUT', f'bytes {CHUNK_SIZE}-{size - 1}/{size}')]
+
+
+def test_resume_of_a_finished_or_expired_session(monkeypatch, make_sheets_service, pdf_path):
+    monkeypatch.setattr(SheetsService, 'folder_id', 'folder')
+    sheets = make_sheets_service(drive=[({'status': '200'}, '{"id": "file-1"}')])
+    assert sheets.upload_pdf_resumable(pdf_path, 'one.pdf', resumable_uri='https://upload.example/session') == 'file-1'
+
+    sheets = make_sheets_service(drive=[({'status': '404'}, 'Not Found')])
+    with pytest.raises(HttpError) as error:
+        sheets.upload_pdf_resumable(pdf_path, 'one.pdf', resumable_uri='https://upload.example/session')
+    assert error.value.resp.status == 404
@@ -0,0 +1,61 @@
+import logging
+import time
+from types import SimpleNamespace
+from config import Config
+from services.email_service import EmailService
+from services.fanout_service import FanoutService, SINK_OK, SINK_ERROR, SINK_TIMEOUT
+from services.mongodb_service import MongoDBService
+
+
+def test_sinks_run_concurrently():
+    service = FanoutService(max_workers=4)
+    started_at = time.monotonic()
+    outcomes = service.run([
+        ('mongodb', lambda: time.sleep(0.2), 5),
+        ('sheets', lambda: time.sleep(0.2), 5),
+        ('user_email', lambda: time.sleep(0.2), 5),
+    ])
+    elapsed = time.monotonic() - started_at
+
+    assert all(outcome['status'] == SINK_OK for outcome in outcomes.values())
+    assert elapsed < 0.5
+
+
+def test_sink_outcomes_report_errors_and_timeouts():
+    def failing_sink():
+        raise RuntimeError("Sheets quota exceeded")
+
+    service = FanoutService(max_workers=4)
+    outcomes = service.run([
+        ('sheets', failing_sink, 5),
+        ('user_email', lambda: time.sleep(1), 0.1),
+        ('subscription', lambda: None, 5),
+    ])
+
+    assert outcomes['sheets']['status'] == SINK_ERROR
+    assert 'quota' in outcomes['sheets']['error']
+    assert outcomes['user_email']['status'] == SINK_TIMEOUT
+    assert outcomes['subscription']['status'] == SINK_OK
+
+
+def test_services_that_swallow_their_errors_are_reported_as_failed(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise ConnectionError('connection refused')
+
+    mongodb = MongoDBService.__new__(MongoDBService)
+    mongodb.logger = logging.getLogger('test')
+    mongodb.collection = SimpleNamespace(insert_one=refuse)
+    monkeypatch.setattr(Config, 'ENABLE_EMAIL_SERVICE', True)
+    email = EmailService.__new__(EmailService)
+    email.logger = logging.getLogger('test')
+    email.proton = SimpleNamespace(create_message=refuse, send_message=refuse)
+    report_data = {'report_id': 'r1', 'client_name': 'John', 'client_email': 'john@example.com', 'pdf_url': '/r.pdf'}
+
+    outcomes = FanoutService(max_workers=2).run([
+        ('mongodb', lambda: mongodb.save_report_data(report_data), 5),
+        ('user_email', lambda: email.send_report_email_to_user(report_data), 5),
+    ])
+
+    assert outcomes['mongodb']['status'] == SINK_ERROR
+    assert outcomes['user_email']['status'] == SINK_ERROR
+    assert "reported a failure" in outcomes['mongodb']['error']
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+from config import Config
+from services.html_stream_extractor import StreamingHTMLExtractor
+from services.report_generator import ReportGenerator
+
+COMPLETION = "Sure! ```html\n<body><header><h1>Report</h1></header><section><h2>A</h2></section></body>\n``` Hope this helps!"
+
+
+def test_tags_split_across_chunks_are_found():
+    extractor = StreamingHTMLExtractor()
+    blocks = []
+    # Two-character chunks split every tag
+    for index in range(0, len(COMPLETION), 2):
+        blocks.extend(extractor.feed(COMPLETION[index:index + 2]))
+
+    assert blocks == ['<header><h1>Report</h1></header>', '<section><h2>A</h2></section>']
+    assert extractor.done
+    assert extractor.finish() == '<body><header><h1>Report</h1></header><section><h2>A</h2></section></body>'
+    assert extractor.discarded_chars == len('Sure! ```html\n') + len('\n``` Hope this helps!')
+
+
+def test_body_is_closed_when_generation_stopped_at_stop_sequence():
+    extractor = StreamingHTMLExtractor()
+    extractor.feed('```html\n<body><section>x</section>\n')
+
+    assert not extractor.done
+    assert extractor.finish() == '<body><section>x</section></body>'
+
+
+def test_no_body_returns_none():
+    extractor = StreamingHTMLExtractor()
+    assert extractor.feed('no markup here') == []
+    assert extractor.finish() is None
+
+
+class TrackingStream:
+    """Streams the completion in small chunks and records how far it was read and whether it was closed."""
+
+    def __init__(self, text):
+        self.chunks = [text[index:index + 5] for index in range(0, len(text), 5)]
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+    def close(self):
+        self.closed = True
+
+
+def test_report_stream_stops_at_closing_body_tag(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'single')
+    monkeypatch.setattr(Config, 'REPORT_OUTPUT_MODE', 'html')
+    stream = TrackingStream(COMPLETION + ' ' * 200)
+    requests = []
+
+    def create(**kwargs):
+        requests.append(kwargs)
+        return stream
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    generator = ReportGenerator(client, 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026))
+    report = generator.stream_report_content('Retail', ['a', 'b', 'c'], 'john')
+    blocks = list(report)
+
+    assert requests[0]['stop'] == ['</body>']
+    assert len(blocks) == 2
+    assert stream.closed
+    assert stream.sent < len(stream.chunks) / 2
@@ -0,0 +1,94 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from config import Config
+from services.industry_content_service import IndustryContentService, load_industries
+from services.report_generator import ReportGenerator, REPORT_SECTIONS
+
+
+class FakeCompletions:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.prompts = []
+
+    def create(self, **kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        self.prompts.append(prompt)
+        time.sleep(self.delay)
+        title = next(section['title'] for section in REPORT_SECTIONS if f"### Section: {section['title']}\n" in prompt)
+        message = SimpleNamespace(content=f"<p>{title} content</p>")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def generator():
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    return ReportGenerator(client, 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026))
+
+
+def test_load_industries_from_form():
+    industries = load_industries()
+
+    assert 'Technology' in industries
+    assert 'Government' in industries
+    assert '' not in industries
+
+
+def test_warm_up_precomputes_each_industry_once(generator, tmp_path):
+    service = IndustryContentService(generator, str(tmp_path / 'industry.json'), 3600, industries=['Technology', 'Retail'])
+
+    service.warm_up()
+    service.warm_up()
+
+    assert len(generator.client.chat.completions.prompts) == 2
+    reloaded = IndustryContentService(generator, str(tmp_path / 'industry.json'), 3600, industries=['Technology'])
+    assert reloaded.get_section('Technology', REPORT_SECTIONS[1]) == '<p>Industry Trends content</p>'
+
+
+def test_report_uses_precomputed_industry_section(generator, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'sections')
+    service = IndustryContentService(generator, str(tmp_path / 'industry.json'), 3600, industries=['Technology'])
+    service.warm_up()
+    generator.industry_content = service
+    prompts = generator.client.chat.completions.prompts
+    prompts.clear()
+
+    html = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+
+    assert '<p>Industry Trends content</p>' in html
+    assert len(prompts) == len(REPORT_SECTIONS) - 1
+    assert not any('### Section: Industry Trends' in prompt for prompt in prompts)
+
+
+def test_stale_section_is_served_while_it_is_regenerated(generator, tmp_path):
+    service = IndustryContentService(generator, str(tmp_path / 'industry.json'), 3600, industries=['Technology'])
+    section = REPORT_SECTIONS[1]
+    service.warm_up()
+    service._store['Technology'][section['key']].update(content='<p>Old trends</p>', generated_at=time.time() - 7200)
+    prompts = generator.client.chat.completions.prompts
+
+    assert service.get_section('Technology', section) == '<p>Old trends</p>'
+    deadline = time.time() + 5
+    while service.get_section('Technology', section) == '<p>Old trends</p>' and time.time() < deadline:
+        time.sleep(0.01)
+    assert service.get_section('Technology', section) == '<p>Industry Trends content</p>'
+    assert len(prompts) == 2
+
+
+def test_concurrent_requests_for_missing_content_share_one_call(generator, tmp_path):
+    generator.client.chat.completions.delay = 0.2
+    service = IndustryContentService(generator, str(tmp_path / 'industry.json'), 3600, industries=['Technology'])
+    results = []
+
+    def request():
+        results.append(service.get_section('Technology', REPORT_SECTIONS[1]))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['<p>Industry Trends content</p>'] * 5
+    assert len(generator.client.chat.completions.prompts) == 1
@@ -0,0 +1,105 @@
+import time
+from contextlib import closing
+import pytest
+from config import Config
+from services.job_queue_service import (
+    JobQueueService, InProcessJobBackend, SQLiteJobBackend, JOB_SUCCEEDED, JOB_FAILED
+)
+
+
+def wait_for_status(service, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = service.get_job(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish in time")
+
+
+@pytest.fixture(params=['inprocess', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), poll_interval=0.05)
+    return InProcessJobBackend()
+
+
+def test_job_runs_in_background(backend):
+    service = JobQueueService(lambda payload: {'report_id': payload['client_name']}, backend=backend, concurrency=2)
+    service.start()
+    try:
+        job_id = service.submit({'client_name': 'John Doe'})
+        job = wait_for_status(service, job_id, (JOB_SUCCEEDED, JOB_FAILED))
+    finally:
+        service.stop()
+
+    assert job['status'] == JOB_SUCCEEDED
+    assert job['result'] == {'report_id': 'John Doe'}
+
+
+def test_failed_job_records_error(backend):
+    def handler(payload):
+        raise RuntimeError("LLM unavailable")
+
+    service = JobQueueService(handler, backend=backend, concurrency=1)
+    service.start()
+    try:
+        job_id = service.submit({'client_name': 'John Doe'})
+        job = wait_for_status(service, job_id, (JOB_SUCCEEDED, JOB_FAILED))
+    finally:
+        service.stop()
+
+    assert job['status'] == JOB_FAILED
+    assert 'LLM unavailable' in job['error']
+
+
+def test_sqlite_job_is_claimed_once(tmp_path):
+    backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), poll_interval=0.05)
+    backend.enqueue('job-1', {'client_name': 'John Doe'})
+
+    assert backend.claim(timeout=0) == ('job-1', {'client_name': 'John Doe'})
+    assert backend.claim(timeout=0) is None
+
+
+def test_sqlite_job_left_running_past_its_lease_is_reclaimed(tmp_path):
+    backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), poll_interval=0.05, lease_timeout=60)
+    backend.enqueue('job-1', {'client_name': 'John Doe'})
+    assert backend.claim(timeout=0)[0] == 'job-1'
+
+    # A heartbeat keeps the lease; a worker that died stops sending them
+    backend.touch('job-1')
+    assert backend.claim(timeout=0) is None
+    with closing(backend._connect()) as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = 'job-1'", (time.time() - 120,))
+    assert backend.claim(timeout=0) == ('job-1', {'client_name': 'John Doe'})
+    assert backend.claim(timeout=0) is None
+
+
+def test_worker_renews_the_lease_while_a_job_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'JOB_LEASE_TIMEOUT', 0.3)
+    backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), poll_interval=0.05, lease_timeout=0.3)
+    service = JobQueueService(lambda payload: time.sleep(0.8) or {'report_id': 'r1'}, backend=backend, concurrency=1)
+    service.start()
+    try:
+        job_id = service.submit({'client_name': 'John Doe'})
+        time.sleep(0.5)
+        assert backend.claim(timeout=0) is None
+        job = wait_for_status(service, job_id, (JOB_SUCCEEDED, JOB_FAILED))
+    finally:
+        service.stop()
+    assert job['status'] == JOB_SUCCEEDED
+
+
+def test_sqlite_job_that_keeps_killing_its_worker_is_failed(tmp_path):
+    backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), poll_interval=0.05, lease_timeout=60, max_attempts=2)
+    backend.enqueue('job-1', {'client_name': 'John Doe'})
+
+    for _ in range(2):
+        assert backend.claim(timeout=0)[0] == 'job-1'
+        with closing(backend._connect()) as conn:
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = 'job-1'", (time.time() - 120,))
+
+    assert backend.claim(timeout=0) is None
+    job = backend.get('job-1')
+    assert job['status'] == JOB_FAILED
+    assert '2 attempts' in job['error']
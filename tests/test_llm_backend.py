@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from services.llm_backend import AsyncLLMBackend, TokenBucket, estimate_tokens
+
+MESSAGES = [{'role': 'user', 'content': 'x' * 400}]
+
+
+class FakeAsyncCompletions:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    async def create(self, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='report'))])
+
+
+def make_backend(completions, max_concurrency=2, tokens_per_minute=1_000_000):
+    backend = AsyncLLMBackend('test_key', max_concurrency, tokens_per_minute, max_connections=4)
+    backend.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return backend
+
+
+def test_estimate_tokens_includes_completion_budget():
+    assert estimate_tokens(MESSAGES, max_tokens=1500) == 100 + 1500
+
+
+def test_concurrency_is_limited_and_requests_queue():
+    completions = FakeAsyncCompletions()
+    backend = make_backend(completions, max_concurrency=2)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: backend.create(messages=MESSAGES, max_tokens=10), range(6)))
+
+    assert all(result.choices[0].message.content == 'report' for result in results)
+    assert completions.max_in_flight == 2
+
+
+def test_token_bucket_waits_for_refill():
+    async def scenario():
+        bucket = TokenBucket(tokens_per_minute=600)
+        await bucket.acquire(600)
+        started_at = time.monotonic()
+        await bucket.acquire(5)
+        return time.monotonic() - started_at
+
+    assert 0.4 < asyncio.run(scenario()) < 1.0
@@ -0,0 +1,66 @@
+from services.llm_cache_service import LLMResponseCache
+
+MESSAGES = [
+    {'role': 'system', 'content': 'You are a helpful assistant.'},
+    {'role': 'user', 'content': 'Write a report for the Technology industry.'},
+]
+
+
+def test_key_ignores_whitespace_but_not_model():
+    reformatted = [dict(MESSAGES[0]), {'role': 'user', 'content': '  Write a report for the\n Technology   industry. '}]
+
+    assert LLMResponseCache.make_key('gpt-4o', MESSAGES) == LLMResponseCache.make_key('gpt-4o', reformatted)
+    assert LLMResponseCache.make_key('gpt-4o', MESSAGES) != LLMResponseCache.make_key('gpt-4o-mini', MESSAGES)
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / 'llm_cache.sqlite3')
+    key = LLMResponseCache.make_key('gpt-4o', MESSAGES)
+    LLMResponseCache(db_path, ttl=60).set(key, '<body>Report</body>')
+
+    restarted = LLMResponseCache(db_path, ttl=60)
+    assert restarted.get(key) == '<body>Report</body>'
+    assert restarted.get(key) == '<body>Report</body>'
+    assert restarted.get_stats()['disk_hits'] == 1
+    assert restarted.get_stats()['memory_hits'] == 1
+
+
+def test_miss_and_expiry(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'llm_cache.sqlite3'), ttl=0)
+    cache.set('key', 'value')
+
+    assert cache.get('key') is None
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'llm_cache.sqlite3'), ttl=60, max_bytes=10)
+    cache.set('old', '123456')
+    cache.set('new', '123456')
+
+    stats = cache.get_stats()
+    assert stats['disk_entries'] == 1
+    assert stats['evictions'] == 1
+
+
+def test_report_generator_reuses_cached_completion(tmp_path):
+    from types import SimpleNamespace
+    from services.report_generator import ReportGenerator
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content='<body><section>Report</section></body>')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    util = SimpleNamespace(get_current_year=lambda: 2026)
+    cache = LLMResponseCache(str(tmp_path / 'llm_cache.sqlite3'), ttl=60)
+    generator = ReportGenerator(client, 'gpt-4o', util, cache=cache)
+
+    first = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+    second = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+
+    assert first == second
+    assert len(calls) == 1
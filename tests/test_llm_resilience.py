@@ -0,0 +1,132 @@
+import time
+from types import SimpleNamespace
+import httpx
+import openai
+import pytest
+from services.llm_resilience import (
+    BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, CircuitBreaker, CircuitOpenError, ResilientCaller
+)
+
+
+def api_error(status):
+    response = httpx.Response(status, request=httpx.Request('POST', 'https://llm.example/v1/chat/completions'))
+    return openai.APIStatusError(f'{status} error', response=response, body=None)
+
+
+class FlakyCall:
+    def __init__(self, failures, result='report', status=502):
+        self.failures = failures
+        self.result = result
+        self.status = status
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise api_error(self.status)
+        return self.result
+
+
+def make_caller(**kwargs):
+    options = {'max_retries': 2, 'backoff_base': 0.01, 'backoff_max': 0.01}
+    options.update(kwargs)
+    breaker = options.pop('breaker', CircuitBreaker(failure_threshold=5, reset_timeout=60))
+    return ResilientCaller(breaker, **options)
+
+
+def test_retries_until_success():
+    call = FlakyCall(failures=2)
+    assert make_caller().call(call) == 'report'
+    assert call.calls == 3
+
+
+def test_gives_up_after_max_retries():
+    call = FlakyCall(failures=10)
+    with pytest.raises(openai.APIStatusError):
+        make_caller(max_retries=1).call(call)
+    assert call.calls == 2
+
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    caller = make_caller(breaker=breaker, max_retries=0)
+    call = FlakyCall(failures=10)
+
+    for _ in range(2):
+        with pytest.raises(openai.APIStatusError):
+            caller.call(call)
+    assert breaker.state == BREAKER_OPEN
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(call)
+    assert call.calls == 2
+
+
+def test_client_errors_are_not_retried_or_counted():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    call = FlakyCall(failures=10, status=400)
+    with pytest.raises(openai.APIStatusError):
+        make_caller(breaker=breaker).call(call)
+    assert call.calls == 1
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.failures == 0
+
+
+def test_rate_limits_and_connection_errors_are_retried():
+    call = FlakyCall(failures=1, status=429)
+    assert make_caller().call(call) == 'report'
+    assert call.calls == 2
+
+    attempts = []
+
+    def disconnected():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise httpx.ConnectError('connection refused')
+        return 'report'
+
+    assert make_caller().call(disconnected) == 'report'
+    assert len(attempts) == 2
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+
+    assert breaker.allow_request()
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_hedged_request_wins_when_primary_is_slow():
+    caller = make_caller(hedge=True)
+    caller.latencies.extend([0.01] * 50)
+    delays = [1.0, 0.0]
+
+    def call():
+        time.sleep(delays.pop(0))
+        return 'report'
+
+    started_at = time.monotonic()
+    assert caller.call(call) == 'report'
+    assert time.monotonic() - started_at < 0.5
+
+
+def test_report_falls_back_to_mock_when_breaker_is_open():
+    from services.report_generator import ReportGenerator
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=FlakyCall(failures=0))))
+    generator = ReportGenerator(
+        client, 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026), resilience=make_caller(breaker=breaker)
+    )
+
+    html = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+
+    assert 'AI Insights Report - Mock' in html
+    assert client.chat.completions.create.calls == 0
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+import httpx
+import openai
+import pytest
+from openai import OpenAI
+from config import Config
+from llm_stub_server import StubSettings, create_app
+from services.report_generator import ReportGenerator, REPORT_SECTIONS
+
+
+def make_client(settings):
+    stub = create_app(settings)
+    http_client = httpx.Client(transport=httpx.WSGITransport(app=stub))
+    return OpenAI(api_key='stub', base_url='http://stub/v1', http_client=http_client, max_retries=0)
+
+
+def make_generator(settings):
+    return ReportGenerator(make_client(settings), 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026))
+
+
+@pytest.fixture
+def fast():
+    return StubSettings(latency='fixed:0', tokens_per_second=0)
+
+
+@pytest.fixture(autouse=True)
+def single_html_mode(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'single')
+    monkeypatch.setattr(Config, 'REPORT_OUTPUT_MODE', 'html')
+
+
+def test_html_report_from_stub(fast):
+    html = make_generator(fast).generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+
+    assert '<h3>John</h3>' in html
+    assert '&copy; 2026' in html
+    assert 'Let me know' not in html
+    assert html.count('<section>') == len(REPORT_SECTIONS)
+
+
+def test_streamed_report_from_stub(fast):
+    stream = make_generator(fast).stream_report_content('Retail', ['a', 'b', 'c'], 'john')
+    blocks = []
+    try:
+        while True:
+            blocks.append(next(stream))
+    except StopIteration as done:
+        html = done.value
+
+    assert blocks[0].startswith('<header>')
+    assert len(blocks) == len(REPORT_SECTIONS) + 1
+    assert '<h3>John</h3>' in html
+
+
+def test_json_and_section_reports_from_stub(fast, monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_OUTPUT_MODE', 'json')
+    html = make_generator(fast).generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+    assert 'AI Insights Report - Mock' not in html
+    assert html.count('<section>') == len(REPORT_SECTIONS)
+
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'sections')
+    html = make_generator(fast).generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+    assert html.count('<li>Pilot one use case</li>') == len(REPORT_SECTIONS)
+
+
+def test_injected_rate_limit_and_usage():
+    client = make_client(StubSettings(latency='fixed:0', tokens_per_second=0, rate_limit_rate=1.0))
+    with pytest.raises(openai.RateLimitError):
+        client.chat.completions.create(model='gpt-4o', messages=[{'role': 'user', 'content': 'hi'}])
+
+    client = make_client(StubSettings(latency='fixed:0', tokens_per_second=0))
+    response = client.chat.completions.create(
+        model='gpt-4o', messages=[{'role': 'user', 'content': 'hi'}], max_tokens=10
+    )
+    assert response.choices[0].finish_reason == 'length'
+    assert response.usage.completion_tokens == 10
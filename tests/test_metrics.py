@@ -0,0 +1,37 @@
+import pytest
+from prometheus_client import REGISTRY
+from services.metrics_service import stage_breakdown, track_stage
+
+
+def sample(name, stage):
+    return REGISTRY.get_sample_value(name, {'stage': stage}) or 0
+
+
+def test_track_stage_records_latency_and_breakdown():
+    calls_before = sample('report_stage_calls_total', 'test.render')
+
+    with stage_breakdown() as breakdown:
+        with track_stage('test.render'):
+            pass
+
+    assert sample('report_stage_calls_total', 'test.render') == calls_before + 1
+    assert sample('report_stage_in_flight', 'test.render') == 0
+    assert 'test.render' in breakdown.as_dict()
+
+
+def test_track_stage_counts_errors():
+    errors_before = sample('report_stage_errors_total', 'test.failing')
+
+    with pytest.raises(RuntimeError):
+        with track_stage('test.failing'):
+            raise RuntimeError("wkhtmltopdf crashed")
+
+    assert sample('report_stage_errors_total', 'test.failing') == errors_before + 1
+
+
+def test_metrics_endpoint():
+    from app import app
+    response = app.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    assert b'report_stage_duration_seconds' in response.data
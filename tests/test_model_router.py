@@ -0,0 +1,94 @@
+import time
+from types import SimpleNamespace
+from prometheus_client import REGISTRY
+from config import Config
+from services.model_router import ModelEndpoint, ModelRouter, TIER_REPORT, TIER_SECTION
+from services.report_generator import ReportGenerator, REPORT_SECTIONS
+from services.usage_service import usage_tracking
+
+
+class StubEndpoint:
+    """Emulates an endpoint with a fixed latency that can be made to fail."""
+
+    def __init__(self, latency=0.0, failing=False):
+        self.latency = latency
+        self.failing = failing
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        time.sleep(self.latency)
+        if self.failing:
+            raise RuntimeError('Service unavailable')
+        message = SimpleNamespace(content=f"<p>{kwargs['model']}</p>")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_endpoint(name, stub, timeout=10, **kwargs):
+    return ModelEndpoint(name, name, stub.create, timeout=timeout, **kwargs)
+
+
+def route_count(tier, endpoint, reason):
+    labels = {'tier': tier, 'endpoint': endpoint, 'reason': reason}
+    return REGISTRY.get_sample_value('llm_route_decisions_total', labels) or 0
+
+
+def test_failing_primary_falls_back_and_is_routed_around():
+    primary, secondary = StubEndpoint(failing=True), StubEndpoint()
+    router = ModelRouter([make_endpoint('primary', primary), make_endpoint('secondary', secondary)],
+                         probe_interval=60, error_threshold=0.3)
+    before = route_count(TIER_REPORT, 'secondary', 'fallback')
+
+    endpoint, _ = router.create(TIER_REPORT, model='ignored', messages=[])
+    assert endpoint.name == 'secondary'
+    assert secondary.requests[0]['model'] == 'secondary'
+    assert route_count(TIER_REPORT, 'secondary', 'fallback') - before == 1
+
+    endpoint, _ = router.create(TIER_REPORT, messages=[])
+    endpoint, _ = router.create(TIER_REPORT, messages=[])
+    # The primary's error rate passed the threshold, so it is no longer tried first
+    assert len(primary.requests) == 2
+    assert [entry['degraded'] for entry in router.snapshot()] == [True, False]
+
+
+def test_slow_primary_is_rerouted_then_probed():
+    primary, secondary = StubEndpoint(latency=0.1), StubEndpoint()
+    router = ModelRouter([
+        make_endpoint('slow-primary', primary, slow_after=0.05),
+        make_endpoint('fast-secondary', secondary),
+    ], probe_interval=0.2)
+
+    assert router.create(TIER_REPORT, messages=[])[0].name == 'slow-primary'
+    assert router.create(TIER_REPORT, messages=[])[0].name == 'fast-secondary'
+    assert len(primary.requests) == 1
+
+    time.sleep(0.25)
+    primary.latency = 0
+    assert router.create(TIER_REPORT, messages=[])[0].name == 'slow-primary'
+    assert router.create(TIER_REPORT, messages=[])[0].name == 'slow-primary'
+
+
+def test_endpoint_timeout_is_passed_per_endpoint():
+    stub = StubEndpoint()
+    router = ModelRouter([make_endpoint('primary', stub, timeout=7)])
+    router.create(TIER_REPORT, messages=[], timeout=60)
+    assert stub.requests[0]['timeout'] == 7
+
+
+def test_sections_use_the_cheaper_section_endpoint(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'sections')
+    full, cheap = StubEndpoint(), StubEndpoint()
+    router = ModelRouter([
+        ModelEndpoint('full', 'gpt-4o', full.create, timeout=10, tiers=(TIER_REPORT,)),
+        ModelEndpoint('cheap', 'gpt-4o-mini', cheap.create, timeout=10, tiers=(TIER_SECTION,)),
+    ])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+    generator = ReportGenerator(client, 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026), router=router)
+
+    with usage_tracking('Retail') as usage:
+        html = generator.generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+
+    assert len(cheap.requests) == len(REPORT_SECTIONS)
+    assert not full.requests
+    assert '<p>gpt-4o-mini</p>' in html
+    assert usage.as_dict()['models'] == ['gpt-4o-mini']
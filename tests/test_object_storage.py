@@ -0,0 +1,110 @@
+import io
+import os
+import uuid
+import httpx
+import pytest
+from services.object_storage import LocalArtifactStore, S3ArtifactStore
+from services.pdf_engine import PDFRenderEngine
+from services.pdf_service import PDFService
+from services.report_storage import ReportStorage
+
+# The S3 tests run against any S3-compatible server, e.g. a local MinIO:
+#   docker run -p 9000:9000 minio/minio server /data
+#   S3_TEST_ENDPOINT_URL=http://127.0.0.1:9000 pytest tests/test_object_storage.py
+S3_TEST_ENDPOINT_URL = os.getenv('S3_TEST_ENDPOINT_URL')
+requires_s3 = pytest.mark.skipif(not S3_TEST_ENDPOINT_URL, reason='S3_TEST_ENDPOINT_URL is not set')
+
+# S3 requires every part but the last to be at least 5 MiB
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_store():
+    boto3 = pytest.importorskip('boto3')
+    client = boto3.client(
+        's3', endpoint_url=S3_TEST_ENDPOINT_URL, region_name='us-east-1',
+        aws_access_key_id=os.getenv('S3_TEST_ACCESS_KEY_ID', 'minioadmin'),
+        aws_secret_access_key=os.getenv('S3_TEST_SECRET_ACCESS_KEY', 'minioadmin')
+    )
+    bucket = f'reports-test-{uuid.uuid4().hex[:8]}'
+    client.create_bucket(Bucket=bucket)
+    store = S3ArtifactStore(
+        bucket, prefix='reports/', endpoint_url=S3_TEST_ENDPOINT_URL, region='us-east-1',
+        access_key_id=os.getenv('S3_TEST_ACCESS_KEY_ID', 'minioadmin'),
+        secret_access_key=os.getenv('S3_TEST_SECRET_ACCESS_KEY', 'minioadmin'),
+        url_ttl=60, chunk_size=PART_SIZE
+    )
+    yield store
+    for item in client.list_objects_v2(Bucket=bucket).get('Contents', []):
+        client.delete_object(Bucket=bucket, Key=item['Key'])
+    client.delete_bucket(Bucket=bucket)
+
+
+class ChunkedReader(io.RawIOBase):
+    """A non-seekable stream that records the largest read, to show uploads are not buffered whole."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.largest_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self.remaining)
+        self.largest_read = max(self.largest_read, count)
+        buffer[:count] = b'x' * count
+        self.remaining -= count
+        return count
+
+
+def test_local_store_round_trip(tmp_path):
+    store = LocalArtifactStore(ReportStorage(str(tmp_path)))
+    assert not store.shared
+    assert not store.exists('report-ann-1.pdf')
+
+    store.put_stream('report-ann-1.pdf', io.BytesIO(b'%PDF local'))
+    assert store.exists('report-ann-1.pdf')
+    with store.get_stream('report-ann-1.pdf') as stream:
+        assert stream.read() == b'%PDF local'
+    assert store.download_url('report-ann-1.pdf') is None
+
+    store.delete('report-ann-1.pdf')
+    assert store.get_stream('report-ann-1.pdf') is None
+
+
+@requires_s3
+def test_s3_streaming_multipart_upload_and_presigned_url(s3_store):
+    stream = ChunkedReader(2 * PART_SIZE + 1024)
+    s3_store.put_stream('big.pdf', stream)
+
+    assert s3_store.exists('big.pdf')
+    assert stream.largest_read <= PART_SIZE
+    head = s3_store.client.head_object(Bucket=s3_store.bucket, Key='reports/big.pdf')
+    # Multipart uploads get an ETag with the part count as a suffix
+    assert head['ETag'].strip('"').endswith('-3')
+    assert head['ContentType'] == 'application/pdf'
+
+    response = httpx.get(s3_store.download_url('big.pdf'))
+    assert response.status_code == 200
+    assert len(response.content) == 2 * PART_SIZE + 1024
+    assert not s3_store.exists('missing.pdf')
+    assert s3_store.get_stream('missing.pdf') is None
+
+
+@requires_s3
+def test_lazy_report_saved_on_one_instance_renders_on_another(s3_store, fake_binary, tmp_path):
+    def instance(name):
+        engine = PDFRenderEngine(workers=1, queue_size=2, render_timeout=5, queue_timeout=1, binary=fake_binary)
+        storage = ReportStorage(str(tmp_path / name))
+        return PDFService(engine, storage, artifacts=s3_store), storage
+
+    first, first_storage = instance('a')
+    second, second_storage = instance('b')
+    first.save_pending('<p>Shared</p>', first_storage.path_for('report-ann-1.pdf'))
+
+    output_path = second_storage.path_for('report-ann-1.pdf')
+    assert second.render_on_demand(output_path) == output_path
+    assert s3_store.exists('report-ann-1.pdf')
+    assert s3_store.get_stream(PDFService.pending_name(output_path)) is None
+    assert httpx.get(s3_store.download_url('report-ann-1.pdf')).content == b'%PDF-1.4 <p>Shared</p>'
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import pytest
+from prometheus_client import REGISTRY
+from services.pdf_engine import PDFEngineBusyError, PDFRenderEngine, PDFRenderError, PDFRenderTimeoutError
+from services.pdf_service import PDFService
+from services.report_storage import ReportStorage
+
+def make_engine(binary, workers=2, queue_size=4, render_timeout=5, queue_timeout=1):
+    return PDFRenderEngine(workers=workers, queue_size=queue_size, render_timeout=render_timeout,
+                           queue_timeout=queue_timeout, binary=binary)
+
+
+def test_renders_through_stdin_and_stdout(fake_binary, tmp_path):
+    engine = make_engine(fake_binary)
+    assert engine.command[-2:] == ['-', '-']
+    assert engine.render('<p>Report</p>') == b'%PDF-1.4 <p>Report</p>'
+
+    output_path = str(tmp_path / 'report.pdf')
+    assert PDFService(engine).generate_pdf('<p>Saved</p>', output_path) == output_path
+    assert open(output_path, 'rb').read().startswith(b'%PDF')
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith('.tmp')]
+    engine.shutdown()
+
+
+def test_failed_render_raises_and_service_returns_none(fake_binary, tmp_path):
+    engine = make_engine(fake_binary)
+    with pytest.raises(PDFRenderError, match='failed to load page'):
+        engine.render('FAIL')
+    assert PDFService(engine).generate_pdf('FAIL', str(tmp_path / 'report.pdf')) is None
+    engine.shutdown()
+
+
+def test_hung_render_is_killed(fake_binary):
+    engine = make_engine(fake_binary, workers=1, render_timeout=0.3)
+    started_at = time.monotonic()
+    with pytest.raises(PDFRenderTimeoutError):
+        engine.render('SLEEP30')
+    assert time.monotonic() - started_at < 5
+    # The worker is free again for the next render
+    assert engine.render('<p>next</p>').startswith(b'%PDF')
+    engine.shutdown()
+
+
+def test_full_queue_rejects_with_backpressure(fake_binary):
+    engine = make_engine(fake_binary, workers=1, queue_size=1, queue_timeout=0.1)
+    running = engine.submit('SLEEP0.5')
+    # Wait for the worker to take the first render so the second one occupies the queue
+    deadline = time.monotonic() + 2
+    while not running.running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queued = engine.submit('SLEEP0.5')
+    assert REGISTRY.get_sample_value('pdf_render_queue_depth') >= 1
+
+    with pytest.raises(PDFEngineBusyError):
+        engine.submit('<p>rejected</p>')
+
+    assert running.result().startswith(b'%PDF')
+    assert queued.result().startswith(b'%PDF')
+    engine.shutdown()
+
+
+def test_concurrency_is_bounded_by_workers(fake_binary):
+    engine = make_engine(fake_binary, workers=2, queue_size=8)
+    peak = []
+
+    def sample():
+        for _ in range(40):
+            peak.append(REGISTRY.get_sample_value('pdf_render_workers_busy'))
+            time.sleep(0.01)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    futures = [engine.submit('SLEEP0.1') for _ in range(6)]
+    assert all(future.result().startswith(b'%PDF') for future in futures)
+    sampler.join()
+    assert max(peak) <= 2
+    engine.shutdown()
+
+
+class CountingEngine:
+    """Wraps a real engine and counts the renders that reach wkhtmltopdf."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.command = engine.command
+        self.renders = 0
+
+    def render(self, html_content):
+        self.renders += 1
+        return self.engine.render(html_content)
+
+
+def test_identical_html_is_rendered_once(fake_binary, tmp_path):
+    engine = make_engine(fake_binary)
+    counting = CountingEngine(engine)
+    service = PDFService(counting)
+
+    first = service.generate_pdf('<p>Same</p>', str(tmp_path / 'report-ann-1.pdf'))
+    second = service.generate_pdf('<p>Same</p>', str(tmp_path / 'report-bob-2.pdf'))
+    service.generate_pdf('<p>Different</p>', str(tmp_path / 'report-cat-3.pdf'))
+
+    assert counting.renders == 2
+    assert open(first, 'rb').read() == open(second, 'rb').read()
+    # Both report files are links to the one stored PDF
+    blob = service.blob_path('<p>Same</p>', first)
+    assert os.stat(first).st_ino == os.stat(second).st_ino == os.stat(blob).st_ino
+    assert len([name for _, _, names in os.walk(tmp_path / 'blobs') for name in names]) == 2
+    engine.shutdown()
+
+
+def test_render_options_are_part_of_the_key(fake_binary, tmp_path):
+    plain = make_engine(fake_binary, workers=1)
+    landscape = PDFRenderEngine(workers=1, queue_size=1, render_timeout=5, queue_timeout=1,
+                                binary=fake_binary, options={'orientation': 'Landscape'})
+    assert PDFService(plain).render_key('<p>x</p>') != PDFService(landscape).render_key('<p>x</p>')
+    plain.shutdown()
+    landscape.shutdown()
+
+
+def test_lazy_render_happens_once_for_concurrent_downloads(fake_binary, tmp_path):
+    engine = make_engine(fake_binary, workers=4)
+    counting = CountingEngine(engine)
+    service = PDFService(counting)
+    output_path = str(tmp_path / 'report-ann-1.pdf')
+
+    assert service.save_pending('<p>Lazy</p>SLEEP0.3', output_path) == output_path
+    assert not os.path.exists(output_path)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.render_on_demand(output_path)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [output_path] * 5
+    assert counting.renders == 1
+    assert not os.path.exists(service.pending_path(output_path))
+    assert service.render_on_demand(str(tmp_path / 'report-unknown.pdf')) is None
+    engine.shutdown()
+
+
+def test_serve_pdf_renders_lazy_report_on_first_download(fake_binary, tmp_path, monkeypatch):
+    import app as app_module
+    engine = make_engine(fake_binary)
+    storage = ReportStorage(str(tmp_path))
+    service = PDFService(engine, storage)
+    monkeypatch.setattr(app_module, 'pdf_service', service)
+    monkeypatch.setattr(app_module, 'reports_dir', str(tmp_path))
+    monkeypatch.setattr(app_module, 'report_storage', storage)
+    monkeypatch.setattr(app_module.report_file_service, 'storage', storage)
+    service.save_pending('<p>Lazy</p>', storage.path_for('report-ann-1.pdf'))
+    client = app_module.app.test_client()
+
+    response = client.get('/reports/report-ann-1.pdf')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert client.get('/reports/report-missing.pdf').status_code == 404
+    engine.shutdown()
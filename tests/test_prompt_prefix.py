@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+import pytest
+from prometheus_client import REGISTRY
+from config import Config
+from services.report_generator import ReportGenerator, REPORT_PROMPT_PREFIX, USER_NAME_PLACEHOLDER, YEAR_PLACEHOLDER
+
+REQUESTS = [
+    ('Retail', ['grow revenue', 'a CRM', 'beginner'], 'john'),
+    ('Healthcare', ['cut costs', 'spreadsheets', 'advanced'], 'maria'),
+]
+
+
+class FakeCompletions:
+    def __init__(self, content, cached_tokens=0):
+        self.content = content
+        self.cached_tokens = cached_tokens
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        usage = SimpleNamespace(
+            prompt_tokens=1400, completion_tokens=900, prompt_tokens_details=SimpleNamespace(cached_tokens=self.cached_tokens)
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))], usage=usage)
+
+
+def make_generator(completions):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return ReportGenerator(client, 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026))
+
+
+@pytest.fixture(autouse=True)
+def single_html_mode(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'single')
+    monkeypatch.setattr(Config, 'REPORT_OUTPUT_MODE', 'html')
+
+
+def test_prompt_prefix_is_identical_across_requests():
+    completions = FakeCompletions('<body></body>')
+    generator = make_generator(completions)
+    for industry, answers, user_name in REQUESTS:
+        generator.generate_report_content(industry, answers, user_name)
+
+    system_prompts = [request['messages'][0]['content'] for request in completions.requests]
+    assert system_prompts == [REPORT_PROMPT_PREFIX] * len(REQUESTS)
+    for industry, answers, user_name in REQUESTS:
+        for value in [industry, user_name.capitalize(), *answers]:
+            assert value not in REPORT_PROMPT_PREFIX
+    assert completions.requests[0]['messages'][1] != completions.requests[1]['messages'][1]
+
+
+def test_placeholders_are_filled_locally():
+    report = (
+        f"```html\n<body><header><h3>{USER_NAME_PLACEHOLDER}</h3></header>"
+        f"<footer>&copy; {YEAR_PLACEHOLDER}</footer></body>\n```"
+    )
+    html = make_generator(FakeCompletions(report)).generate_report_content(*REQUESTS[0])
+
+    assert '<h3>John</h3>' in html
+    assert '&copy; 2026' in html
+    assert '%%' not in html
+
+
+def test_cached_prompt_tokens_are_recorded():
+    before = REGISTRY.get_sample_value('llm_cached_prompt_tokens_total', {'stage': 'llm.completion'}) or 0
+    make_generator(FakeCompletions('<body></body>', cached_tokens=1280)).generate_report_content(*REQUESTS[0])
+
+    after = REGISTRY.get_sample_value('llm_cached_prompt_tokens_total', {'stage': 'llm.completion'})
+    assert after - before == 1280
@@ -0,0 +1,63 @@
+import hashlib
+import pytest
+from flask import Flask
+from services.report_file_service import ReportFileService, SENDFILE_X_ACCEL
+from services.report_storage import ReportStorage
+
+PDF_BYTES = b'%PDF-1.4 ' + bytes(range(256)) * 64
+
+
+@pytest.fixture
+def reports_dir(tmp_path):
+    (tmp_path / 'report-ann-1.pdf').write_bytes(PDF_BYTES)
+    return tmp_path
+
+
+def make_client(reports_dir, **kwargs):
+    app = Flask(__name__)
+    service = ReportFileService(ReportStorage(str(reports_dir)), **kwargs)
+    app.add_url_rule('/reports/<filename>', 'serve_pdf', service.send)
+    return app.test_client()
+
+
+def test_etag_and_conditional_get(reports_dir):
+    client = make_client(reports_dir, max_age=3600)
+    response = client.get('/reports/report-ann-1.pdf')
+
+    assert response.status_code == 200
+    assert response.data == PDF_BYTES
+    assert response.headers['ETag'] == f'"{hashlib.sha256(PDF_BYTES).hexdigest()}"'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'private' in response.headers['Cache-Control']
+
+    not_modified = client.get('/reports/report-ann-1.pdf', headers={'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    since = client.get('/reports/report-ann-1.pdf', headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert since.status_code == 304
+
+
+def test_byte_ranges(reports_dir):
+    client = make_client(reports_dir)
+    response = client.get('/reports/report-ann-1.pdf', headers={'Range': 'bytes=100-199'})
+
+    assert response.status_code == 206
+    assert response.data == PDF_BYTES[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(PDF_BYTES)}'
+
+
+def test_x_accel_redirect_leaves_the_body_to_nginx(reports_dir):
+    client = make_client(reports_dir, sendfile_mode=SENDFILE_X_ACCEL, accel_prefix='/internal/')
+    response = client.get('/reports/report-ann-1.pdf')
+
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == '/internal/report-ann-1.pdf'
+    assert response.data == b''
+    etag = response.headers['ETag']
+    assert client.get('/reports/report-ann-1.pdf', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_unknown_and_escaping_paths_are_not_found(reports_dir):
+    client = make_client(reports_dir)
+    assert client.get('/reports/missing.pdf').status_code == 404
+    assert client.get('/reports/..%2Fsecret.pdf').status_code == 404
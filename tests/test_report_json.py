@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+import pytest
+from config import Config
+from services.llm_cache_service import LLMResponseCache
+from services.report_generator import ReportGenerator, REPORT_SECTIONS
+
+
+class FakeJSONCompletions:
+    """Returns the given completion texts in order and records the request arguments."""
+
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        message = SimpleNamespace(content=self.contents.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_generator(completions, cache=None):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    util = SimpleNamespace(get_current_year=lambda: 2026)
+    return ReportGenerator(client, 'gpt-4o', util, cache=cache)
+
+
+def report_json(**overrides):
+    content = {section['key']: [f"{section['title']} content"] for section in REPORT_SECTIONS}
+    content.update(overrides)
+    return json.dumps(content)
+
+
+@pytest.fixture(autouse=True)
+def json_mode(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'single')
+    monkeypatch.setattr(Config, 'REPORT_OUTPUT_MODE', 'json')
+
+
+def test_json_report_is_rendered_with_the_local_layout():
+    completions = FakeJSONCompletions(report_json(conclusion=['First <b>point</b>', 'Second point']))
+    html = make_generator(completions).generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+
+    request = completions.requests[0]
+    assert request['response_format'] == {'type': 'json_object'}
+    assert '<body>' not in request['messages'][-1]['content']
+    positions = [html.index(f"<h2>{section['title'].replace('&', '&amp;')}</h2>") for section in REPORT_SECTIONS]
+    assert positions == sorted(positions)
+    assert '<p>First &lt;b&gt;point&lt;/b&gt;</p>' in html
+    assert '<p>Second point</p>' in html
+    assert '<h3>John</h3>' in html
+    assert 'class="cta"' in html and '&copy; 2026' in html
+
+
+def test_invalid_json_report_returns_no_content_and_is_not_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    completions = FakeJSONCompletions(report_json(conclusion=[]), report_json())
+    generator = make_generator(completions, cache=cache)
+
+    assert generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john') == ''
+
+    html = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+    assert '<p>Conclusion content</p>' in html
+    assert len(completions.requests) == 2
+
+    generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+    assert len(completions.requests) == 2
+
+
+def test_json_report_streams_header_then_sections():
+    completions = FakeJSONCompletions('```json\n' + report_json() + '\n```')
+    stream = make_generator(completions).stream_report_content('Technology', ['a', 'b', 'c'], 'john')
+
+    blocks = []
+    try:
+        while True:
+            blocks.append(next(stream))
+    except StopIteration as stop:
+        html = stop.value
+
+    assert blocks[0].startswith('<header>')
+    assert len(blocks) == len(REPORT_SECTIONS) + 1
+    assert all(block in html for block in blocks)
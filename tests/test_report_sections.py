@@ -0,0 +1,104 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from config import Config
+from services.llm_resilience import CircuitOpenError
+from services.report_generator import ReportGenerator, REPORT_SECTIONS
+
+
+class FakeSectionCompletions:
+    """Answers each section prompt after a delay and fails the first call for one section."""
+
+    def __init__(self, delay=0.2, failing_section=None, error=None):
+        self.delay = delay
+        self.failing_section = failing_section
+        # With an error, the failing section raises it on every call
+        self.error = error
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def create(self, **kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        title = next(section['title'] for section in REPORT_SECTIONS if f"### Section: {section['title']}\n" in prompt)
+        with self.lock:
+            self.calls.append(title)
+            should_fail = title == self.failing_section and self.calls.count(title) == 1
+        time.sleep(self.delay)
+        if title == self.failing_section and self.error:
+            raise self.error
+        if should_fail:
+            raise RuntimeError("Rate limited")
+        message = SimpleNamespace(content=f"```html\n<h2>{title}</h2><p>{title} content</p>\n```")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def make_generator(completions):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    util = SimpleNamespace(get_current_year=lambda: 2026)
+    return ReportGenerator(client, 'gpt-4o', util)
+
+
+@pytest.fixture(autouse=True)
+def sections_mode(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'sections')
+    monkeypatch.setattr(Config, 'LLM_SECTION_CONCURRENCY', 8)
+
+
+def test_sections_are_generated_concurrently_and_assembled_in_order():
+    completions = FakeSectionCompletions(delay=0.2)
+    generator = make_generator(completions)
+
+    started_at = time.monotonic()
+    html = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+    elapsed = time.monotonic() - started_at
+
+    assert elapsed < 0.2 * len(REPORT_SECTIONS) / 2
+    positions = [html.index(f"<h2>{section['title'].replace('&', '&amp;')}</h2>") for section in REPORT_SECTIONS]
+    assert positions == sorted(positions)
+    assert '<p>Conclusion content</p>' in html
+    assert '```' not in html
+    assert '<h3>John</h3>' in html
+
+
+def test_failed_section_is_retried_alone():
+    completions = FakeSectionCompletions(delay=0, failing_section='Data Management')
+    generator = make_generator(completions)
+
+    html = generator.generate_report_content('Technology', ['a', 'b', 'c'], 'john')
+
+    assert '<p>Data Management content</p>' in html
+    assert completions.calls.count('Data Management') == 2
+    assert len(completions.calls) == len(REPORT_SECTIONS) + 1
+
+
+def run_stream(generator):
+    stream = generator.stream_report_content('Technology', ['a', 'b', 'c'], 'john')
+    blocks = []
+    try:
+        while True:
+            blocks.append(next(stream))
+    except StopIteration as stop:
+        return blocks, stop.value
+
+
+def test_stream_serves_mock_sections_once_the_breaker_opens():
+    failing = REPORT_SECTIONS[2]
+    completions = FakeSectionCompletions(delay=0, failing_section=failing['title'], error=CircuitOpenError('open'))
+
+    blocks, html = run_stream(make_generator(completions))
+
+    assert len(blocks) == len(REPORT_SECTIONS) + 1
+    assert f"<p>{REPORT_SECTIONS[1]['title']} content</p>" in blocks[2]
+    assert all('<p>Mock ' in block for block in blocks[3:])
+    assert all(block in html for block in blocks[1:])
+
+
+def test_stream_returns_no_content_when_a_section_keeps_failing(monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_SECTION_RETRIES', 0)
+    completions = FakeSectionCompletions(delay=0, failing_section=REPORT_SECTIONS[1]['title'])
+
+    blocks, html = run_stream(make_generator(completions))
+
+    assert html == ''
+    assert len(blocks) == 2
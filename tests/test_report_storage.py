@@ -0,0 +1,85 @@
+import os
+from prometheus_client import REGISTRY
+from services.report_storage import ReportStorage, atomic_write
+
+
+def age(path, seconds):
+    """Backdates a file's last access and modification by `seconds`."""
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def store_report(storage, file_name, data, key):
+    blob_path = storage.blob_path(key)
+    atomic_write(blob_path, data)
+    path = storage.path_for(file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.link(blob_path, path)
+    return blob_path, path
+
+
+def test_paths_are_sharded_and_legacy_files_still_found(tmp_path):
+    storage = ReportStorage(str(tmp_path))
+    path = storage.path_for('report-ann-1.pdf')
+    assert len(storage.relative_path(path).split(os.sep)) == 3
+    assert path == storage.path_for('report-ann-1.pdf')
+
+    (tmp_path / 'report-old.pdf').write_bytes(b'%PDF')
+    assert storage.path_for('report-old.pdf') == str(tmp_path / 'report-old.pdf')
+
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    path = str(tmp_path / 'a' / 'file.pdf')
+    atomic_write(path, b'one')
+    atomic_write(path, b'two')
+    assert open(path, 'rb').read() == b'two'
+    assert os.listdir(tmp_path / 'a') == ['file.pdf']
+
+
+def test_age_policy_removes_unread_reports_and_their_orphaned_blobs(tmp_path):
+    storage = ReportStorage(str(tmp_path), max_age=3600)
+    old_blob, old_report = store_report(storage, 'report-old.pdf', b'%PDF old', 'a' * 64)
+    new_blob, new_report = store_report(storage, 'report-new.pdf', b'%PDF new', 'b' * 64)
+    # Reports are hard links, so this also ages the stored PDF past the orphan grace period
+    age(old_report, 7200)
+
+    removed = storage.sweep()
+
+    assert removed == {'age': 1, 'size': 0, 'orphan': 1}
+    assert not os.path.exists(old_report) and not os.path.exists(old_blob)
+    assert os.path.exists(new_report) and os.path.exists(new_blob)
+
+
+def test_size_policy_evicts_least_recently_accessed_first(tmp_path):
+    storage = ReportStorage(str(tmp_path), max_bytes=2500)
+    paths = []
+    for index in range(3):
+        _, path = store_report(storage, f'report-{index}.pdf', bytes(1000), f'{index}' * 64)
+        age(path, 100 * (3 - index))
+        paths.append(path)
+    # Downloading the oldest report makes it the most recently used
+    storage.touch(paths[0])
+
+    removed = storage.sweep()
+
+    assert removed['size'] == 1
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
+    assert REGISTRY.get_sample_value('report_storage_bytes') == 2000
+    assert REGISTRY.get_sample_value('report_storage_files', {'kind': 'blob'}) == 2
+
+
+def test_shared_blob_is_kept_while_any_report_links_to_it(tmp_path):
+    storage = ReportStorage(str(tmp_path))
+    blob_path, first = store_report(storage, 'report-first.pdf', b'%PDF same', 'c' * 64)
+    second = storage.path_for('report-second.pdf')
+    os.makedirs(os.path.dirname(second), exist_ok=True)
+    os.link(blob_path, second)
+    age(blob_path, 7200)
+
+    os.remove(first)
+    assert storage.sweep()['orphan'] == 0
+    assert os.path.exists(blob_path)
+
+    os.remove(second)
+    assert storage.sweep()['orphan'] == 1
+    assert not os.path.exists(blob_path)
@@ -0,0 +1,86 @@
+import json
+from types import SimpleNamespace
+import pytest
+import app as app_module
+
+REPORT_CHUNKS = [
+    "```html\n<body>\n<header><h1>AI Insights",
+    " Report</h1></header>\n<div class=\"container\">\n<section><h2>Introduction</h2>",
+    "<p>Intro</p></section>\n<section><h2>Conclusion</h2><p>Done</p>",
+    "</section>\n</div>\n</body>\n```",
+]
+
+REPORT_REQUEST = {
+    'client_name': 'John Doe',
+    'client_email': 'john.doe@example.com',
+    'industry': 'Technology',
+    'question1': 'Optimizing processes',
+    'question2': 'Improving UX',
+    'question3': 'Data analysis',
+}
+
+
+class FakeCompletions:
+    def create(self, **kwargs):
+        assert kwargs['stream'] is True
+        for text in REPORT_CHUNKS:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(app_module.report_generator, 'client', fake_client)
+    monkeypatch.setattr(app_module, 'pdf_service', None)
+    app_module.app.config.update({"TESTING": True})
+    return app_module.app.test_client()
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_stream_emits_sections_then_complete(client):
+    response = client.post('/generate_report/stream', json=REPORT_REQUEST)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ['section', 'section', 'section', 'complete']
+    assert events[0][1]['html'].startswith('<header>')
+    assert 'Introduction' in events[1][1]['html']
+    assert events[-1][1]['status'] == 'success'
+    assert 'report_id' in events[-1][1]
+
+
+def test_stream_rejects_invalid_data(client):
+    response = client.post('/generate_report/stream', json={'client_name': 'John Doe'})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def failed_generation(monkeypatch):
+    published = []
+
+    def no_content(*args, **kwargs):
+        return ''
+        yield
+
+    monkeypatch.setattr(app_module.report_generator, 'generate_report_content', lambda *args: '')
+    monkeypatch.setattr(app_module.report_generator, 'stream_report_content', no_content)
+    monkeypatch.setattr(app_module, 'publish_report', lambda *args: published.append(args))
+    monkeypatch.setattr(app_module, 'job_queue_service', None)
+    return published
+
+
+def test_failed_generation_is_not_published(client, failed_generation):
+    response = client.post('/generate_report', json=REPORT_REQUEST)
+    assert response.status_code == 500
+
+    events = parse_events(client.post('/generate_report/stream', json=REPORT_REQUEST).get_data(as_text=True))
+    assert [name for name, _ in events] == ['error']
+    assert failed_generation == []
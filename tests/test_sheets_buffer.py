@@ -0,0 +1,103 @@
+import json
+import time
+from services.sheets_buffer_service import SheetsRowBuffer
+from services.sheets_service import REPORT_COLUMNS, SheetsService
+
+
+class FakeSheet:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def write_records(self, records):
+        if self.fail:
+            raise ConnectionError('Sheets unavailable')
+        self.calls.append([record['report_id'] for record in records])
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_rows_are_coalesced_until_the_size_threshold(tmp_path):
+    sheet = FakeSheet()
+    buffer = SheetsRowBuffer(sheet.write_records, max_rows=3, max_age=60, spill_path=str(tmp_path / 'spill.jsonl'))
+    buffer.start()
+    try:
+        for report_id in ('r1', 'r2'):
+            buffer.add({'report_id': report_id})
+        time.sleep(0.1)
+        assert sheet.calls == []
+        buffer.add({'report_id': 'r3'})
+        assert wait_for(lambda: sheet.calls)
+        assert sheet.calls == [['r1', 'r2', 'r3']]
+    finally:
+        buffer.close()
+
+
+def test_rows_are_flushed_by_age_and_on_close(tmp_path):
+    sheet = FakeSheet()
+    buffer = SheetsRowBuffer(sheet.write_records, max_rows=100, max_age=0.1, spill_path=str(tmp_path / 'spill.jsonl'))
+    buffer.start()
+    buffer.add({'report_id': 'r1'})
+    assert wait_for(lambda: sheet.calls)
+    buffer.max_age = 60
+    buffer.add({'report_id': 'r2'})
+    buffer.close()
+    assert sheet.calls == [['r1'], ['r2']]
+
+
+def test_failed_rows_are_spilled_and_sent_first_on_the_next_flush(tmp_path):
+    spill_path = tmp_path / 'spill.jsonl'
+    sheet = FakeSheet()
+    sheet.fail = True
+    buffer = SheetsRowBuffer(sheet.write_records, max_rows=10, max_age=60, spill_path=str(spill_path))
+    buffer.add({'report_id': 'r1', 'pdf_url': None})
+    assert buffer.flush() == 0
+    assert [json.loads(line) for line in spill_path.read_text().splitlines()] == [{'report_id': 'r1', 'pdf_url': None}]
+
+    # Another process picks up the spilled rows together with its own
+    sheet.fail = False
+    other = SheetsRowBuffer(sheet.write_records, max_rows=10, max_age=60, spill_path=str(spill_path))
+    other.add({'report_id': 'r2'})
+    assert other.flush() == 2
+    assert sheet.calls == [['r1', 'r2']]
+    assert spill_path.read_text() == ''
+
+
+def test_rows_stay_buffered_without_a_spill_file():
+    sheet = FakeSheet()
+    sheet.fail = True
+    buffer = SheetsRowBuffer(sheet.write_records, max_rows=10, max_age=60)
+    buffer.add({'report_id': 'r1'})
+    assert buffer.flush() == 0
+    sheet.fail = False
+    buffer.add({'report_id': 'r2'})
+    assert buffer.flush() == 2
+    assert sheet.calls == [['r1', 'r2']]
+
+
+def test_rows_follow_the_sheet_header_order(monkeypatch, make_sheets_service):
+    monkeypatch.setattr(SheetsService, 'spreadsheet_id', 'spreadsheet-1')
+    sheets = make_sheets_service(sheets=[
+        ({'status': '200'}, json.dumps({'values': [['industry', 'report_id', 'notes', 'client_name']]})),
+        ({'status': '200'}, 'echo_request_body'),
+    ])
+    result = sheets.append_records([
+        {'report_id': 'r1', 'client_name': 'Ann', 'industry': 'Retail', 'doc_url': None},
+        {'client_name': 'Bob', 'report_id': 'r2', 'industry': None},
+    ])
+    assert result == {'values': [['Retail', 'r1', '', 'Ann'], ['', 'r2', '', 'Bob']]}
+
+
+def test_empty_sheet_gets_the_default_header(monkeypatch, make_sheets_service):
+    monkeypatch.setattr(SheetsService, 'spreadsheet_id', 'spreadsheet-1')
+    sheets = make_sheets_service(sheets=[
+        ({'status': '200'}, json.dumps({'range': 'Sheet1!1:1'})),
+        ({'status': '200'}, 'echo_request_body'),
+    ])
+    assert sheets.get_header() == REPORT_COLUMNS
+    assert sheets.get_header() == REPORT_COLUMNS
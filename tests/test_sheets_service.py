@@ -0,0 +1,59 @@
+import json
+import threading
+import httplib2
+from config import Config
+from services.sheets_service import SheetsService
+
+
+def test_construction_makes_no_requests(monkeypatch, make_sheets_service, service_account_info):
+    def no_network(*args, **kwargs):
+        raise AssertionError('SheetsService made a request while starting')
+
+    monkeypatch.setattr(httplib2.Http, 'request', no_network)
+    service = SheetsService(service_account_info, 'ReportData')
+    assert service.drive_service and service.docs_service and service.sheets_service
+
+
+def test_ids_are_looked_up_once_and_cached_on_disk(make_sheets_service):
+    service = make_sheets_service(drive=[
+        ({'status': '200'}, json.dumps({'files': [{'id': 'sheet-1'}]})),
+        ({'status': '200'}, json.dumps({'files': [{'id': 'folder-1'}]})),
+    ])
+    assert service.spreadsheet_id == 'sheet-1'
+    assert service.folder_id == 'folder-1'
+    assert service.spreadsheet_id == 'sheet-1'
+
+    # A new worker reads both IDs from the cache; any request would exhaust the empty mock
+    restarted = make_sheets_service()
+    assert (restarted.spreadsheet_id, restarted.folder_id) == ('sheet-1', 'folder-1')
+    with open(Config.GOOGLE_ID_CACHE_PATH) as f:
+        assert 'spreadsheet:ReportData' in json.load(f)['reports@test-project.iam.gserviceaccount.com']
+
+
+def test_missing_sheet_is_created(make_sheets_service):
+    service = make_sheets_service(
+        drive=[({'status': '200'}, json.dumps({'files': []}))],
+        sheets=[({'status': '200'}, json.dumps({'spreadsheetId': 'new-sheet'}))]
+    )
+    assert service.spreadsheet_id == 'new-sheet'
+
+
+def test_each_thread_sends_requests_on_its_own_connection(make_sheets_service, service_account_info):
+    service = SheetsService(service_account_info, 'ReportData')
+    seen = {}
+
+    def record(name):
+        request = service.drive_service.files().list()
+        seen[name] = (request.http, service._http())
+
+    threads = [threading.Thread(target=record, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    record('main')
+
+    assert all(request_http is thread_http for request_http, thread_http in seen.values())
+    assert len({id(request_http) for request_http, _ in seen.values()}) == 3
+    # Every connection authorizes with the same credentials
+    assert all(request_http.credentials is service.creds for request_http, _ in seen.values())
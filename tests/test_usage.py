@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+import pytest
+from prometheus_client import REGISTRY
+from config import Config
+from services.llm_cache_service import LLMResponseCache
+from services.report_generator import ReportGenerator, REPORT_SECTIONS
+from services.usage_service import DailyBudget, estimate_cost, usage_tracking
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        usage = SimpleNamespace(
+            prompt_tokens=1000, completion_tokens=500, prompt_tokens_details=SimpleNamespace(cached_tokens=400)
+        )
+        message = SimpleNamespace(content='<body><section><h2>A</h2></section></body>')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def make_generator(completions, **kwargs):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return ReportGenerator(client, 'gpt-4o', SimpleNamespace(get_current_year=lambda: 2026), **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def single_html_mode(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'single')
+    monkeypatch.setattr(Config, 'REPORT_OUTPUT_MODE', 'html')
+
+
+def test_estimate_cost_discounts_cached_tokens():
+    # 600 uncached and 400 cached prompt tokens plus 500 completion tokens at gpt-4o prices
+    expected = (600 * 2.50 + 400 * 1.25 + 500 * 10.00) / 1_000_000
+    assert estimate_cost('gpt-4o', 1000, 500, 400) == pytest.approx(expected)
+    assert estimate_cost('unknown-model', 1000, 500) == 0
+
+
+def test_usage_is_accumulated_across_section_threads(monkeypatch):
+    monkeypatch.setattr(Config, 'REPORT_GENERATION_MODE', 'sections')
+    before = REGISTRY.get_sample_value('llm_tokens_total', {'model': 'gpt-4o', 'industry': 'Retail', 'kind': 'prompt'}) or 0
+
+    with usage_tracking('Retail') as usage:
+        make_generator(FakeCompletions()).generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+
+    totals = usage.as_dict()
+    assert totals['calls'] == len(REPORT_SECTIONS)
+    assert totals['prompt_tokens'] == 1000 * len(REPORT_SECTIONS)
+    assert totals['cached_tokens'] == 400 * len(REPORT_SECTIONS)
+    assert totals['cost_usd'] == pytest.approx(estimate_cost('gpt-4o', 1000, 500, 400) * len(REPORT_SECTIONS))
+    assert totals['models'] == ['gpt-4o']
+    after = REGISTRY.get_sample_value('llm_tokens_total', {'model': 'gpt-4o', 'industry': 'Retail', 'kind': 'prompt'})
+    assert after - before == 1000 * len(REPORT_SECTIONS)
+
+
+def test_budget_guard_serves_cached_then_mock_content(tmp_path):
+    cost = estimate_cost('gpt-4o', 1000, 500, 400)
+    budget = DailyBudget(cost * 1.5, str(tmp_path / 'budget.sqlite3'))
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    completions = FakeCompletions()
+    generator = make_generator(completions, cache=cache, budget=budget)
+
+    generator.generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+    generator.generate_report_content('Healthcare', ['a', 'b', 'c'], 'john')
+    assert completions.calls == 2
+    assert budget.exceeded()
+
+    cached = generator.generate_report_content('Retail', ['a', 'b', 'c'], 'john')
+    assert '<h2>A</h2>' in cached
+    mock = generator.generate_report_content('Finance', ['a', 'b', 'c'], 'john')
+    assert 'AI Insights Report - Mock' in mock
+    assert completions.calls == 2
+
+
+def test_unknown_industries_share_one_metric_label():
+    labels = {'model': 'gpt-4o', 'industry': 'other', 'kind': 'prompt'}
+    before = REGISTRY.get_sample_value('llm_tokens_total', labels) or 0
+
+    for industry in ('Quantum Basket Weaving', 'Underwater Retail'):
+        with usage_tracking(industry) as usage:
+            make_generator(FakeCompletions()).generate_report_content(industry, ['a', 'b', 'c'], 'john')
+        assert usage.as_dict()['prompt_tokens'] == 1000
+
+    assert REGISTRY.get_sample_value('llm_tokens_total', labels) - before == 2000
+    assert REGISTRY.get_sample_value('llm_tokens_total', {**labels, 'industry': 'Underwater Retail'}) is None
@@ -0,0 +1,18 @@
+import argparse
+import logging
+from app import industry_content_service
+
+logger = logging.getLogger(__name__)
+
+# Precomputes the industry-scoped report sections for every industry in the report
+# form. Run it on a schedule (e.g. daily) so web workers only generate the
+# personalized sections.
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute shared industry report sections.')
+    parser.add_argument('--force', action='store_true', help='Regenerate content even if it is still fresh.')
+    args = parser.parse_args()
+
+    if not industry_content_service:
+        raise SystemExit("ENABLE_INDUSTRY_CONTENT and the LLM service must be enabled to precompute industry content.")
+    logger.info(f"Precomputing content for {len(industry_content_service.industries)} industries")
+    industry_content_service.warm_up(force=args.force)
@@ -0,0 +1,16 @@
+import logging
+from app import job_queue_service
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Standalone report job worker. Run with JOB_QUEUE_BACKEND=sqlite so that jobs queued
+# by the web workers are picked up here; set JOB_RUN_WORKERS_IN_WEB=False to keep
+# report generation out of the web processes entirely.
+if __name__ == '__main__':
+    if not job_queue_service:
+        raise SystemExit("ENABLE_JOB_QUEUE must be set to run the report job worker.")
+    if Config.JOB_QUEUE_BACKEND == 'inprocess':
+        logger.warning("The in-process job backend cannot receive jobs from other processes. Use JOB_QUEUE_BACKEND=sqlite.")
+    logger.info(f"Starting report job worker with concurrency {job_queue_service.concurrency}")
+    job_queue_service.run_forever()